@@ -2,7 +2,16 @@
 Manager to handle the search of duplicate files.
    - Duplicates in folder
    - Compare two folders
+   - Watch folders for duplicates
+   - Asynchronous scan, with its events
+   - Similar images
+   - Partial duplicates
 """
 
 from .duplicates import DuplicatesInFolder
 from .duplicates import CompareFolders
+from .duplicates import DuplicatesWatcher
+from .duplicates import scan
+from .duplicates import SimilarImages
+from .duplicates import PartialDuplicates
+from .core.events import ScanEvent, ScanCancelled
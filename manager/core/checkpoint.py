@@ -0,0 +1,198 @@
+"""
+Append-only checkpoint of a scan, to resume it after an interruption.
+   - scan: the first record, the settings the checkpoint was written with.
+   - folder: a listed folder, with its files and sub-folders (the walker position).
+   - hash: a partial or full hash of a file, keyed as the hash cache.
+
+The records are appended as the scan goes, and synced to the disk every
+C_CHECKPOINT_SYNC_RECORDS records or C_CHECKPOINT_SYNC_INTERVAL seconds, so
+a crash loses at most the last unsynced records. A truncated last line is
+ignored when the checkpoint is loaded.
+
+The groups are not written: they are rebuilt from the files and their hashes,
+the same way as during the scan.
+"""
+import json
+import os
+from time import monotonic
+
+# Custom imports
+from . import constants as const
+from . import custom_printer as log
+from .utils import FileEntry
+
+
+class Checkpoint:
+    """Summary:\n
+    Record the listed folders and the hashes of a scan, and give them back
+    when the scan is resumed.
+    """
+
+    file_path: str
+
+    # Listed folders of the resumed scan by path, not walked again yet.
+    listings: dict
+
+    # Hashes of the resumed scan by (algorithm, device, inode).
+    hashes: dict
+
+    # Indicate if a previous checkpoint was loaded, and the number of
+    # folders and hashes it gave back.
+    resumed: bool = False
+    resumed_folders: int = 0
+    resumed_hashes: int = 0
+
+    def __init__(self, file_path: str, fingerprint: dict, resume: bool, on_warning=None):
+        """Summary:\n
+        Open the checkpoint, and load it when the scan is resumed with the same settings.
+
+        Args:\n
+            file_path (str): 'The checkpoint file.'
+            fingerprint (dict): 'The settings of the scan, the checkpoint is only
+                                 resumed when they match.'
+            resume (bool): 'Indicate if the previous checkpoint is resumed, or replaced.'
+            on_warning (callable, optional): 'Called with the warnings, printed when not given.'
+        """
+        self.file_path = file_path
+        self.on_warning = on_warning or log.print_warning
+        self.listings = {}
+        self.hashes = {}
+        self.__unsynced = 0
+        self.__synced = monotonic()
+
+        fingerprint = json.loads(json.dumps(fingerprint))
+        self.resumed = resume and self.__load(fingerprint)
+
+        if not resume and os.path.exists(file_path):
+            self.on_warning(
+                f'Replacing the checkpoint of the previous scan ({file_path}), '
+                'run the scan with RESUME=1 (--resume) to continue it.')
+
+        self.__output = open(file_path, 'a' if self.resumed else 'w', encoding='utf-8')
+        if not self.resumed:
+            self.__write({'kind': 'scan', 'settings': fingerprint})
+
+    def __load(self, fingerprint: dict):
+        """Load the listings and the hashes of the checkpoint.
+
+        Args:
+            fingerprint (dict): The settings of the scan.
+
+        Returns:
+            (bool): True if the checkpoint was loaded, False if it is missing or
+                    was written with other settings.
+        """
+        if not os.path.exists(self.file_path):
+            return False
+
+        header = None
+
+        with open(self.file_path, 'r', encoding='utf-8') as checkpoint:
+            for line in checkpoint:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # The last record was cut by the interruption.
+                    continue
+
+                if header is None:
+                    header = record
+                    if record.get('kind') != 'scan' or record.get('settings') != fingerprint:
+                        self.on_warning(
+                            f'The checkpoint ({self.file_path}) was written with other settings! '
+                            'Starting over...')
+                        return False
+                    continue
+
+                if record['kind'] == 'folder':
+                    self.listings[record['path']] = (
+                        [FileEntry(*item) for item in record['files']],
+                        [(folder, tuple(key) if key else None)
+                         for folder, key in record['folders']])
+                else:
+                    device, inode, size, mtime_ns = record['file']
+                    self.hashes[(record['algorithm'], device, inode)] = (
+                        size, mtime_ns, record['hash'])
+
+        self.resumed_folders = len(self.listings)
+        return True
+
+    def __write(self, record: dict):
+        """Append the given record, and sync the checkpoint when due.
+
+        Args:
+            record (dict): The record.
+        """
+        self.__output.write(json.dumps(record) + '\n')
+        self.__unsynced += 1
+
+        if self.__unsynced >= const.C_CHECKPOINT_SYNC_RECORDS or \
+                monotonic() - self.__synced >= const.C_CHECKPOINT_SYNC_INTERVAL:
+            self.sync()
+
+    def sync(self):
+        """Summary:\n
+        Write the buffered records to the disk.
+        """
+        self.__output.flush()
+        os.fsync(self.__output.fileno())
+
+        self.__unsynced = 0
+        self.__synced = monotonic()
+
+    def add_listing(self, _root: str, folder: str, listing: tuple):
+        """Summary:\n
+        Record a listed folder, the walker `on_listing` handler.
+
+        Args:\n
+            _root (str): 'The root folder being walked.'
+            folder (str): 'The listed folder.'
+            listing (tuple): 'The files (FileEntry) and the sub-folders ((path, (device, inode))).'
+        """
+        self.__write({'kind': 'folder', 'path': folder,
+                      'files': [list(entry) for entry in listing[0]],
+                      'folders': listing[1]})
+
+    def get(self, entry, algorithm: str):
+        """Summary:\n
+        Get the hash of the given file recorded by the resumed scan.
+
+        Args:\n
+            entry (FileEntry): 'The file we want the hash of.'
+            algorithm (str): 'The hash algorithm, or the name of the partial hash.'
+
+        Returns:\n
+            (str): 'The recorded hash, or None if missing or outdated.'
+        """
+        item = self.hashes.get((algorithm, entry.device, entry.inode))
+        if item is None or item[0] != entry.size or item[1] != entry.mtime_ns:
+            return None
+
+        self.resumed_hashes += 1
+        return item[2]
+
+    def set(self, entry, algorithm: str, file_hash: str):
+        """Summary:\n
+        Record the hash of the given file.
+
+        Args:\n
+            entry (FileEntry): 'The hashed file.'
+            algorithm (str): 'The hash algorithm, or the name of the partial hash.'
+            file_hash (str): 'The hash of the file.'
+        """
+        self.__write({'kind': 'hash', 'algorithm': algorithm,
+                      'file': [entry.device, entry.inode, entry.size, entry.mtime_ns],
+                      'hash': file_hash})
+
+    def close(self, remove=False):
+        """Summary:\n
+        Sync and close the checkpoint, and remove it once the scan is finished.
+
+        Args:\n
+            remove (bool, optional): 'Indicate if the checkpoint is removed.'
+        """
+        self.sync()
+        self.__output.close()
+
+        if remove:
+            os.remove(self.file_path)
@@ -0,0 +1,212 @@
+"""
+Content-defined chunking (FastCDC) of the files, to find the files sharing
+a part of their content (VM images, database dumps, archives...).
+
+The chunk boundaries are placed where a Gear rolling hash of the last 32 bytes
+matches a mask, so an insertion only moves the boundaries around it and the
+rest of the chunks are still shared. As in FastCDC, a stricter mask is used
+before the average chunk size and a looser one after it (normalized chunking),
+which narrows the distribution of the chunk sizes.
+
+The rolling hash of a whole block is computed with NumPy, by doubling the
+window (1, 2, 4... 32 bytes) instead of rolling it byte by byte, and the files
+are read block by block so the memory stays bounded.
+
+Requires the optional `numpy` package.
+"""
+import hashlib
+from functools import lru_cache
+
+# Custom imports
+from . import constants as const
+from .utils import get_hasher, read_file_blocks
+
+# Optional vectorized rolling hash.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Number of bytes of the rolling hash window, one bit of the hash per byte.
+C_GEAR_WINDOW = 32
+
+
+def is_available():
+    """Summary:\n
+    Check if the files can be chunked.
+
+    Returns:\n
+        (bool): 'True when numpy is installed.'
+    """
+    return numpy is not None
+
+
+@lru_cache(maxsize=None)
+def __gear_table():
+    """Get the random 32 bits value of each byte, derived from its md5 so the
+    chunks are the same on every run.
+
+    Returns:
+        (ndarray): The 256 values, as uint32.
+    """
+    return numpy.array(
+        [int.from_bytes(hashlib.md5(bytes([value])).digest()[:4], 'little')
+         for value in range(256)],
+        dtype=numpy.uint32)
+
+
+@lru_cache(maxsize=None)
+def __masks(avg_size: int):
+    """Get the masks of the boundaries before and after the average chunk size.
+
+    The masks keep the highest bits of the hash, which depend on the whole window.
+    The small mask has two more bits than log2(avg_size) and the large mask two less,
+    the large mask is a subset of the small one.
+
+    Args:
+        avg_size (int): The average chunk size.
+
+    Returns:
+        (tuple(int, int)): The masks before and after the average size.
+    """
+    bits = max(avg_size.bit_length() - 1, 3)
+
+    def top_bits(count: int):
+        count = min(count, C_GEAR_WINDOW)
+        return ((1 << count) - 1) << (C_GEAR_WINDOW - count)
+
+    return top_bits(bits + 2), top_bits(bits - 2)
+
+
+def __gear_hashes(data):
+    """Compute the Gear hash of each position of the given data.
+
+    The hash of a position is sum(gear[data[i - k]] << k) over the window, computed
+    in log2(window) passes: each pass adds the hash of the previous half window.
+
+    Args:
+        data (ndarray): The bytes, as uint8.
+
+    Returns:
+        (ndarray): The hash of each position, as uint32.
+    """
+    hashes = __gear_table().take(data)
+
+    width = 1
+    while width < C_GEAR_WINDOW:
+        shifted = hashes[:-width] << numpy.uint32(width)
+        hashes[width:] += shifted
+        width *= 2
+
+    return hashes
+
+
+def __find_cut(small, large, start: int, end: int, sizes: tuple, final: bool):
+    """Find the end of the chunk starting at the given position.
+
+    Args:
+        small (ndarray): The candidate cuts matching the small mask, sorted.
+        large (ndarray): The candidate cuts matching the large mask, sorted.
+        start (int): The start of the chunk.
+        end (int): The end of the loaded data.
+        sizes (tuple(int, int, int)): The minimum, average and maximum chunk sizes.
+        final (bool): Indicate if the loaded data reaches the end of the file.
+
+    Returns:
+        (int): The end of the chunk, or None when more data must be loaded.
+    """
+    min_size, avg_size, max_size = sizes
+
+    if final and end - start <= min_size:
+        return end if end > start else None
+
+    index = numpy.searchsorted(small, start + min_size)
+    if index < len(small) and small[index] < start + avg_size:
+        return int(small[index])
+
+    index = numpy.searchsorted(large, start + avg_size)
+    if index < len(large) and large[index] < start + max_size:
+        return int(large[index])
+
+    if end >= start + max_size:
+        return start + max_size
+
+    return end if final else None
+
+
+def iter_chunks(file_path: str, min_size: int, avg_size: int, max_size: int):
+    """Summary:\n
+    Split the given file in content-defined chunks.
+
+    Note: the yielded chunks are only valid until the next chunk is read.
+
+    Args:\n
+        file_path (str): 'The file to split.'
+        min_size (int): 'The minimum chunk size, larger than the hash window (32 bytes).'
+        avg_size (int): 'The average chunk size.'
+        max_size (int): 'The maximum chunk size.'
+
+    Returns:\n
+        (generator(memoryview)): 'The chunks of the file, in order.'
+    """
+    small_mask, large_mask = __masks(avg_size)
+    sizes = (max(min_size, C_GEAR_WINDOW), avg_size, max_size)
+
+    pending = numpy.empty(0, dtype=numpy.uint8)
+    blocks = read_file_blocks(file_path, const.C_CHUNK_READ_SIZE)
+
+    while True:
+        block = next(blocks, None)
+        final = block is None
+
+        # The data of the unfinished chunk, followed by the new block.
+        if not final:
+            pending = numpy.concatenate((pending, numpy.frombuffer(block, dtype=numpy.uint8)))
+
+        hashes = __gear_hashes(pending)
+        small = numpy.flatnonzero((hashes & numpy.uint32(small_mask)) == 0) + 1
+        large = numpy.flatnonzero((hashes & numpy.uint32(large_mask)) == 0) + 1
+        del hashes
+
+        start = 0
+        while True:
+            cut = __find_cut(small, large, start, len(pending), sizes, final)
+            if cut is None:
+                break
+
+            yield memoryview(pending[start:cut])
+            start = cut
+
+        pending = pending[start:]
+
+        if final:
+            return
+
+
+def chunk_file(file_path: str, algorithm: str, min_size: int, avg_size: int, max_size: int):
+    """Summary:\n
+    Get the digests and the sizes of the content-defined chunks of the given file.
+
+    Args:\n
+        file_path (str): 'The file to split.'
+        algorithm (str): 'The hash algorithm of the chunks.'
+        min_size (int): 'The minimum chunk size.'
+        avg_size (int): 'The average chunk size.'
+        max_size (int): 'The maximum chunk size.'
+
+    Returns:\n
+        (list(tuple)): 'The raw digest and the size of each chunk, in order, or None
+                        when the file can't be read.'
+    """
+    chunks = []
+
+    try:
+        for chunk in iter_chunks(file_path, min_size, avg_size, max_size):
+            hasher = get_hasher(algorithm)
+            hasher.update(chunk)
+            chunks.append((hasher.digest(), len(chunk)))
+
+    except OSError:
+        return None
+
+    return chunks
@@ -5,11 +5,204 @@ Contains all the constants files that the project needs.
 # Environment variables.
 E_SCAN_FOLDERS = 'SCAN_FOLDERS'
 E_OUTPUT_FOLDER = 'OUTPUT_FOLDER'
+E_PARTIAL_BLOCK_SIZE = 'PARTIAL_BLOCK_SIZE'
+E_PARTIAL_SAMPLES = 'PARTIAL_SAMPLES'
+E_HASH_CACHE = 'HASH_CACHE'
+E_HASH_CACHE_MAX_ENTRIES = 'HASH_CACHE_MAX_ENTRIES'
+E_HASH_CACHE_MAX_AGE = 'HASH_CACHE_MAX_AGE'
+E_HASH_EXECUTOR = 'HASH_EXECUTOR'
+E_HASH_WORKERS = 'HASH_WORKERS'
+E_HASH_ALGORITHM = 'HASH_ALGORITHM'
+E_VERIFY_ALGORITHM = 'VERIFY_ALGORITHM'
+E_VERIFY_CONTENT = 'VERIFY_CONTENT'
+E_EXCLUDE_PATTERNS = 'EXCLUDE_PATTERNS'
+E_MIN_FILE_SIZE = 'MIN_FILE_SIZE'
+E_MAX_FILE_SIZE = 'MAX_FILE_SIZE'
+E_FOLLOW_SYMLINKS = 'FOLLOW_SYMLINKS'
+E_WALK_WORKERS = 'WALK_WORKERS'
+E_REPORT_FORMATS = 'REPORT_FORMATS'
+E_EXTERNAL_SORT = 'EXTERNAL_SORT'
+E_SORT_MEMORY = 'SORT_MEMORY'
+E_SORT_TEMP_FOLDER = 'SORT_TEMP_FOLDER'
+E_DESTINATION_INDEX = 'DESTINATION_INDEX'
+E_DESTINATION_INDEX_REFRESH = 'DESTINATION_INDEX_REFRESH'
+E_MATERIALIZE_MODE = 'MATERIALIZE_MODE'
+E_MATERIALIZE_WORKERS = 'MATERIALIZE_WORKERS'
+E_DEDUP_MODE = 'DEDUP_MODE'
+E_DEDUP_KEEPER = 'DEDUP_KEEPER'
+E_DEDUP_PREFERRED_ROOTS = 'DEDUP_PREFERRED_ROOTS'
+E_DEDUP_DRY_RUN = 'DEDUP_DRY_RUN'
+E_WATCH_MODE = 'WATCH_MODE'
+E_WATCH_INTERVAL = 'WATCH_INTERVAL'
+E_LOG_FOLDERS = 'LOG_FOLDERS'
+E_GLOBAL_SCAN = 'GLOBAL_SCAN'
+E_SIMILARITY_HASH = 'SIMILARITY_HASH'
+E_SIMILARITY_RADIUS = 'SIMILARITY_RADIUS'
+E_SIMILARITY_EXTENSIONS = 'SIMILARITY_EXTENSIONS'
+E_SIMILARITY_WORKERS = 'SIMILARITY_WORKERS'
+E_CHUNK_AVG_SIZE = 'CHUNK_AVG_SIZE'
+E_CHUNK_MIN_FILE_SIZE = 'CHUNK_MIN_FILE_SIZE'
+E_CHUNK_MIN_RATIO = 'CHUNK_MIN_RATIO'
+E_CHUNK_MAX_FILES = 'CHUNK_MAX_FILES'
+E_CHECKPOINT = 'CHECKPOINT'
+E_RESUME = 'RESUME'
+E_IO_SCHEDULER = 'IO_SCHEDULER'
+E_IO_DEVICE_WORKERS = 'IO_DEVICE_WORKERS'
+E_IO_ORDER = 'IO_ORDER'
+E_IO_MAX_MBPS = 'IO_MAX_MBPS'
+E_IO_MAX_IOPS = 'IO_MAX_IOPS'
+E_METRICS = 'METRICS'
+E_METRICS_SLOW_FILE = 'METRICS_SLOW_FILE'
+E_PROFILE = 'PROFILE'
 
 # Constants.
 # Optimal value for reading a file.
 C_DEFAULT_BUFFER_SIZE = 65536
 
+# Files larger than the threshold are read by larger blocks. They are not memory mapped:
+# a file truncated while mapped kills the process (SIGBUS), for a small gain. (256 MB file,
+# warm cache, xxh3: mmap ~3400 MB/s, readinto ~3250 MB/s, read() ~3000 MB/s)
+C_LARGE_FILE_THRESHOLD = 64 * 1024 * 1024
+C_LARGE_FILE_BLOCK_SIZE = 1024 * 1024
+
+# Number of folders listed concurrently.
+C_DEFAULT_WALK_WORKERS = 4
+
+# Hash algorithm used to group the files.
+C_DEFAULT_HASH_ALGORITHM = 'md5'
+
+# Byte-for-byte comparison: memory used by the blocks of a group,
+# smallest block and number of files kept open at once.
+C_COMPARE_MEMORY = 64 * 1024 * 1024
+C_MIN_COMPARE_BLOCK_SIZE = 4096
+C_COMPARE_MAX_OPEN_FILES = 256
+
+# Number of files hashed at once, to bound the memory of the hashing stages.
+C_HASH_BATCH_SIZE = 10000
+
+# Result of a file that can't be read anymore, removed or changed since it was listed.
+C_UNREADABLE_FILE = ''
+
+# External sort, memory budget (MB) of the buffered records before a run is spilled.
+C_DEFAULT_SORT_MEMORY = 256
+# Estimated memory of a record beside its paths, records per pickled chunk of a run,
+# and maximum number of runs merged at once.
+C_SORT_RECORD_OVERHEAD = 200
+C_SORT_CHUNK_SIZE = 1024
+C_SORT_MAX_RUNS = 64
+
+# Number of duplicate groups confirmed at once.
+C_VERIFY_BATCH_SIZE = 1024
+
+# Asynchronous scan, minimum seconds between two progress events,
+# and events queued before the scan waits for the consumer.
+C_PROGRESS_INTERVAL = 0.5
+C_SCAN_QUEUE_SIZE = 256
+
+# Size of the head, tail and sampled blocks hashed before the full content.
+C_DEFAULT_PARTIAL_BLOCK_SIZE = 4096
+# Number of blocks sampled between the head and the tail of the file.
+C_DEFAULT_PARTIAL_SAMPLES = 0
+
+# Hash cache, the entries not seen for (n) days are evicted.
+C_HASH_CACHE_FILE = 'hash_cache.sqlite'
+C_DEFAULT_HASH_CACHE_MAX_ENTRIES = 10000000
+C_DEFAULT_HASH_CACHE_MAX_AGE = 30
+C_HASH_CACHE_BATCH_SIZE = 10000
+# Version of the cache database schema, older caches are dropped.
+C_HASH_CACHE_VERSION = 2
+
+# Version of the destination index schema, older indexes are rebuilt.
+C_DESTINATION_INDEX_VERSION = 1
+
+# Hashing executor (serial, thread or process) and its workers.
+C_DEFAULT_HASH_EXECUTOR = 'thread'
+C_DEFAULT_HASH_WORKERS = 4
+# Number of tasks in flight for each worker.
+C_HASH_QUEUE_FACTOR = 2
+# Number of files sent at once to a worker process.
+C_PROCESS_CHUNK_SIZE = 32
+
+# Materialization of the compared files (copy, hardlink, reflink, symlink or manifest).
+C_DEFAULT_MATERIALIZE_MODE = 'copy'
+C_DEFAULT_MATERIALIZE_WORKERS = 8
+C_COMPARE_MANIFEST_FILE = 'compare_manifest.csv'
+# Linux ioctl cloning a file (copy-on-write file systems: btrfs, xfs...).
+C_FICLONE = 0x40049409
+
+# Replacement of the duplicates with links to a kept file, chosen by the keeper policy.
+C_DEDUP_MODES = ['hardlink', 'reflink']
+C_DEDUP_KEEPERS = ['oldest', 'shortest', 'root']
+C_DEFAULT_DEDUP_KEEPER = 'oldest'
+C_DEDUP_JOURNAL_FILE = 'dedup_journal.jsonl'
+C_DEDUP_TEMP_SUFFIX = '.dfm.tmp'
+
+# Watch mode (auto, inotify or poll), seconds between two checks, and seconds
+# the events following a change are gathered for.
+C_DEFAULT_WATCH_MODE = 'auto'
+C_DEFAULT_WATCH_INTERVAL = 5
+C_WATCH_SETTLE_TIME = 0.5
+C_INOTIFY_BUFFER_SIZE = 65536
+C_WATCH_DELTAS_FILE = 'watch_deltas.jsonl'
+
+# Metrics (json and/or prometheus), hashing time (ms) above which a file is slow,
+# number of slow files kept, and buckets of the file size (bytes) and latency (seconds) histograms.
+C_METRICS_JSON_FILE = 'metrics.json'
+C_METRICS_PROMETHEUS_FILE = 'metrics.prom'
+C_DEFAULT_METRICS_SLOW_FILE = 1000
+C_METRICS_SLOW_FILES = 100
+C_METRICS_SIZE_BUCKETS = [4 ** power * 1024 for power in range(12)]
+C_METRICS_LATENCY_BUCKETS = [0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 60]
+
+# Profiling (cprofile or tracemalloc), frames kept by tracemalloc and allocations written.
+C_PROFILE_FILE = 'profile.prof'
+C_TRACEMALLOC_FILE = 'tracemalloc.txt'
+C_TRACEMALLOC_FRAMES = 10
+C_TRACEMALLOC_TOP = 50
+
+# Similar images: perceptual hash (ahash, dhash or phash), maximum Hamming distance
+# of two similar images, image extensions and decoding processes.
+C_DEFAULT_SIMILARITY_HASH = 'dhash'
+C_DEFAULT_SIMILARITY_RADIUS = 6
+C_DEFAULT_SIMILARITY_EXTENSIONS = ['jpg', 'jpeg', 'png', 'gif', 'bmp', 'tif', 'tiff', 'webp']
+C_DEFAULT_SIMILARITY_WORKERS = 4
+C_SIMILAR_RESULT_SUFFIX = 'similar'
+# Side of the perceptual hashes (8 = 64 bits), images decoded at (n) times the hashed size,
+# and pixels of the DCT of the pHash, as a factor of the side.
+C_PERCEPTUAL_HASH_SIZE = 8
+C_PERCEPTUAL_DRAFT_FACTOR = 4
+C_PERCEPTUAL_DCT_FACTOR = 4
+
+# Partial duplicates: average chunk size (the minimum is a quarter of it and the
+# maximum four times it), minimum size of the chunked files, minimum shared ratio (%)
+# of the reported pairs, maximum number of files of a chunk counted in the pairs
+# (0 = no limit), and size of the blocks read by the chunker.
+C_DEFAULT_CHUNK_AVG_SIZE = 64 * 1024
+C_DEFAULT_CHUNK_MIN_FILE_SIZE = 1024 * 1024
+C_DEFAULT_CHUNK_MIN_RATIO = 50
+C_DEFAULT_CHUNK_MAX_FILES = 64
+C_CHUNK_SIZE_FACTOR = 4
+C_CHUNK_READ_SIZE = 1024 * 1024
+C_PARTIAL_RESULT_SUFFIX = 'partial'
+
+# Checkpoint of the running scan: file, flag resuming it, name of the partial hashes,
+# and number of records or seconds between two syncs to the disk.
+C_CHECKPOINT_FILE = 'scan_checkpoint.jsonl'
+C_RESUME_FLAG = '--resume'
+C_CHECKPOINT_PARTIAL = 'partial'
+C_CHECKPOINT_SYNC_RECORDS = 10000
+C_CHECKPOINT_SYNC_INTERVAL = 5
+
+# I/O scheduler: files read at once on each device, order of the reads on a device
+# (extent, inode or none), and bytes read counted as one operation by the IOPS limit,
+# beside the open of the file.
+C_DEFAULT_IO_DEVICE_WORKERS = 2
+C_DEFAULT_IO_ORDER = 'extent'
+C_IO_OPERATION_SIZE = 1024 * 1024
+
+# Name of the result of a global scan, over all the scanned folders.
+C_GLOBAL_RESULT_NAME = 'all_folders'
+
 C_OUT_FOLDER_NAME = 'dfm_output'
 C_DUPLICATES_FOLDER = 'Duplicates'
 C_NON_DUPLICATES_FOLDER = 'Non-Duplicates'
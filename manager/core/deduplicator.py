@@ -0,0 +1,480 @@
+"""
+Replace the duplicate files with hard links or reflinks to a kept file.
+
+The duplicates are compared byte-for-byte with the kept file first, the
+digests alone never replace a file.
+
+Each duplicate is replaced atomically: the link is created under a
+temporary name next to the duplicate, synced, then renamed over it.
+The kept file is checked again just before the link and the duplicate just
+before the rename, and the files modified since the scan started are never
+touched.
+
+Every replacement is written to an undo journal (JSON Lines) first, and
+completed once renamed, see `undo_journal`.
+"""
+import json
+import os
+from os import path
+from shutil import copy2
+from time import time_ns
+
+# Custom imports
+from . import constants as const
+from . import custom_printer as log
+from .materializers import reflink_file
+from .utils import genrate_hash, split_identical_files
+
+
+def _sync_folder(folder: str):
+    """Flush the entries of the given folder to the disk (renames, links).
+
+    Args:
+        folder (str): The folder to sync.
+    """
+    try:
+        descriptor = os.open(folder, os.O_RDONLY)
+    except OSError:
+        # Folders can't be opened on every platform.
+        return
+
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def _temp_path(file_path: str):
+    """Get the temporary path used to replace the given file.
+
+    Args:
+        file_path (str): The file to be replaced.
+
+    Returns:
+        (str): The temporary path, in the same folder.
+    """
+    folder, name = path.split(file_path)
+    return path.join(folder, f'.{name}.{os.getpid()}{const.C_DEDUP_TEMP_SUFFIX}')
+
+
+class Deduplicator:
+    """Summary:\n
+    Replace the duplicates of each group with links to a kept file.
+    """
+
+    mode: str
+    keeper: str
+    preferred_roots: list
+    dry_run: bool
+    journal_path: str
+    hash_algorithm: str
+
+    # Attributes for summary.
+    replaced_files: int = 0
+    reclaimed_bytes: int = 0
+    skipped_files: int = 0
+
+    def __init__(self, mode: str, keeper: str, preferred_roots: list,
+                 dry_run: bool, journal_path: str, hash_algorithm: str, on_warning=None):
+        """Summary:\n
+        Create the deduplicator, the files modified after its creation are never replaced.
+
+        Args:\n
+            mode (str): 'How the duplicates are replaced. (hardlink or reflink)'
+            keeper (str): 'How the kept file is chosen. (oldest, shortest or root)'
+            preferred_roots (list(str)): 'The folders whose files are kept first (keeper `root`).'
+            dry_run (bool): 'Indicate if the replacements are only reported.'
+            journal_path (str): 'The undo journal.'
+            hash_algorithm (str): 'The algorithm of the digests of the groups, journaled
+                                   to check the content of the files before an undo.'
+            on_warning (callable, optional): 'Called with the warnings, printed when not given.'
+
+        Raises:\n
+            Exception: 'Thrown when the mode or the keeper policy is unknown.'
+        """
+        self.mode = mode.strip().lower()
+        self.keeper = keeper.strip().lower()
+
+        if self.mode not in const.C_DEDUP_MODES:
+            raise Exception(
+                f'Unknown dedup mode ({self.mode})! '
+                f'please choose one of ({", ".join(const.C_DEDUP_MODES)}).')
+
+        if self.keeper not in const.C_DEDUP_KEEPERS:
+            raise Exception(
+                f'Unknown keeper policy ({self.keeper})! '
+                f'please choose one of ({", ".join(const.C_DEDUP_KEEPERS)}).')
+
+        self.preferred_roots = [path.join(path.abspath(root), '')
+                                for root in preferred_roots]
+        self.dry_run = dry_run
+        self.journal_path = journal_path
+        self.hash_algorithm = hash_algorithm
+        self.on_warning = on_warning or log.print_warning
+        self.started_ns = time_ns()
+        self.__journal = None
+
+    def apply(self, records):
+        """Summary:\n
+        Deduplicate the given groups, and yield them unchanged.
+
+        Args:\n
+            records (iterable(GroupRecord)): 'The groups of duplicate files.'
+
+        Returns:\n
+            (generator(GroupRecord)): 'The same groups, once deduplicated.'
+        """
+        try:
+            for record in records:
+                if record.kind == 'duplicates':
+                    self.__deduplicate(record)
+
+                yield record
+        finally:
+            self.close()
+
+    def __stat_files(self, files: list):
+        """Stat the files of the group, dropping the files that can't be replaced safely.
+
+        Args:
+            files (list(str)): The files of the group.
+
+        Returns:
+            (dict): The stats of the files, by path.
+        """
+        stats = {}
+        for file_path in files:
+            try:
+                stats[file_path] = os.stat(file_path, follow_symlinks=False)
+            except OSError:
+                self.skipped_files += 1
+                continue
+
+            # Modified since the scan started, the hash may be outdated.
+            if stats[file_path].st_mtime_ns >= self.started_ns:
+                self.on_warning(
+                    f'The file ({file_path}) was modified during the scan! Skipping...')
+                del stats[file_path]
+                self.skipped_files += 1
+
+        return stats
+
+    def __choose_keeper(self, stats: dict):
+        """Choose the kept file of the group with the keeper policy.
+
+        Args:
+            stats (dict): The stats of the files, by path.
+
+        Returns:
+            (str): The kept file.
+        """
+        if self.keeper == 'shortest':
+            return min(stats, key=lambda file_path: (len(file_path), file_path))
+
+        if self.keeper == 'root':
+            for root in self.preferred_roots:
+                preferred = sorted(file_path for file_path in stats
+                                   if path.abspath(file_path).startswith(root))
+                if preferred:
+                    return preferred[0]
+
+        return min(stats, key=lambda file_path: (stats[file_path].st_mtime_ns, file_path))
+
+    @staticmethod
+    def __identical_files(keeper: str, files: list):
+        """Compare the given files byte-for-byte with the kept file.
+
+        Args:
+            keeper (str): The kept file.
+            files (list(str)): The duplicates of the kept file.
+
+        Returns:
+            (set(str)): The files identical to the kept file.
+        """
+        for group in split_identical_files([keeper] + files):
+            if keeper in group:
+                return set(group)
+
+        return set()
+
+    def __deduplicate(self, record):
+        """Replace the duplicates of the given group with links to its kept file.
+
+        Args:
+            record (GroupRecord): The group of duplicate files.
+        """
+        stats = self.__stat_files(record.files)
+        if len(stats) < 2:
+            return
+
+        keeper = self.__choose_keeper(stats)
+        keeper_stats = stats.pop(keeper)
+
+        candidates = {}
+        for file_path, file_stats in stats.items():
+            # Already linked to the kept file.
+            if (file_stats.st_dev, file_stats.st_ino) == \
+                    (keeper_stats.st_dev, keeper_stats.st_ino):
+                continue
+
+            if file_stats.st_dev != keeper_stats.st_dev or file_stats.st_size != record.size:
+                self.skipped_files += 1
+                continue
+
+            candidates[file_path] = file_stats
+
+        if not candidates:
+            return
+
+        # Compared after the stats were taken, the checks before the replacement
+        # make sure that the compared content is the replaced content.
+        identical = self.__identical_files(keeper, list(candidates))
+
+        for file_path, file_stats in candidates.items():
+            if file_path not in identical:
+                self.on_warning(
+                    f'The file ({file_path}) differs from the kept file ({keeper})! Skipping...')
+                self.skipped_files += 1
+                continue
+
+            # The space is only reclaimed when the duplicate had no other link.
+            reclaimed = record.size if file_stats.st_nlink == 1 else 0
+
+            if not self.dry_run:
+                try:
+                    self.__replace(keeper, keeper_stats, file_path, file_stats, record.hash)
+                except OSError as error:
+                    self.on_warning(
+                        f"Can't replace the file ({file_path}): {error.strerror}. Skipping...")
+                    self.skipped_files += 1
+                    continue
+
+            self.replaced_files += 1
+            self.reclaimed_bytes += reclaimed
+
+    def __replace(self, keeper: str, keeper_stats, file_path: str, file_stats, file_hash: str):
+        """Replace the given file with a link to the kept file: check the kept file
+        again, link it to a temporary name, sync, check the file again, then rename
+        over it.
+
+        Args:
+            keeper (str): The kept file.
+            keeper_stats (stat_result): The stats of the kept file when the group was checked.
+            file_path (str): The duplicate file.
+            file_stats (stat_result): The stats of the duplicate when the group was checked.
+            file_hash (str): The digest of the group.
+
+        Raises:
+            OSError: When the link can't be created or one of the files changed.
+        """
+        temp_path = _temp_path(file_path)
+
+        current = os.stat(keeper, follow_symlinks=False)
+        if (current.st_ino, current.st_size, current.st_mtime_ns) != \
+                (keeper_stats.st_ino, keeper_stats.st_size, keeper_stats.st_mtime_ns):
+            raise OSError(0, 'the kept file changed since it was compared')
+
+        if self.mode == 'hardlink':
+            os.link(keeper, temp_path)
+        else:
+            reflink_file(keeper, temp_path)
+
+        try:
+            if self.mode == 'reflink':
+                # The clone keeps the metadata of the duplicate.
+                os.chmod(temp_path, file_stats.st_mode & 0o7777)
+                os.chown(temp_path, file_stats.st_uid, file_stats.st_gid)
+                os.utime(temp_path, ns=(file_stats.st_atime_ns, file_stats.st_mtime_ns))
+
+                descriptor = os.open(temp_path, os.O_RDONLY)
+                try:
+                    os.fsync(descriptor)
+                finally:
+                    os.close(descriptor)
+
+            current = os.stat(file_path, follow_symlinks=False)
+            if (current.st_ino, current.st_size, current.st_mtime_ns) != \
+                    (file_stats.st_ino, file_stats.st_size, file_stats.st_mtime_ns):
+                raise OSError(0, 'the file changed since it was compared')
+
+            # The inode of the link, the same as the kept file for a hard link.
+            linked = os.stat(temp_path, follow_symlinks=False)
+
+            self.__write_journal({
+                'mode': self.mode,
+                'keeper': keeper,
+                'file': file_path,
+                'temp': temp_path,
+                'size': file_stats.st_size,
+                'hash': file_hash,
+                'algorithm': self.hash_algorithm,
+                'ino': linked.st_ino,
+                'mode_bits': file_stats.st_mode & 0o7777,
+                'uid': file_stats.st_uid,
+                'gid': file_stats.st_gid,
+                'atime_ns': file_stats.st_atime_ns,
+                'mtime_ns': file_stats.st_mtime_ns,
+            })
+
+            os.replace(temp_path, file_path)
+        except OSError:
+            if path.lexists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        _sync_folder(path.dirname(file_path))
+
+        # The rename changed the ctime of the link, it completes the replacement.
+        self.__write_journal({
+            'file': file_path,
+            'ctime_ns': os.stat(file_path, follow_symlinks=False).st_ctime_ns,
+        })
+
+    def __write_journal(self, entry: dict):
+        """Write the given replacement to the undo journal, before it is done.
+
+        Args:
+            entry (dict): The replacement.
+        """
+        if self.__journal is None:
+            self.__journal = open(self.journal_path, 'a', encoding='utf-8')
+
+        self.__journal.write(json.dumps(entry) + '\n')
+        self.__journal.flush()
+        os.fsync(self.__journal.fileno())
+
+    def close(self):
+        """Summary:\n
+        Close the undo journal.
+        """
+        if self.__journal is not None:
+            self.__journal.close()
+            self.__journal = None
+
+
+def _read_journal(journal_path: str):
+    """Read the replacements of the given journal, with their completion.
+
+    Args:
+        journal_path (str): The undo journal.
+
+    Returns:
+        (list(dict)): The replacements, in the order they were done.
+    """
+    entries = []
+
+    with open(journal_path, 'r', encoding='utf-8') as journal:
+        for line in journal:
+            if not line.strip():
+                continue
+
+            item = json.loads(line)
+            if 'mode' in item:
+                entries.append(item)
+            elif entries and entries[-1]['file'] == item['file']:
+                entries[-1].update(item)
+
+    return entries
+
+
+def _check_replacement(entry: dict):
+    """Check that the replaced file is still the link written by the replacement,
+    and that the content of its kept file is still the replaced content.
+
+    Args:
+        entry (dict): The replacement.
+
+    Raises:
+        OSError: When the replaced file or its kept file can't be read.
+
+    Returns:
+        (str): Why the file can't be restored, None when it can.
+    """
+    current = os.stat(entry['file'], follow_symlinks=False)
+    keeper = os.stat(entry['keeper'], follow_symlinks=False)
+    completed = 'ctime_ns' in entry
+
+    if entry['mode'] == 'hardlink':
+        linked = (current.st_dev, current.st_ino) == (keeper.st_dev, keeper.st_ino)
+    else:
+        # The clone has its own inode and times, the kept file doesn't share them.
+        linked = current.st_ino == entry.get('ino', current.st_ino) and \
+            current.st_mtime_ns == entry['mtime_ns'] and \
+            current.st_ctime_ns == entry.get('ctime_ns', current.st_ctime_ns)
+
+    if not linked and not completed:
+        return 'was not replaced, the replacement was interrupted'
+
+    if not linked or current.st_size != entry['size']:
+        return 'changed since it was replaced'
+
+    # The kept file is copied back, a clone is checked too since it has its own blocks.
+    files = [entry['keeper']] if entry['mode'] == 'hardlink' else [entry['keeper'], entry['file']]
+    if entry.get('hash') and any(genrate_hash(file_path, entry['algorithm']) != entry['hash']
+                                 for file_path in files):
+        return 'or its kept file changed since it was replaced'
+
+    return None
+
+
+def undo_journal(journal_path: str, dry_run=False):
+    """Summary:\n
+    Undo the replacements of the given journal, the last one first: each replaced
+    file is copied back from its kept file, with its permissions, owner and times.
+
+    The files that are no longer the link written by their replacement, or whose
+    content changed since, are skipped. The links left by an interrupted replacement
+    are removed.
+
+    Args:\n
+        journal_path (str): 'The undo journal.'
+        dry_run (bool, optional): 'Indicate if the files are only reported.'
+
+    Returns:\n
+        (int): 'The number of restored files.'
+    """
+    entries = _read_journal(journal_path)
+
+    restored = 0
+
+    for entry in reversed(entries):
+        file_path = entry['file']
+
+        # Left by a replacement interrupted before its rename.
+        if not dry_run and entry.get('temp') and path.lexists(entry['temp']):
+            os.remove(entry['temp'])
+
+        try:
+            problem = _check_replacement(entry)
+        except OSError:
+            log.print_warning(f"Can't restore the file ({file_path})! Skipping...")
+            continue
+
+        if problem:
+            log.print_warning(f'The file ({file_path}) {problem}! Skipping...')
+            continue
+
+        restored += 1
+        log.print_ok(f'Restoring the file ({file_path})...')
+
+        if dry_run:
+            continue
+
+        temp_path = _temp_path(file_path)
+        copy2(entry['keeper'], temp_path)
+        os.chmod(temp_path, entry['mode_bits'])
+
+        if 'uid' in entry:
+            try:
+                os.chown(temp_path, entry['uid'], entry['gid'])
+            except PermissionError:
+                log.print_warning(f"Can't restore the owner of the file ({file_path})!")
+
+        os.utime(temp_path, ns=(entry['atime_ns'], entry['mtime_ns']))
+        os.replace(temp_path, file_path)
+        _sync_folder(path.dirname(file_path))
+
+    if not dry_run:
+        os.replace(journal_path, f'{journal_path}.undone')
+
+    return restored
@@ -0,0 +1,208 @@
+"""
+Persistent index of the destination folder, stored in a SQLite database.
+
+The files are indexed by size, their hashes are only computed when a source
+file has the same size, and kept for the next comparisons. The index is
+updated incrementally: the files whose size or modification time changed
+lose their hash, and the removed files are dropped.
+"""
+import sqlite3
+
+# Custom imports
+import manager.core.constants as const
+from .hash_cache import _to_int64
+from .utils import FileEntry
+
+
+class DestinationIndex:
+    """Summary:\n
+    Persistent (size -> hashes -> paths) index of the destination folder.
+    """
+
+    index_file: str
+    root: str
+    algorithm: str
+
+    def __init__(self, index_file: str, root: str, algorithm: str):
+        """Summary:\n
+        Open (or create) the index of the given destination folder.
+
+        The index is emptied when it was built for another folder, and its
+        hashes are dropped when they were computed with another algorithm.
+
+        Args:\n
+            index_file (str): 'The path of the index database.'
+            root (str): 'The destination folder.'
+            algorithm (str): 'The hash algorithm.'
+        """
+        self.index_file = index_file
+        self.root = root
+        self.algorithm = algorithm
+
+        self.__connection = sqlite3.connect(index_file)
+
+        # Drop the indexes created with an older schema.
+        version = self.__connection.execute('PRAGMA user_version').fetchone()[0]
+        if version != const.C_DESTINATION_INDEX_VERSION:
+            self.__connection.execute('DROP TABLE IF EXISTS files')
+            self.__connection.execute('DROP TABLE IF EXISTS settings')
+            self.__connection.execute(
+                f'PRAGMA user_version = {const.C_DESTINATION_INDEX_VERSION}')
+
+        self.__connection.execute(
+            'CREATE TABLE IF NOT EXISTS settings ('
+            ' name TEXT PRIMARY KEY,'
+            ' value TEXT NOT NULL)')
+        self.__connection.execute(
+            'CREATE TABLE IF NOT EXISTS files ('
+            ' path TEXT PRIMARY KEY,'
+            ' size INTEGER NOT NULL,'
+            ' device INTEGER NOT NULL,'
+            ' inode INTEGER NOT NULL,'
+            ' mtime_ns INTEGER NOT NULL,'
+            ' hash TEXT,'
+            ' scan INTEGER NOT NULL)')
+        self.__connection.execute(
+            'CREATE INDEX IF NOT EXISTS files_size ON files (size)')
+
+        settings = dict(self.__connection.execute('SELECT name, value FROM settings'))
+
+        if settings.get('root') != root:
+            self.__connection.execute('DELETE FROM files')
+        elif settings.get('algorithm') != algorithm:
+            self.__connection.execute('UPDATE files SET hash = NULL')
+
+        self.__connection.executemany(
+            'INSERT OR REPLACE INTO settings VALUES (?, ?)',
+            [('root', root), ('algorithm', algorithm)])
+        self.__connection.commit()
+
+    def __len__(self):
+        return self.__connection.execute('SELECT COUNT(*) FROM files').fetchone()[0]
+
+    def update(self, entries):
+        """Summary:\n
+        Update the index with the files of a new walk of the destination folder.
+
+        The unchanged files keep their hash, the new or modified files are
+        added without hash, and the files that are no longer found are removed.
+
+        Args:\n
+            entries (iterable(FileEntry)): 'The files of the destination folder.'
+        """
+        scan = self.__connection.execute(
+            'SELECT COALESCE(MAX(scan), 0) + 1 FROM files').fetchone()[0]
+
+        batch = []
+        for entry in entries:
+            batch.append((entry.path, entry.size, _to_int64(entry.device),
+                           _to_int64(entry.inode), entry.mtime_ns, scan))
+
+            if len(batch) >= const.C_HASH_CACHE_BATCH_SIZE:
+                self.__upsert(batch)
+                batch = []
+
+        self.__upsert(batch)
+
+        self.__connection.execute('DELETE FROM files WHERE scan != ?', (scan,))
+        self.__connection.commit()
+
+    def __upsert(self, batch: list):
+        """Insert or update the given files, dropping the hash of the modified files.
+
+        Args:
+            batch (list(tuple)): The (path, size, device, inode, mtime_ns, scan) of the files.
+        """
+        self.__connection.executemany(
+            'INSERT INTO files VALUES (?, ?, ?, ?, ?, NULL, ?)'
+            ' ON CONFLICT (path) DO UPDATE SET'
+            '  hash = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns'
+            '         THEN hash END,'
+            '  size = excluded.size, device = excluded.device, inode = excluded.inode,'
+            '  mtime_ns = excluded.mtime_ns, scan = excluded.scan', batch)
+
+    def __select_sizes(self, sizes):
+        """Store the given sizes in a temporary table, to join them with the files.
+
+        Args:
+            sizes (iterable(int)): The sizes of the source files.
+        """
+        self.__connection.execute(
+            'CREATE TEMP TABLE IF NOT EXISTS sizes (size INTEGER PRIMARY KEY)')
+        self.__connection.execute('DELETE FROM sizes')
+        self.__connection.executemany(
+            'INSERT OR IGNORE INTO sizes VALUES (?)', ((size,) for size in sizes))
+
+    def unhashed(self, sizes):
+        """Summary:\n
+        Get the files of the given sizes that were not hashed yet.
+
+        Args:\n
+            sizes (iterable(int)): 'The sizes of the source files.'
+
+        Returns:\n
+            (list(FileEntry)): 'The destination files to be hashed.'
+        """
+        self.__select_sizes(sizes)
+
+        return [FileEntry(file_path, size, device, inode, mtime_ns, 1)
+                for file_path, size, device, inode, mtime_ns in self.__connection.execute(
+                    'SELECT path, files.size, device, inode, mtime_ns'
+                    ' FROM files JOIN sizes ON files.size = sizes.size'
+                    ' WHERE hash IS NULL ORDER BY path')]
+
+    def set_hashes(self, entries: list, hashes: list):
+        """Summary:\n
+        Store the hashes of the given destination files.
+
+        Args:\n
+            entries (list(FileEntry)): 'The hashed files.'
+            hashes (list(str)): 'The hashes of the files, in the same order.'
+        """
+        self.__connection.executemany(
+            'UPDATE files SET hash = ? WHERE path = ?',
+            ((file_hash, entry.path) for entry, file_hash in zip(entries, hashes)))
+        self.__connection.commit()
+
+    def hashes(self, sizes):
+        """Summary:\n
+        Get the hashes of the destination files of the given sizes.
+
+        Args:\n
+            sizes (iterable(int)): 'The sizes of the source files.'
+
+        Returns:\n
+            (dict(set)): 'The hashes of the destination files, by size.'
+        """
+        self.__select_sizes(sizes)
+
+        result = {}
+        for size, file_hash in self.__connection.execute(
+                'SELECT DISTINCT files.size, hash'
+                ' FROM files JOIN sizes ON files.size = sizes.size'
+                ' WHERE hash IS NOT NULL'):
+            result.setdefault(size, set()).add(file_hash)
+
+        return result
+
+    def sizes(self, sizes):
+        """Summary:\n
+        Get the given sizes that have at least one destination file.
+
+        Args:\n
+            sizes (iterable(int)): 'The sizes of the source files.'
+
+        Returns:\n
+            (set(int)): 'The sizes found in the destination folder.'
+        """
+        self.__select_sizes(sizes)
+
+        return {size for (size,) in self.__connection.execute(
+            'SELECT DISTINCT files.size FROM files JOIN sizes ON files.size = sizes.size')}
+
+    def close(self):
+        """Summary:\n
+        Save the index and close the database.
+        """
+        self.__connection.commit()
+        self.__connection.close()
@@ -0,0 +1,119 @@
+"""
+Structured events emitted while the folders are scanned.
+   - started: the exploration of a base folder starts.
+   - folder: a sub-folder was listed.
+   - warning: a message for the user (ex: missing folder).
+   - message: a step of the scan (info, ok) or its details (detail).
+   - stage: a stage of the scan starts (walk, size, partial_hash, hash, group, verify, report
+     or copy, decode or cluster for the similar images, chunk or pair for the partial duplicates).
+   - progress: the counters of the current stage, see `ScanProgress`.
+   - group: a group of duplicate files or hard links (GroupRecord).
+   - cluster: a cluster of similar images (SimilarImages).
+   - pair: a pair of files sharing a part of their content (PartialDuplicates).
+   - report: a result file being written (the result, the metrics or the profile).
+   - summary: the lines of the summary of the base folder.
+"""
+from collections import namedtuple
+from time import monotonic
+
+# Custom imports
+from . import constants as const
+
+# An event of the scan of the (folder) base folder, the data depends on the (kind).
+ScanEvent = namedtuple('ScanEvent', ['kind', 'folder', 'data'])
+
+
+class ScanCancelled(Exception):
+    """Summary:\n
+    Raised in the scan when it was cancelled.
+    """
+
+
+class ScanProgress:
+    """Summary:\n
+    Count the files and bytes processed by the current stage, and
+    compute its rates and remaining time.
+    """
+
+    stage: str = ''
+    files: int = 0
+    bytes: int = 0
+    total_files: int = 0
+    total_bytes: int = 0
+
+    def __init__(self):
+        self.__started = monotonic()
+        self.__emitted = 0.0
+
+    def start(self, stage: str, total_files=0, total_bytes=0):
+        """Summary:\n
+        Start a new stage.
+
+        Args:\n
+            stage (str): 'The stage.
+                          (walk, size, partial_hash, hash, group, verify, report or copy)'
+            total_files (int, optional): 'The number of files of the stage, 0 when unknown.'
+            total_bytes (int, optional): 'The number of bytes of the stage, 0 when unknown.'
+        """
+        self.stage = stage
+        self.files = 0
+        self.bytes = 0
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.__started = monotonic()
+        self.__emitted = 0.0
+
+    def advance(self, files: int, size: int):
+        """Summary:\n
+        Count the given processed files.
+
+        Args:\n
+            files (int): 'The number of processed files.'
+            size (int): 'Their size.'
+        """
+        self.files += files
+        self.bytes += size
+
+    def due(self):
+        """Summary:\n
+        Check if a progress event is due, at most one every C_PROGRESS_INTERVAL seconds.
+
+        Returns:\n
+            (bool): 'True when a progress event must be emitted.'
+        """
+        now = monotonic()
+        if now - self.__emitted < const.C_PROGRESS_INTERVAL:
+            return False
+
+        self.__emitted = now
+        return True
+
+    def snapshot(self):
+        """Summary:\n
+        Get the counters, the rates and the remaining time of the stage.
+
+        Returns:\n
+            (dict): 'The stage, files, bytes, totals, files_per_second,
+                     bytes_per_second and eta (seconds, None when unknown).'
+        """
+        elapsed = max(monotonic() - self.__started, 1e-9)
+        files_per_second = self.files / elapsed
+        bytes_per_second = self.bytes / elapsed
+
+        eta = None
+        if self.total_bytes and bytes_per_second:
+            eta = max(0.0, (self.total_bytes - self.bytes) / bytes_per_second)
+        elif self.total_files and files_per_second:
+            eta = max(0.0, (self.total_files - self.files) / files_per_second)
+
+        return {
+            'stage': self.stage,
+            'files': self.files,
+            'bytes': self.bytes,
+            'total_files': self.total_files,
+            'total_bytes': self.total_bytes,
+            'elapsed': elapsed,
+            'files_per_second': files_per_second,
+            'bytes_per_second': bytes_per_second,
+            'eta': eta,
+        }
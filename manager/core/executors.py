@@ -0,0 +1,162 @@
+"""
+Executors used to run the hashing of the files.
+   - Serial: run the tasks one by one in the main thread (debugging).
+   - Thread: run the tasks in a pool of threads (hashlib releases the GIL).
+   - Process: run the tasks in a pool of processes (small files heavy trees).
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+
+# Custom imports
+import manager.core.constants as const
+
+
+def _call_chunk(func, chunk: list):
+    """Call the given function on each arguments tuple of the chunk.
+
+    Args:
+        func (callable): The function to call.
+        chunk (list(tuple)): The arguments of each call.
+
+    Returns:
+        (list): The results of the calls.
+    """
+    return [func(*args) for args in chunk]
+
+
+class SerialExecutor:
+    """Summary:\n
+    Run the tasks one by one in the main thread.
+    """
+
+    workers: int = 1
+
+    def map(self, func, *iterables):
+        """Summary:\n
+        Apply the function to the items of the iterables.
+
+        Args:\n
+            func (callable): 'The function to apply.'
+            iterables (iterable): 'The arguments of the function.'
+
+        Returns:\n
+            (generator): 'The results, in the order of the items.'
+        """
+        return map(func, *iterables)
+
+    def shutdown(self):
+        """Summary:\n
+        Release the resources of the executor.
+        """
+
+
+class PoolExecutor(SerialExecutor):
+    """Summary:\n
+    Run the tasks in a pool of workers, with a bounded number of tasks in flight.
+    """
+
+    pool_class = ThreadPoolExecutor
+    chunk_size: int = 1
+
+    def __init__(self, workers: int):
+        """Summary:\n
+        Create the pool of workers.
+
+        Args:\n
+            workers (int): 'The number of workers of the pool.'
+        """
+        self.workers = max(1, workers)
+        self.__pool = None
+
+    def map(self, func, *iterables):
+        """Summary:\n
+        Apply the function to the items of the iterables.
+
+        Only (workers * C_HASH_QUEUE_FACTOR) chunks of items are in flight at any
+        time, so the memory stays flat whatever the number of items.
+
+        Args:\n
+            func (callable): 'The function to apply.'
+            iterables (iterable): 'The arguments of the function.'
+
+        Returns:\n
+            (generator): 'The results, in the order of the items.'
+        """
+        if self.__pool is None:
+            self.__pool = self.pool_class(max_workers=self.workers)
+
+        max_in_flight = self.workers * const.C_HASH_QUEUE_FACTOR
+        arguments = zip(*iterables)
+        pending = deque()
+
+        while True:
+            chunk = list(islice(arguments, self.chunk_size))
+            if not chunk:
+                break
+
+            if len(pending) >= max_in_flight:
+                yield from pending.popleft().result()
+
+            pending.append(self.__pool.submit(_call_chunk, func, chunk))
+
+        while pending:
+            yield from pending.popleft().result()
+
+    def shutdown(self):
+        """Summary:\n
+        Stop the workers of the pool.
+        """
+        if self.__pool is not None:
+            self.__pool.shutdown()
+            self.__pool = None
+
+
+class ThreadExecutor(PoolExecutor):
+    """Summary:\n
+    Run the tasks in a pool of threads.
+    """
+
+    pool_class = ThreadPoolExecutor
+
+
+class ProcessExecutor(PoolExecutor):
+    """Summary:\n
+    Run the tasks in a pool of processes, sending the items by chunks.
+    """
+
+    pool_class = ProcessPoolExecutor
+    chunk_size = const.C_PROCESS_CHUNK_SIZE
+
+
+EXECUTORS = {
+    'serial': SerialExecutor,
+    'thread': ThreadExecutor,
+    'process': ProcessExecutor,
+}
+
+
+def create_executor(name: str, workers: int):
+    """Summary:\n
+    Create the executor with the given name.
+
+    Args:\n
+        name (str): 'The name of the executor. (serial, thread or process)'
+        workers (int): 'The number of workers.'
+
+    Raises:\n
+        Exception: 'Thrown when the executor is unknown.'
+
+    Returns:\n
+        (SerialExecutor): 'The executor.'
+    """
+    name = name.strip().lower()
+
+    if name not in EXECUTORS:
+        raise Exception(
+            f'Unknown executor ({name})! please choose one of ({", ".join(EXECUTORS)}).')
+
+    if name == 'serial':
+        return SerialExecutor()
+
+    return EXECUTORS[name](workers)
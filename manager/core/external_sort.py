@@ -0,0 +1,162 @@
+"""
+Disk backed sorting of records that don't fit in memory.
+
+The records (tuples) are buffered up to a memory budget, then sorted and
+spilled to run files in a temporary folder. Iterating the sorter merges
+the runs (k-way merge), so only one chunk of each run is in memory.
+"""
+import pickle
+from heapq import merge
+from os import path, remove
+from shutil import rmtree
+from tempfile import mkdtemp
+
+# Custom imports
+from . import constants as const
+
+
+def _read_run(run_path: str):
+    """Read the records of the given run file.
+
+    Args:
+        run_path (str): The run file.
+
+    Returns:
+        (generator(tuple)): The records, in the order they were written.
+    """
+    with open(run_path, 'rb') as run_file:
+        while True:
+            try:
+                chunk = pickle.load(run_file)
+            except EOFError:
+                break
+
+            yield from chunk
+
+
+class ExternalSorter:
+    """Summary:\n
+    Sort records bigger than the memory, by spilling sorted runs to the disk.
+    """
+
+    memory_budget: int
+    temp_folder: str
+
+    def __init__(self, memory_budget: int, temp_folder=None, record_size=None):
+        """Summary:\n
+        Create an empty sorter.
+
+        Args:\n
+            memory_budget (int): 'The size of the records buffered before a run is spilled.'
+            temp_folder (str, optional): 'The folder of the run files
+                                          (default: the system temp folder).'
+            record_size (callable, optional): 'Estimate the memory used by a record.'
+        """
+        self.memory_budget = memory_budget
+        self.temp_folder = temp_folder or None
+        self.__record_size = record_size or (lambda _: const.C_SORT_RECORD_OVERHEAD)
+        self.__buffer = []
+        self.__buffered = 0
+        self.__runs = []
+        self.__written_runs = 0
+        self.__folder = None
+        self.__count = 0
+
+    def __len__(self):
+        return self.__count
+
+    def add(self, record: tuple):
+        """Summary:\n
+        Add the given record, spilling a run when the budget is reached.
+
+        Args:\n
+            record (tuple): 'The record to be sorted.'
+        """
+        self.__buffer.append(record)
+        self.__buffered += self.__record_size(record)
+        self.__count += 1
+
+        if self.__buffered >= self.memory_budget:
+            self.__spill()
+
+    def __spill(self):
+        """Sort the buffered records and write them to a new run file."""
+        if not self.__buffer:
+            return
+
+        self.__buffer.sort()
+        self.__runs.append(self.__write_run(self.__buffer))
+        self.__buffer = []
+        self.__buffered = 0
+
+    def __write_run(self, records):
+        """Write the given sorted records to a new run file.
+
+        Args:
+            records (iterable(tuple)): The sorted records.
+
+        Returns:
+            (str): The path of the run file.
+        """
+        if self.__folder is None:
+            self.__folder = mkdtemp(prefix='dfm_sort_', dir=self.temp_folder)
+
+        run_path = path.join(self.__folder, f'run_{self.__written_runs}.bin')
+        self.__written_runs += 1
+
+        with open(run_path, 'wb') as run_file:
+            chunk = []
+            for record in records:
+                chunk.append(record)
+
+                if len(chunk) >= const.C_SORT_CHUNK_SIZE:
+                    pickle.dump(chunk, run_file, pickle.HIGHEST_PROTOCOL)
+                    chunk = []
+
+            if chunk:
+                pickle.dump(chunk, run_file, pickle.HIGHEST_PROTOCOL)
+
+        return run_path
+
+    def __iter__(self):
+        """Summary:\n
+        Merge the runs and yield the records in order, then remove the runs.
+
+        When all the records fit in the budget, they are sorted in memory.
+
+        Returns:\n
+            (generator(tuple)): 'The sorted records.'
+        """
+        try:
+            if not self.__runs:
+                self.__buffer.sort()
+                records, self.__buffer = self.__buffer, []
+                yield from records
+                return
+
+            self.__spill()
+
+            # Merge the oldest runs first, to keep a bounded number of open files.
+            while len(self.__runs) > const.C_SORT_MAX_RUNS:
+                runs = self.__runs[:const.C_SORT_MAX_RUNS]
+                merged = self.__write_run(merge(*map(_read_run, runs)))
+                self.__runs = self.__runs[const.C_SORT_MAX_RUNS:] + [merged]
+
+                for run_path in runs:
+                    remove(run_path)
+
+            yield from merge(*map(_read_run, self.__runs))
+        finally:
+            self.close()
+
+    def close(self):
+        """Summary:\n
+        Remove the run files and the buffered records.
+        """
+        self.__buffer = []
+        self.__buffered = 0
+        self.__runs = []
+
+        if self.__folder is not None:
+            rmtree(self.__folder, ignore_errors=True)
+            self.__folder = None
@@ -0,0 +1,331 @@
+"""
+Compact, array backed index of the loaded files.
+
+Each file is a row of typed columns (sizes, devices, inodes...), the folders
+are stored once and the file names are packed in a single buffer, so a file
+costs a few dozen bytes instead of a few hundred bytes of Python objects.
+The files are grouped by sorting the columns instead of per file dictionaries.
+"""
+from array import array
+from itertools import groupby, islice
+from os import path
+
+# Custom imports
+from .utils import FileEntry
+
+# Optional vectorized sorting.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class FileIndex:
+    """Summary:\n
+    Compact index of the loaded files, one row per file.
+    """
+
+    __slots__ = [
+        '__sizes', '__devices', '__inodes', '__mtimes', '__links',
+        '__folder_ids', '__folders', '__folders_lookup', '__names', '__offsets',
+        '__excluded', '__digests', 'digest_size',
+    ]
+
+    def __init__(self, digest_size: int):
+        """Summary:\n
+        Create an empty index.
+
+        Args:\n
+            digest_size (int): 'The size of the raw digests stored in the index.'
+        """
+        self.digest_size = digest_size
+
+        self.__sizes = array('Q')
+        self.__devices = array('Q')
+        self.__inodes = array('Q')
+        self.__mtimes = array('q')
+        self.__links = array('I')
+
+        # The folders are stored once, and the names are packed together.
+        self.__folder_ids = array('I')
+        self.__folders = []
+        self.__folders_lookup = {}
+        self.__names = bytearray()
+        self.__offsets = array('Q', [0])
+
+        # Allocated once the files are all added.
+        self.__excluded = None
+        self.__digests = None
+
+    def __len__(self):
+        return len(self.__sizes)
+
+    def add(self, entry):
+        """Summary:\n
+        Add the given file to the index.
+
+        Args:\n
+            entry (FileEntry): 'The file to be added.'
+        """
+        folder, name = path.split(entry.path)
+
+        folder_id = self.__folders_lookup.get(folder)
+        if folder_id is None:
+            folder_id = len(self.__folders)
+            self.__folders.append(folder)
+            self.__folders_lookup[folder] = folder_id
+
+        self.__sizes.append(entry.size)
+        self.__devices.append(entry.device & 0xFFFFFFFFFFFFFFFF)
+        self.__inodes.append(entry.inode & 0xFFFFFFFFFFFFFFFF)
+        self.__mtimes.append(entry.mtime_ns)
+        self.__links.append(entry.links)
+        self.__folder_ids.append(folder_id)
+        self.__names += name.encode('utf-8', 'surrogateescape')
+        self.__offsets.append(len(self.__names))
+
+    def path(self, row: int):
+        """Summary:\n
+        Get the path of the given file.
+
+        Args:\n
+            row (int): 'The row of the file.'
+
+        Returns:\n
+            (str): 'The path of the file.'
+        """
+        name = self.__names[self.__offsets[row]:self.__offsets[row + 1]]
+
+        return path.join(
+            self.__folders[self.__folder_ids[row]],
+            name.decode('utf-8', 'surrogateescape'))
+
+    def size(self, row: int):
+        """Summary:\n
+        Get the size of the given file.
+
+        Args:\n
+            row (int): 'The row of the file.'
+
+        Returns:\n
+            (int): 'The size of the file.'
+        """
+        return self.__sizes[row]
+
+    def entry(self, row: int):
+        """Summary:\n
+        Get the entry of the given file.
+
+        Args:\n
+            row (int): 'The row of the file.'
+
+        Returns:\n
+            (FileEntry): 'The entry of the file.'
+        """
+        return FileEntry(self.path(row), self.__sizes[row], self.__devices[row],
+                         self.__inodes[row], self.__mtimes[row], self.__links[row])
+
+    def linked_rows(self):
+        """Summary:\n
+        Get the files that have more than one link, grouped by (device, inode).
+
+        Returns:\n
+            (list(list)): 'The rows of the files sharing the same inode, (2) rows at least.'
+        """
+        linked = {}
+        for row, links in enumerate(self.__links):
+            if links != 1:
+                key = (self.__devices[row], self.__inodes[row])
+                linked.setdefault(key, []).append(row)
+
+        return [rows for rows in linked.values() if len(rows) > 1]
+
+    def exclude(self, row: int):
+        """Summary:\n
+        Exclude the given file from the size groups. (ex: the extra links of a file)
+
+        Args:\n
+            row (int): 'The row of the file.'
+        """
+        if self.__excluded is None:
+            self.__excluded = bytearray(len(self))
+
+        self.__excluded[row] = 1
+
+    def totals(self):
+        """Summary:\n
+        Count the files of the index, and their size, without the excluded files.
+
+        Returns:\n
+            (tuple(int, int)): 'The number of files and their total size.'
+        """
+        if self.__excluded is None:
+            return len(self), sum(self.__sizes)
+
+        sizes = [size for size, excluded in zip(self.__sizes, self.__excluded)
+                 if not excluded]
+
+        return len(sizes), sum(sizes)
+
+    def group_by_size(self, min_count=2):
+        """Summary:\n
+        Group the files by size, sorting the sizes column.
+
+        Args:\n
+            min_count (int, optional): 'The minimum number of files of the returned groups.'
+
+        Returns:\n
+            (RowGroups): 'The rows of the files of each size, by increasing size.'
+        """
+        if numpy is not None:
+            return self.__group_by_size_vectorized(min_count)
+
+        groups = RowGroups()
+
+        rows = range(len(self))
+        if self.__excluded is not None:
+            rows = [row for row in rows if not self.__excluded[row]]
+
+        rows = sorted(rows, key=self.__sizes.__getitem__)
+
+        for _, group in groupby(rows, key=self.__sizes.__getitem__):
+            group = list(group)
+            if len(group) >= min_count:
+                groups.append(group)
+
+        return groups
+
+    def __group_by_size_vectorized(self, min_count: int):
+        """Group the files by size with numpy, see `group_by_size`.
+
+        Args:
+            min_count (int): The minimum number of files of the returned groups.
+
+        Returns:
+            (RowGroups): The rows of the files of each size, by increasing size.
+        """
+        if not len(self):
+            return RowGroups()
+
+        sizes = numpy.frombuffer(self.__sizes, dtype=numpy.uint64)
+        rows = numpy.arange(len(sizes), dtype=numpy.uint64)
+
+        if self.__excluded is not None:
+            rows = numpy.flatnonzero(
+                numpy.frombuffer(self.__excluded, dtype=numpy.uint8) == 0).astype(numpy.uint64)
+
+        rows = rows[numpy.argsort(sizes[rows], kind='stable')]
+
+        bounds = numpy.flatnonzero(numpy.diff(sizes[rows])) + 1
+        starts = numpy.concatenate(([0], bounds))
+        ends = numpy.concatenate((bounds, [len(rows)]))
+        lengths = ends - starts
+        keep = lengths >= min_count
+
+        return RowGroups(
+            rows[numpy.repeat(keep, lengths)],
+            numpy.concatenate(([0], numpy.cumsum(lengths[keep]))).astype(numpy.uint64))
+
+    def set_digest(self, row: int, digest: bytes):
+        """Summary:\n
+        Store the raw digest of the given file.
+
+        Args:\n
+            row (int): 'The row of the file.'
+            digest (bytes): 'The raw digest of the file.'
+        """
+        if self.__digests is None:
+            self.__digests = bytearray(len(self) * self.digest_size)
+
+        start = row * self.digest_size
+        self.__digests[start:start + self.digest_size] = digest
+
+    def digest(self, row: int):
+        """Summary:\n
+        Get the raw digest of the given file.
+
+        Args:\n
+            row (int): 'The row of the file.'
+
+        Returns:\n
+            (bytes): 'The raw digest of the file.'
+        """
+        start = row * self.digest_size
+        return bytes(self.__digests[start:start + self.digest_size])
+
+    def group_by_digest(self, rows: list, min_count=2):
+        """Summary:\n
+        Group the given files by digest, sorting them by digest.
+
+        Args:\n
+            rows (iterable(int)): 'The rows of hashed files of the same size.'
+            min_count (int, optional): 'The minimum number of files of the returned groups.'
+
+        Returns:\n
+            (generator(list)): 'The rows of the files of each digest.'
+        """
+        rows = sorted(rows, key=self.digest)
+
+        for _, group in groupby(rows, key=self.digest):
+            group = list(group)
+            if len(group) >= min_count:
+                yield group
+
+
+class RowGroups:
+    """Summary:\n
+    Compact groups of rows of an index: the rows of all the groups in
+    one array, and the bounds of each group in another.
+
+    The groups are read as array slices, they cost a few bytes per file.
+    """
+
+    __slots__ = ['__rows', '__bounds']
+
+    def __init__(self, rows=b'', bounds=None):
+        """Summary:\n
+        Create the groups, empty or from the buffers of their rows and bounds.
+
+        Args:\n
+            rows (buffer, optional): 'The unsigned 64 bits rows of the groups, one after the other.'
+            bounds (buffer, optional): 'The unsigned 64 bits start of each group,
+                                        and the end of the last.'
+        """
+        self.__rows = array('Q', bytes(rows))
+        self.__bounds = array('Q', [0]) if bounds is None else array('Q', bytes(bounds))
+
+    def __len__(self):
+        return len(self.__bounds) - 1
+
+    def __iter__(self):
+        for start, end in zip(self.__bounds, islice(self.__bounds, 1, None)):
+            yield self.__rows[start:end]
+
+    def append(self, rows):
+        """Summary:\n
+        Add a group of rows.
+
+        Args:\n
+            rows (iterable(int)): 'The rows of the group.'
+        """
+        self.__rows.extend(rows)
+        self.__bounds.append(len(self.__rows))
+
+    def extend(self, groups):
+        """Summary:\n
+        Add the given groups of rows.
+
+        Args:\n
+            groups (iterable(iterable(int))): 'The groups.'
+        """
+        for rows in groups:
+            self.append(rows)
+
+    def count(self):
+        """Summary:\n
+        Count the rows of all the groups.
+
+        Returns:\n
+            (int): 'The number of rows.'
+        """
+        return len(self.__rows)
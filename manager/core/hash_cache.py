@@ -0,0 +1,155 @@
+"""
+Persistent cache of the files hashes, stored in a SQLite database.
+
+The entries are keyed by the file (device, inode) and the hash algorithm,
+and are only valid while the file size and modification time don't change.
+"""
+import sqlite3
+from time import time
+
+# Custom imports
+import manager.core.constants as const
+
+
+def _to_int64(value: int):
+    """Fold the given unsigned value into a SQLite integer (signed 64 bits).
+
+    Args:
+        value (int): Unsigned value (ex: inode number).
+
+    Returns:
+        (int): The signed 64 bits value.
+    """
+    value &= (1 << 64) - 1
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+class HashCache:
+    """Summary:\n
+    Persistent cache of the files hashes.
+    """
+
+    cache_file: str
+    max_entries: int
+    max_age: int
+
+    def __init__(self, cache_file: str, max_entries: int, max_age_days: int):
+        """Summary:\n
+        Open (or create) the cache database.
+
+        Args:\n
+            cache_file (str): 'The path of the cache database.'
+            max_entries (int): 'The maximum number of entries to keep (0 = no limit).'
+            max_age_days (int): 'The number of days an unused entry is kept (0 = no limit).'
+        """
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 24 * 3600
+
+        self.__now = int(time())
+        self.__pending = []
+        self.__touched = []
+
+        self.__connection = sqlite3.connect(cache_file)
+
+        # Drop the caches created with an older schema.
+        version = self.__connection.execute('PRAGMA user_version').fetchone()[0]
+        if version != const.C_HASH_CACHE_VERSION:
+            self.__connection.execute('DROP TABLE IF EXISTS files')
+            self.__connection.execute(
+                f'PRAGMA user_version = {const.C_HASH_CACHE_VERSION}')
+
+        self.__connection.execute(
+            'CREATE TABLE IF NOT EXISTS files ('
+            ' device INTEGER NOT NULL,'
+            ' inode INTEGER NOT NULL,'
+            ' algorithm TEXT NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' mtime_ns INTEGER NOT NULL,'
+            ' hash TEXT NOT NULL,'
+            ' last_seen INTEGER NOT NULL,'
+            ' PRIMARY KEY (device, inode, algorithm))')
+        self.__connection.execute(
+            'CREATE INDEX IF NOT EXISTS files_last_seen ON files (last_seen)')
+
+    def get(self, entry, algorithm: str):
+        """Summary:\n
+        Get the cached hash of the given file.
+
+        Args:\n
+            entry (FileEntry): 'The file we want the hash of.'
+            algorithm (str): 'The hash algorithm.'
+
+        Returns:\n
+            (str): 'The cached hash, or None if missing or outdated.'
+        """
+        key = (_to_int64(entry.device), _to_int64(entry.inode), algorithm)
+
+        row = self.__connection.execute(
+            'SELECT size, mtime_ns, hash FROM files'
+            ' WHERE device = ? AND inode = ? AND algorithm = ?', key).fetchone()
+
+        if row is None or row[0] != entry.size or row[1] != entry.mtime_ns:
+            return None
+
+        self.__touched.append((self.__now,) + key)
+        if len(self.__touched) >= const.C_HASH_CACHE_BATCH_SIZE:
+            self.__flush()
+
+        return row[2]
+
+    def set(self, entry, algorithm: str, file_hash: str):
+        """Summary:\n
+        Store the hash of the given file, replacing any outdated entry.
+
+        Args:\n
+            entry (FileEntry): 'The hashed file.'
+            algorithm (str): 'The hash algorithm.'
+            file_hash (str): 'The hash of the file.'
+        """
+        self.__pending.append((
+            _to_int64(entry.device), _to_int64(entry.inode), algorithm,
+            entry.size, entry.mtime_ns, file_hash, self.__now))
+
+        if len(self.__pending) >= const.C_HASH_CACHE_BATCH_SIZE:
+            self.__flush()
+
+    def save(self):
+        """Summary:\n
+        Write the pending changes and evict the old entries.
+        """
+        self.__flush()
+
+        if self.max_age:
+            self.__connection.execute(
+                'DELETE FROM files WHERE last_seen < ?', (self.__now - self.max_age,))
+
+        if self.max_entries:
+            # Keep only the most recently seen entries.
+            self.__connection.execute(
+                'DELETE FROM files WHERE rowid IN ('
+                ' SELECT rowid FROM files ORDER BY last_seen DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,))
+
+        self.__connection.commit()
+
+    def close(self):
+        """Summary:\n
+        Save the cache and close the database.
+        """
+        self.save()
+        self.__connection.close()
+
+    def __flush(self):
+        """Summary:\n
+        Write the pending entries and the last seen dates to the database.
+        """
+        self.__connection.executemany(
+            'INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)', self.__pending)
+        self.__connection.executemany(
+            'UPDATE files SET last_seen = ?'
+            ' WHERE device = ? AND inode = ? AND algorithm = ?', self.__touched)
+        self.__connection.commit()
+
+        self.__pending = []
+        self.__touched = []
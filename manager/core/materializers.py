@@ -0,0 +1,245 @@
+"""
+Materialization of the compared files in the result folders.
+   - Copy: copy the files with their metadata (default).
+   - Hard link: link the files, without using extra space.
+   - Reflink: clone the files (copy-on-write) or copy them in the kernel
+     (`copy_file_range`), falling back to a copy.
+   - Symlink: create symbolic links to the files.
+   - Manifest: list the files in a CSV manifest, without touching them.
+
+The files keep their path relative to the source folder, and are
+materialized by a bounded pool of threads.
+"""
+import csv
+import errno
+import os
+from os import path, makedirs
+from shutil import copy2, copyfileobj, copystat
+
+# Custom imports
+from . import constants as const
+
+# Optional copy-on-write cloning (Linux).
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def copy_file(source: str, target: str):
+    """Summary:\n
+    Copy the given file with its metadata.
+
+    Args:\n
+        source (str): 'The file to be copied.'
+        target (str): 'The path of the copy.'
+    """
+    copy2(source, target)
+
+
+def clone_file(source: str, target: str):
+    """Summary:\n
+    Clone the given file (reflink), or copy it in the kernel with
+    `copy_file_range`, or fall back to a regular copy.
+
+    Args:\n
+        source (str): 'The file to be cloned.'
+        target (str): 'The path of the clone.'
+    """
+    with open(source, 'rb') as source_file, open(target, 'wb') as target_file:
+        if not __clone(source_file.fileno(), target_file.fileno()):
+            source_file.seek(0)
+            target_file.seek(0)
+            target_file.truncate()
+            copyfileobj(source_file, target_file, const.C_LARGE_FILE_BLOCK_SIZE)
+
+    copystat(source, target)
+
+
+def __clone(source_fd: int, target_fd: int):
+    """Clone the source into the target, without reading it in user space.
+
+    Args:
+        source_fd (int): The descriptor of the source file.
+        target_fd (int): The descriptor of the (empty) target file.
+
+    Returns:
+        (bool): True if the file was cloned or copied in the kernel.
+    """
+    if fcntl is not None:
+        try:
+            fcntl.ioctl(target_fd, const.C_FICLONE, source_fd)
+            return True
+        except OSError:
+            pass
+
+    if not hasattr(os, 'copy_file_range'):
+        return False
+
+    size = os.fstat(source_fd).st_size
+    copied = 0
+
+    try:
+        while copied < size:
+            count = os.copy_file_range(source_fd, target_fd, size - copied)
+            if not count:
+                break
+            copied += count
+    except OSError:
+        # Not supported between these file systems.
+        return False
+
+    return copied >= size
+
+
+def reflink_file(source: str, target: str):
+    """Summary:\n
+    Clone the given file (reflink), sharing its blocks until one of them is modified.
+
+    Args:\n
+        source (str): 'The file to be cloned.'
+        target (str): 'The path of the clone.'
+
+    Raises:\n
+        OSError: 'Thrown when the file system can't clone the file.'
+    """
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, 'reflinks are not supported')
+
+    with open(source, 'rb') as source_file, open(target, 'wb') as target_file:
+        try:
+            fcntl.ioctl(target_file.fileno(), const.C_FICLONE, source_file.fileno())
+        except OSError:
+            target_file.close()
+            os.remove(target)
+            raise
+
+
+def link_file(source: str, target: str):
+    """Summary:\n
+    Create a hard link to the given file, or clone it when the
+    result folder is on another file system.
+
+    Args:\n
+        source (str): 'The file to be linked.'
+        target (str): 'The path of the link.'
+    """
+    try:
+        os.link(source, target)
+    except OSError as error:
+        if error.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+            raise
+
+        clone_file(source, target)
+
+
+def symlink_file(source: str, target: str):
+    """Summary:\n
+    Create a symbolic link to the given file.
+
+    Args:\n
+        source (str): 'The file to be linked.'
+        target (str): 'The path of the link.'
+    """
+    os.symlink(path.abspath(source), target)
+
+
+MATERIALIZERS = {
+    'copy': copy_file,
+    'hardlink': link_file,
+    'reflink': clone_file,
+    'symlink': symlink_file,
+    'manifest': None,
+}
+
+
+def get_materializer(mode: str):
+    """Summary:\n
+    Get the function materializing a file with the given mode.
+
+    Args:\n
+        mode (str): 'The mode. (copy, hardlink, reflink, symlink or manifest)'
+
+    Raises:\n
+        Exception: 'Thrown when the mode is unknown.'
+
+    Returns:\n
+        (callable): 'The function (source, target), or None for the manifest.'
+    """
+    mode = mode.strip().lower()
+
+    if mode not in MATERIALIZERS:
+        raise Exception(
+            f'Unknown materialize mode ({mode})! '
+            f'please choose one of ({", ".join(MATERIALIZERS)}).')
+
+    return MATERIALIZERS[mode]
+
+
+def get_target(dest_folder: str, source_folder: str, file_path: str):
+    """Summary:\n
+    Get the path of the given file in the result folder, keeping
+    its path relative to the source folder.
+
+    Args:\n
+        dest_folder (str): 'The result folder.'
+        source_folder (str): 'The source folder.'
+        file_path (str): 'The file of the source folder.'
+
+    Returns:\n
+        (str): 'The path of the file in the result folder.'
+    """
+    relative = path.relpath(file_path, source_folder)
+
+    # Files outside of the source folder keep only their name.
+    if relative.startswith(path.pardir):
+        relative = path.basename(file_path)
+
+    return path.join(dest_folder, relative)
+
+
+def __materialize(func, source: str, target: str):
+    """Create the parent folders of the target, and materialize the file.
+
+    Args:
+        func (callable): The function materializing the file.
+        source (str): The file to be materialized.
+        target (str): The path of the file in the result folder.
+    """
+    makedirs(path.dirname(target), exist_ok=True)
+    func(source, target)
+
+
+def materialize_files(func, targets: list, executor):
+    """Summary:\n
+    Materialize the given files with the given executor.
+
+    Args:\n
+        func (callable): 'The function materializing a file, see `get_materializer`.'
+        targets (list(tuple)): 'The (source, target) of each file.'
+        executor (SerialExecutor): 'The executor running the copies, with a bounded queue.'
+
+    Returns:\n
+        (int): 'The number of materialized files.'
+    """
+    results = executor.map(
+        __materialize,
+        [func] * len(targets),
+        [source for source, _ in targets],
+        [target for _, target in targets])
+
+    return sum(1 for _ in results)
+
+
+def write_manifest(manifest_path: str, items: list):
+    """Summary:\n
+    Write the manifest of the compared files, instead of materializing them.
+
+    Args:\n
+        manifest_path (str): 'The path of the manifest.'
+        items (list(tuple)): 'The (kind, source, target) of each file.'
+    """
+    with open(manifest_path, 'w', encoding='utf-8', newline='') as manifest:
+        writer = csv.writer(manifest)
+        writer.writerow(['kind', 'source', 'target'])
+        writer.writerows(items)
@@ -0,0 +1,366 @@
+"""
+Instrumentation of the scan, enabled with the `METRICS` setting.
+   - Counters and timers of each stage (walk, size, partial_hash, hash...).
+   - Histograms of the sizes of the walked files, and of the hashing latency.
+   - The slowest hashed files, above the `METRICS_SLOW_FILE` threshold.
+
+The metrics are exported to a JSON file and/or a Prometheus textfile
+(node_exporter textfile collector). When disabled, the managers keep
+no `Metrics` object and the hot paths only check for None.
+
+The `profile` context manager runs cProfile or tracemalloc around a scan,
+enabled with the `PROFILE` setting.
+"""
+import heapq
+import json
+import os
+from bisect import bisect_left
+from contextlib import contextmanager
+from os import path
+from time import perf_counter, time
+
+# Custom imports
+from . import constants as const
+from . import custom_printer as log
+
+
+class Histogram:
+    """Summary:\n
+    Count the observed values in fixed buckets.
+    """
+
+    bounds: list
+    counts: list
+    total: float = 0
+    count: int = 0
+
+    def __init__(self, bounds: list):
+        """Summary:\n
+        Create the histogram with the given (sorted) upper bounds, a last
+        bucket counts the values above them.
+
+        Args:\n
+            bounds (list(float)): 'The upper bounds of the buckets.'
+        """
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+
+    def observe(self, value: float):
+        """Summary:\n
+        Count the given value.
+
+        Args:\n
+            value (float): 'The observed value.'
+        """
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def buckets(self):
+        """Summary:\n
+        Get the cumulative counts of the buckets, as Prometheus histograms.
+
+        Returns:\n
+            (list(tuple)): 'The upper bound (`+Inf` last) and the cumulative count of each bucket.'
+        """
+        result = []
+        cumulative = 0
+
+        for bound, count in zip(self.bounds + ['+Inf'], self.counts):
+            cumulative += count
+            result.append((bound, cumulative))
+
+        return result
+
+
+class Metrics:
+    """Summary:\n
+    Collect the counters, the stage timers, the histograms and the slow files of a scan.
+    """
+
+    counters: dict
+    stages: dict
+    sizes: Histogram
+    latencies: Histogram
+
+    def __init__(self, slow_file_ms: int):
+        """Summary:\n
+        Create the metrics.
+
+        Args:\n
+            slow_file_ms (int): 'The hashing time (ms) above which a file is logged
+                                 as slow (0 = off).'
+        """
+        self.slow_file_seconds = slow_file_ms / 1000
+        self.counters = {}
+        self.stages = {}
+        self.sizes = Histogram(const.C_METRICS_SIZE_BUCKETS)
+        self.latencies = Histogram(const.C_METRICS_LATENCY_BUCKETS)
+        self.slow_files = []
+        self.__stage = None
+        self.__started = 0.0
+
+    def count(self, name: str, value=1):
+        """Summary:\n
+        Increment the given counter.
+
+        Args:\n
+            name (str): 'The counter.'
+            value (int, optional): 'The increment.'
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe_size(self, size: int):
+        """Summary:\n
+        Count a walked file of the given size.
+
+        Args:\n
+            size (int): 'The size of the file.'
+        """
+        self.sizes.observe(size)
+
+    def start_stage(self, stage: str, progress):
+        """Summary:\n
+        Start the timer of the given stage, and stop the timer of the previous one.
+
+        Args:\n
+            stage (str): 'The stage.'
+            progress (ScanProgress): 'The counters of the previous stage, before they are reset.'
+        """
+        self.stop_stage(progress)
+
+        self.__stage = stage
+        self.__started = perf_counter()
+
+    def stop_stage(self, progress):
+        """Summary:\n
+        Stop the timer of the current stage, and add its counters. A stage
+        can run several times (once per folder).
+
+        Args:\n
+            progress (ScanProgress): 'The counters of the current stage.'
+        """
+        if self.__stage is None:
+            return
+
+        stage = self.stages.setdefault(
+            self.__stage, {'runs': 0, 'seconds': 0.0, 'files': 0, 'bytes': 0})
+        stage['runs'] += 1
+        stage['seconds'] += perf_counter() - self.__started
+        stage['files'] += progress.files
+        stage['bytes'] += progress.bytes
+
+        self.__stage = None
+
+    def record_hash(self, entry, result: tuple):
+        """Summary:\n
+        Record the latency of the given timed hash, and return the hash.
+
+        Args:\n
+            entry (FileEntry): 'The hashed file.'
+            result (tuple): 'The hash and the hashing time of the file,
+                             see `utils.genrate_timed_hash`.'
+
+        Returns:\n
+            (str): 'The hash of the file.'
+        """
+        file_hash, seconds = result
+
+        self.latencies.observe(seconds)
+        self.count('hashed_files')
+        self.count('hashed_bytes', entry.size)
+
+        if self.slow_file_seconds and seconds >= self.slow_file_seconds:
+            self.__slow_file(entry, seconds)
+
+        return file_hash
+
+    def __slow_file(self, entry, seconds: float):
+        """Keep the given file if it is one of the slowest.
+
+        Args:
+            entry (FileEntry): The hashed file.
+            seconds (float): Its hashing time.
+        """
+        self.count('slow_files')
+        item = (seconds, entry.path, entry.size)
+
+        if len(self.slow_files) < const.C_METRICS_SLOW_FILES:
+            heapq.heappush(self.slow_files, item)
+        else:
+            heapq.heappushpop(self.slow_files, item)
+
+    def to_dict(self):
+        """Summary:\n
+        Get the metrics as a dictionary.
+
+        Returns:\n
+            (dict): 'The counters, stages, histograms and slow files.'
+        """
+        def histogram(item):
+            return {'count': item.count, 'sum': item.total,
+                    'buckets': [[bound, count] for bound, count in item.buckets()]}
+
+        return {
+            'time': time(),
+            'counters': dict(self.counters),
+            'stages': {stage: dict(item) for stage, item in self.stages.items()},
+            'file_size_bytes': histogram(self.sizes),
+            'hash_latency_seconds': histogram(self.latencies),
+            'slow_files': [{'path': file_path, 'size': size, 'seconds': seconds}
+                           for seconds, file_path, size in sorted(self.slow_files, reverse=True)],
+        }
+
+    def to_prometheus(self):
+        """Summary:\n
+        Get the metrics in the Prometheus text format.
+
+        Returns:\n
+            (str): 'The metrics, prefixed with `dfm_`.'
+        """
+        lines = []
+
+        for name, value in sorted(self.counters.items()):
+            lines.append(f'# TYPE dfm_{name}_total counter')
+            lines.append(f'dfm_{name}_total {value}')
+
+        for field, kind in [('seconds', 'gauge'), ('files', 'counter'), ('bytes', 'counter'),
+                            ('runs', 'counter')]:
+            suffix = '' if field == 'seconds' else '_total'
+            lines.append(f'# TYPE dfm_stage_{field}{suffix} {kind}')
+            for stage, item in self.stages.items():
+                lines.append(f'dfm_stage_{field}{suffix}{{stage="{stage}"}} {item[field]}')
+
+        for name, item in [('file_size_bytes', self.sizes),
+                           ('hash_latency_seconds', self.latencies)]:
+            lines.append(f'# TYPE dfm_{name} histogram')
+            for bound, count in item.buckets():
+                lines.append(f'dfm_{name}_bucket{{le="{bound}"}} {count}')
+            lines.append(f'dfm_{name}_sum {item.total}')
+            lines.append(f'dfm_{name}_count {item.count}')
+
+        lines.append('# TYPE dfm_last_run_timestamp_seconds gauge')
+        lines.append(f'dfm_last_run_timestamp_seconds {time()}')
+
+        return '\n'.join(lines) + '\n'
+
+    def export(self, formats: list, output_folder: str, on_report=None):
+        """Summary:\n
+        Write the metrics to the files of the given formats, in the output folder.
+
+        The files are written to a temporary file and renamed, so a collector
+        never reads a partial file.
+
+        Args:\n
+            formats (list(str)): 'The formats. (json and/or prometheus)'
+            output_folder (str): 'The output folder.'
+            on_report (callable, optional): 'Called with the path of each written file,
+                                             printed when not given.'
+        """
+        for name in formats:
+            name = name.strip().lower()
+
+            if name == 'json':
+                file_path = path.join(output_folder, const.C_METRICS_JSON_FILE)
+                content = json.dumps(self.to_dict(), indent=2)
+            else:
+                file_path = path.join(output_folder, const.C_METRICS_PROMETHEUS_FILE)
+                content = self.to_prometheus()
+
+            with open(f'{file_path}.tmp', 'w', encoding='utf-8') as file:
+                file.write(content)
+            os.replace(f'{file_path}.tmp', file_path)
+
+            if on_report is not None:
+                on_report(file_path)
+            else:
+                log.print_debug(f'Metrics written to the file: ({file_path}).')
+
+
+def create_metrics(formats: list, slow_file_ms: int):
+    """Summary:\n
+    Create the metrics, when at least one export format is given.
+
+    Args:\n
+        formats (list(str)): 'The export formats. (json and/or prometheus)'
+        slow_file_ms (int): 'The hashing time (ms) above which a file is logged as slow.'
+
+    Raises:\n
+        Exception: 'Thrown when a format is unknown.'
+
+    Returns:\n
+        (Metrics): 'The metrics, or None when disabled.'
+    """
+    for name in formats:
+        if name.strip().lower() not in ('json', 'prometheus'):
+            raise Exception(
+                f'Unknown metrics format ({name})! please choose (json and/or prometheus).')
+
+    return Metrics(slow_file_ms) if formats else None
+
+
+@contextmanager
+def profile(mode: str, output_folder: str, on_report=None):
+    """Summary:\n
+    Profile the code run in the context with cProfile or tracemalloc,
+    and write the result to the output folder.
+
+    Only the calling process is profiled, not the workers of a process executor.
+
+    Args:\n
+        mode (str): 'The profiler. (cprofile, tracemalloc, or empty = off)'
+        output_folder (str): 'The output folder.'
+        on_report (callable, optional): 'Called with the path of the written file,
+                                         printed when not given.'
+
+    Raises:\n
+        Exception: 'Thrown when the mode is unknown.'
+    """
+    mode = mode.strip().lower()
+
+    if not mode:
+        yield
+        return
+
+    if mode == 'cprofile':
+        import cProfile  # pylint: disable=import-outside-toplevel
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            file_path = path.join(output_folder, const.C_PROFILE_FILE)
+            profiler.dump_stats(file_path)
+            if on_report is not None:
+                on_report(file_path)
+            else:
+                log.print_debug(f'Profile written to the file: ({file_path}).')
+
+    elif mode == 'tracemalloc':
+        import tracemalloc  # pylint: disable=import-outside-toplevel
+
+        tracemalloc.start(const.C_TRACEMALLOC_FRAMES)
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            file_path = path.join(output_folder, const.C_TRACEMALLOC_FILE)
+            with open(file_path, 'w', encoding='utf-8') as file:
+                file.write(f'Peak traced memory: {peak} bytes\n\n')
+                for stat in snapshot.statistics('traceback')[:const.C_TRACEMALLOC_TOP]:
+                    file.write(f'{stat}\n')
+                    file.writelines(f'    {line}\n' for line in stat.traceback.format())
+
+            if on_report is not None:
+                on_report(file_path)
+            else:
+                log.print_debug(f'Memory allocations written to the file: ({file_path}).')
+
+    else:
+        raise Exception(
+            f'Unknown profile mode ({mode})! please choose one of (cprofile, tracemalloc).')
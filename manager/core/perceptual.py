@@ -0,0 +1,250 @@
+"""
+Perceptual hashes of the images, to find the near-duplicates (resized,
+re-encoded...) that the checksums can't match.
+   - aHash: the pixels brighter than the mean of the image.
+   - dHash: the pixels brighter than their right neighbour.
+   - pHash: the low frequencies of the DCT above their median.
+
+The images are decoded at a reduced size (JPEG draft mode), downscaled,
+and hashed with NumPy. The hashes are indexed in a BK-tree, so the images
+within a Hamming distance of each other are clustered without comparing
+every pair.
+
+Requires the optional `pillow` and `numpy` packages.
+"""
+from functools import lru_cache
+
+# Custom imports
+from . import constants as const
+
+# Optional image decoding and vectorized hashing.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+C_PERCEPTUAL_HASHES = ['ahash', 'dhash', 'phash']
+
+
+def is_available():
+    """Summary:\n
+    Check if the images can be hashed.
+
+    Returns:\n
+        (bool): 'True when pillow and numpy are installed.'
+    """
+    return numpy is not None and Image is not None
+
+
+@lru_cache(maxsize=None)
+def __dct_matrix(size: int):
+    """Get the orthonormal DCT-II matrix of the given size.
+
+    Args:
+        size (int): The number of pixels of a side.
+
+    Returns:
+        (ndarray): The DCT matrix, the frequencies by row.
+    """
+    rows = numpy.arange(size).reshape(-1, 1)
+    columns = numpy.arange(size).reshape(1, -1)
+
+    matrix = numpy.cos(numpy.pi * (2 * columns + 1) * rows / (2 * size)) * numpy.sqrt(2 / size)
+    matrix[0] /= numpy.sqrt(2)
+
+    return matrix.astype(numpy.float32)
+
+
+def __load_pixels(file_path: str, width: int, height: int):
+    """Decode the given image in grayscale, downscaled to the given size.
+
+    Args:
+        file_path (str): The image.
+        width (int): The width of the pixels.
+        height (int): The height of the pixels.
+
+    Returns:
+        (ndarray): The pixels, as float32.
+    """
+    with Image.open(file_path) as image:
+        # Let the JPEG decoder skip the details, a few times the target size is enough.
+        image.draft('L', (width * const.C_PERCEPTUAL_DRAFT_FACTOR,
+                          height * const.C_PERCEPTUAL_DRAFT_FACTOR))
+        image = image.convert('L').resize((width, height), Image.BILINEAR)
+
+        return numpy.asarray(image, dtype=numpy.float32)
+
+
+def image_hash(file_path: str, method='dhash', hash_size=const.C_PERCEPTUAL_HASH_SIZE):
+    """Summary:\n
+    Generate the perceptual hash of the given image.
+
+    Args:\n
+        file_path (str): 'The image.'
+        method (str, optional): 'The perceptual hash. (ahash, dhash or phash)'
+        hash_size (int, optional): 'The side of the hash, the hash has
+                                    (hash_size * hash_size) bits.'
+
+    Returns:\n
+        (str): 'The hash in hexadecimal, empty when the file is not a readable image.'
+    """
+    try:
+        if method == 'ahash':
+            pixels = __load_pixels(file_path, hash_size, hash_size)
+            bits = pixels > pixels.mean()
+
+        elif method == 'dhash':
+            pixels = __load_pixels(file_path, hash_size + 1, hash_size)
+            bits = pixels[:, 1:] > pixels[:, :-1]
+
+        else:
+            size = hash_size * const.C_PERCEPTUAL_DCT_FACTOR
+            matrix = __dct_matrix(size)
+            pixels = __load_pixels(file_path, size, size)
+
+            low = (matrix @ pixels @ matrix.T)[:hash_size, :hash_size]
+            # The first coefficient is the mean brightness, it would skew the median.
+            bits = low > numpy.median(low.ravel()[1:])
+
+    # A corrupt or truncated image can raise any error of its decoder, it must
+    # not stop the search.
+    except Exception:  # pylint: disable=broad-except
+        return ''
+
+    return numpy.packbits(bits.ravel()).tobytes().hex()
+
+
+# Python 3.10+ counts the bits natively.
+_count_bits = int.bit_count if hasattr(int, 'bit_count') else lambda value: bin(value).count('1')
+
+
+def hamming_distance(first: int, second: int):
+    """Summary:\n
+    Count the bits that differ between the given hashes.
+
+    Args:\n
+        first (int): 'The first hash.'
+        second (int): 'The second hash.'
+
+    Returns:\n
+        (int): 'The Hamming distance.'
+    """
+    return _count_bits(first ^ second)
+
+
+class BKTree:
+    """Summary:\n
+    Burkhard-Keller tree of hashes, answering the Hamming radius queries
+    by visiting only the branches that can hold a close hash.
+    """
+
+    def __init__(self):
+        # A node is [hash, items, children by distance].
+        self.__root = None
+        self.__size = 0
+
+    def __len__(self):
+        return self.__size
+
+    def add(self, value: int, item):
+        """Summary:\n
+        Add the given item with its hash.
+
+        Args:\n
+            value (int): 'The hash.'
+            item (any): 'The item.'
+        """
+        self.__size += 1
+
+        if self.__root is None:
+            self.__root = [value, [item], {}]
+            return
+
+        node = self.__root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+
+            node = child
+
+    def search(self, value: int, radius: int):
+        """Summary:\n
+        Find the items whose hash is within the given distance of the hash.
+
+        Args:\n
+            value (int): 'The hash.'
+            radius (int): 'The maximum Hamming distance.'
+
+        Returns:\n
+            (list(tuple)): 'The (distance, item) of the close items.'
+        """
+        result = []
+        backlog = [self.__root] if self.__root is not None else []
+
+        while backlog:
+            node = backlog.pop()
+            distance = hamming_distance(value, node[0])
+
+            if distance <= radius:
+                result.extend((distance, item) for item in node[1])
+
+            # Triangle inequality: only the children in [distance - radius, distance + radius].
+            for child_distance, child in node[2].items():
+                if distance - radius <= child_distance <= distance + radius:
+                    backlog.append(child)
+
+        return result
+
+
+def cluster_hashes(hashes: dict, radius: int):
+    """Summary:\n
+    Cluster the given items whose hashes are within the given distance,
+    directly or through other items (single linkage).
+
+    Args:\n
+        hashes (dict): 'The hash (int) of each item.'
+        radius (int): 'The maximum Hamming distance between two close items.'
+
+    Returns:\n
+        (list(list)): 'The clusters of at least two items.'
+    """
+    # The items sharing their hash are indexed once.
+    by_hash = {}
+    for item, value in hashes.items():
+        by_hash.setdefault(value, []).append(item)
+
+    tree = BKTree()
+    for value in by_hash:
+        tree.add(value, value)
+
+    parents = {value: value for value in by_hash}
+
+    def find(value):
+        while parents[value] != value:
+            parents[value] = parents[parents[value]]
+            value = parents[value]
+        return value
+
+    for value in by_hash:
+        for _, other in tree.search(value, radius):
+            first, second = find(value), find(other)
+            if first != second:
+                parents[max(first, second)] = min(first, second)
+
+    clusters = {}
+    for value, items in by_hash.items():
+        clusters.setdefault(find(value), []).extend(items)
+
+    return [items for items in clusters.values() if len(items) > 1]
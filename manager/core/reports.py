@@ -0,0 +1,272 @@
+"""
+Streaming writers of the search result.
+   - Text: the summary followed by the groups (default).
+   - JSON Lines: one JSON object per group.
+   - CSV: one row per file.
+   - Binary: compact length prefixed records, see `read_binary_report`.
+
+The groups are written as soon as they are found, so the memory stays
+flat whatever the number of groups.
+"""
+import csv
+import json
+import struct
+from collections import namedtuple
+from os import path, remove
+from shutil import copyfileobj
+
+# A group of files, (kind) is either `duplicates` or `hard_links`, and (roots)
+# the scanned folders it spans, when several folders are scanned together.
+GroupRecord = namedtuple(
+    'GroupRecord', ['kind', 'size', 'hash', 'wasted', 'files', 'roots'], defaults=[()])
+
+C_BINARY_MAGIC = b'DFM1'
+C_BINARY_KINDS = ['duplicates', 'hard_links']
+
+# Binary record header: kind, size, wasted bytes, digest length and files count.
+C_BINARY_HEADER = struct.Struct('<BQQBI')
+C_BINARY_PATH = struct.Struct('<I')
+
+
+class TextWriter:
+    """Summary:\n
+    Write the groups in the text format, under the summary.
+
+    The groups are streamed to a temporary file, and copied under the
+    summary once it is known.
+    """
+
+    extension = 'txt'
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.__separator = f'{"-"*89}\n\n'
+        self.__body_path = f'{file_path}.tmp'
+        self.__body = open(self.__body_path, 'w', encoding='utf-8')
+        self.__kind = 'duplicates'
+
+    def write_group(self, record: GroupRecord):
+        """Summary:\n
+        Write the given group.
+
+        Args:\n
+            record (GroupRecord): 'The group to be written.'
+        """
+        # Hard links don't use extra space, list them apart.
+        if record.kind != self.__kind:
+            self.__kind = record.kind
+            self.__body.write(f'{"="*40} HARD LINKS {"="*37}\n\n')
+
+        for file_path in record.files:
+            self.__body.write(f'{file_path}\n')
+
+        if len(record.roots) > 1:
+            self.__body.write(f'Spans the folders: ({"; ".join(record.roots)}).\n')
+
+        self.__body.write(self.__separator)
+
+    def close(self, summary: list):
+        """Summary:\n
+        Write the summary followed by the groups.
+
+        Args:\n
+            summary (list(str)): 'The lines of the summary.'
+        """
+        self.__body.close()
+
+        repeat = 40
+        with open(self.file_path, 'w', encoding='utf-8') as output_file:
+            output_file.write(f'{"="*repeat} SUMMARY {"="*repeat}\n')
+            for line in summary:
+                output_file.write(f'{line}\n')
+            output_file.write(f'{"="*(repeat*2 + 9)}\n\n')
+
+            with open(self.__body_path, 'r', encoding='utf-8') as body:
+                copyfileobj(body, output_file)
+
+        remove(self.__body_path)
+
+
+class JsonLinesWriter:
+    """Summary:\n
+    Write one JSON object per group, and the summary as the last object.
+    """
+
+    extension = 'jsonl'
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.__output = open(file_path, 'w', encoding='utf-8')
+
+    def write_group(self, record: GroupRecord):
+        """Summary:\n
+        Write the given group.
+
+        Args:\n
+            record (GroupRecord): 'The group to be written.'
+        """
+        data = record._asdict()
+        if not record.roots:
+            del data['roots']
+
+        self.__output.write(json.dumps(data) + '\n')
+
+    def close(self, summary: list):
+        """Summary:\n
+        Write the summary and close the file.
+
+        Args:\n
+            summary (list(str)): 'The lines of the summary.'
+        """
+        self.__output.write(json.dumps(
+            {'kind': 'summary', 'lines': summary}) + '\n')
+        self.__output.close()
+
+
+class CsvWriter:
+    """Summary:\n
+    Write one row per file, with the columns of its group.
+    """
+
+    extension = 'csv'
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.__output = open(file_path, 'w', encoding='utf-8', newline='')
+        self.__writer = csv.writer(self.__output)
+        self.__writer.writerow(
+            ['group', 'kind', 'size', 'hash', 'wasted', 'file', 'roots'])
+        self.__group = 0
+
+    def write_group(self, record: GroupRecord):
+        """Summary:\n
+        Write the files of the given group.
+
+        Args:\n
+            record (GroupRecord): 'The group to be written.'
+        """
+        self.__group += 1
+        for file_path in record.files:
+            self.__writer.writerow([
+                self.__group, record.kind, record.size,
+                record.hash, record.wasted, file_path, ';'.join(record.roots)])
+
+    def close(self, _summary: list):
+        """Summary:\n
+        Close the file.
+        """
+        self.__output.close()
+
+
+class BinaryWriter:
+    """Summary:\n
+    Write compact length prefixed records, with the raw digests.
+    The spanned folders are not written, see the other formats.
+    """
+
+    extension = 'bin'
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.__output = open(file_path, 'wb')
+        self.__output.write(C_BINARY_MAGIC)
+
+    def write_group(self, record: GroupRecord):
+        """Summary:\n
+        Write the given group.
+
+        Args:\n
+            record (GroupRecord): 'The group to be written.'
+        """
+        digest = bytes.fromhex(record.hash) if record.hash else b''
+
+        self.__output.write(C_BINARY_HEADER.pack(
+            C_BINARY_KINDS.index(record.kind), record.size, record.wasted,
+            len(digest), len(record.files)))
+        self.__output.write(digest)
+
+        for file_path in record.files:
+            encoded = file_path.encode('utf-8', 'surrogateescape')
+            self.__output.write(C_BINARY_PATH.pack(len(encoded)))
+            self.__output.write(encoded)
+
+    def close(self, _summary: list):
+        """Summary:\n
+        Close the file.
+        """
+        self.__output.close()
+
+
+WRITERS = {
+    'text': TextWriter,
+    'jsonl': JsonLinesWriter,
+    'csv': CsvWriter,
+    'binary': BinaryWriter,
+}
+
+
+def create_writers(formats: list, output_folder: str, name: str):
+    """Summary:\n
+    Create the writers of the given formats, the text writer is always created.
+
+    Args:\n
+        formats (list(str)): 'The formats. (text, jsonl, csv or binary)'
+        output_folder (str): 'The folder where the results are written.'
+        name (str): 'The name of the results files. (ex: <name>_result.<extension>)'
+
+    Raises:\n
+        Exception: 'Thrown when a format is unknown.'
+
+    Returns:\n
+        (list): 'The writers.'
+    """
+    formats = ['text'] + [item.strip().lower() for item in formats]
+
+    writers = []
+    for item in dict.fromkeys(formats):
+        if item not in WRITERS:
+            raise Exception(
+                f'Unknown report format ({item})! please choose one of ({", ".join(WRITERS)}).')
+
+        writer_class = WRITERS[item]
+        file_path = path.join(
+            output_folder, f'{name}_result.{writer_class.extension}')
+        writers.append(writer_class(file_path))
+
+    return writers
+
+
+def read_binary_report(file_path: str):
+    """Summary:\n
+    Read the groups of the given binary report.
+
+    Args:\n
+        file_path (str): 'The binary report.'
+
+    Raises:\n
+        Exception: 'Thrown when the file is not a binary report.'
+
+    Returns:\n
+        (generator(GroupRecord)): 'The groups of the report.'
+    """
+    with open(file_path, 'rb') as report:
+        if report.read(len(C_BINARY_MAGIC)) != C_BINARY_MAGIC:
+            raise Exception(f'The file ({file_path}) is not a binary report!')
+
+        while True:
+            header = report.read(C_BINARY_HEADER.size)
+            if not header:
+                break
+
+            kind, size, wasted, digest_size, count = C_BINARY_HEADER.unpack(
+                header)
+            digest = report.read(digest_size)
+
+            files = []
+            for _ in range(count):
+                (length,) = C_BINARY_PATH.unpack(
+                    report.read(C_BINARY_PATH.size))
+                files.append(report.read(length).decode(
+                    'utf-8', 'surrogateescape'))
+
+            yield GroupRecord(C_BINARY_KINDS[kind], size, digest.hex() or None, wasted, files)
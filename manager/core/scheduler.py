@@ -0,0 +1,328 @@
+"""
+I/O aware scheduling of the reads of the files.
+   - The files are grouped by device (st_dev), each device reads its files
+     with its own budget of workers, so the devices are read concurrently.
+   - On a spinning disk, the files are read in the order of their first
+     physical extent (FIEMAP, Linux), to limit the seeks. The other devices,
+     and the files without extents, are read in the order of their inode.
+   - The reads are throttled to a maximum of bytes/sec and operations/sec,
+     shared by all the devices.
+
+Each file is read by a single worker, in one sequential pass: the rate
+limits are applied to each block as it is read (`utils.set_read_throttle`).
+"""
+import os
+import struct
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from queue import Queue
+from threading import Event, Lock
+from time import monotonic, sleep
+
+# Custom imports
+from . import constants as const
+from . import utils
+
+# Optional physical extents, Linux only.
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+C_IO_ORDERS = ['extent', 'inode', 'none']
+
+# ioctl FS_IOC_FIEMAP, struct fiemap (header) and struct fiemap_extent.
+C_FS_IOC_FIEMAP = 0xC020660B
+C_FIEMAP_HEADER = struct.Struct('=QQIIII')
+C_FIEMAP_EXTENT = struct.Struct('=QQQQQIIII')
+C_FIEMAP_MAX_OFFSET = 0xFFFFFFFFFFFFFFFF
+
+
+def physical_offset(file_path: str):
+    """Summary:\n
+    Get the physical offset of the first extent of the given file on its device.
+
+    Args:\n
+        file_path (str): 'The file.'
+
+    Returns:\n
+        (int): 'The physical offset in bytes, or None when unknown. (not Linux,
+                file system without FIEMAP, empty or inline file)'
+    """
+    if fcntl is None:
+        return None
+
+    request = bytearray(C_FIEMAP_HEADER.size + C_FIEMAP_EXTENT.size)
+    C_FIEMAP_HEADER.pack_into(request, 0, 0, C_FIEMAP_MAX_OFFSET, 0, 0, 1, 0)
+
+    try:
+        with open(file_path, 'rb', buffering=0) as file_to_map:
+            fcntl.ioctl(file_to_map.fileno(), C_FS_IOC_FIEMAP, request)
+    except OSError:
+        return None
+
+    # fm_mapped_extents, then fe_physical of the first extent.
+    if not C_FIEMAP_HEADER.unpack_from(request)[3]:
+        return None
+
+    return C_FIEMAP_EXTENT.unpack_from(request, C_FIEMAP_HEADER.size)[1]
+
+
+def is_rotational(device: int):
+    """Summary:\n
+    Check if the given device is a spinning disk.
+
+    Args:\n
+        device (int): 'The device of the files. (st_dev)'
+
+    Returns:\n
+        (bool): 'True for a spinning disk, False otherwise or when unknown. (not Linux,
+                 virtual device)'
+    """
+    if fcntl is None or not hasattr(os, 'major'):
+        return False
+
+    # A partition has no queue, its disk is the parent folder.
+    folder = f'/sys/dev/block/{os.major(device)}:{os.minor(device)}'
+    for queue in (os.path.join(folder, 'queue'), os.path.join(folder, '..', 'queue')):
+        try:
+            with open(os.path.join(queue, 'rotational'), 'r', encoding='utf-8') as rotational:
+                return rotational.read().strip() == '1'
+        except OSError:
+            continue
+
+    return False
+
+
+class RateLimiter:
+    """Summary:\n
+    Token bucket shared by the workers, with a burst of one second.
+
+    A worker takes the tokens of a whole block at once: the bucket goes into
+    debt, and the workers wait until it is paid back.
+    """
+
+    rate: float
+
+    def __init__(self, rate: float):
+        """Summary:\n
+        Create the limiter.
+
+        Args:\n
+            rate (float): 'The number of tokens per second.'
+        """
+        self.rate = rate
+        self.__available = rate
+        self.__updated = monotonic()
+        self.__lock = Lock()
+
+    def acquire(self, amount: float):
+        """Summary:\n
+        Take the given number of tokens, and wait until they are available.
+
+        Args:\n
+            amount (float): 'The number of tokens.'
+        """
+        with self.__lock:
+            now = monotonic()
+            self.__available = min(
+                self.rate, self.__available + (now - self.__updated) * self.rate)
+            self.__updated = now
+            self.__available -= amount
+            delay = -self.__available / self.rate
+
+        if delay > 0:
+            sleep(delay)
+
+
+class IOScheduler:
+    """Summary:\n
+    Run the reads of the files grouped by device, in the physical order of
+    the files, with a budget of workers per device and global rate limits.
+    """
+
+    device_workers: int
+    order: str
+
+    # Rate limiters, None when unlimited.
+    bytes_limiter: RateLimiter = None
+    operations_limiter: RateLimiter = None
+
+    def __init__(self, device_workers: int, order: str, max_bytes_per_second=0, max_operations=0):
+        """Summary:\n
+        Create the scheduler.
+
+        Args:\n
+            device_workers (int): 'The number of files read at once on each device.'
+            order (str): 'The order of the reads on a device. (extent, inode or none)'
+            max_bytes_per_second (int, optional): 'The maximum bytes read per second
+                                                   (0 = no limit).'
+            max_operations (int, optional): 'The maximum read operations per second (0 = no limit).'
+
+        Raises:\n
+            Exception: 'Thrown when the order is unknown.'
+        """
+        order = order.strip().lower()
+        if order not in C_IO_ORDERS:
+            raise Exception(
+                f'Unknown I/O order ({order})! please choose one of ({", ".join(C_IO_ORDERS)}).')
+
+        self.device_workers = max(1, device_workers)
+        self.order = order
+
+        if max_bytes_per_second:
+            self.bytes_limiter = RateLimiter(max_bytes_per_second)
+        if max_operations:
+            self.operations_limiter = RateLimiter(max_operations)
+
+    def __sort_device(self, device: int, entries: list, positions: list):
+        """Sort the files of the given device in the reading order.
+
+        The physical offsets are only looked up on the spinning disks, each one
+        costs an open and an ioctl.
+
+        Args:
+            device (int): The device of the files.
+            entries (list(FileEntry)): The files.
+            positions (list(int)): The positions of the files of the device, sorted in place.
+        """
+        if self.order == 'none':
+            return
+
+        extents = self.order == 'extent' and is_rotational(device)
+
+        def sort_key(position: int):
+            entry = entries[position]
+            offset = physical_offset(entry.path) if extents else None
+            if offset is not None:
+                return (0, offset, entry.inode)
+
+            return (1, 0, entry.inode)
+
+        keys = {position: sort_key(position) for position in positions}
+        positions.sort(key=keys.get)
+
+    def __throttle(self, read_bytes: int):
+        """Wait until the given block can be read within the rate limits, called
+        by the readers for each block.
+
+        Args:
+            read_bytes (int): The size of the block.
+        """
+        if self.bytes_limiter is not None:
+            self.bytes_limiter.acquire(read_bytes)
+
+        if self.operations_limiter is not None:
+            self.operations_limiter.acquire(read_bytes / const.C_IO_OPERATION_SIZE)
+
+    def map(self, func, entries: list, *iterables):
+        """Summary:\n
+        Apply the function to the path of each file, followed by the items of
+        the iterables, scheduling the files by device and physical order.
+
+        The first worker of each device sorts its files, so a device is not
+        waiting for the other devices to be sorted.
+
+        Args:\n
+            func (callable): 'The function to apply, reading the file with the readers of `utils`.'
+            entries (list(FileEntry)): 'The files.'
+            iterables (iterable): 'The other arguments of the function.'
+
+        Raises:\n
+            Exception: 'The errors of the function.'
+
+        Returns:\n
+            (generator(tuple)): 'The position of the file in the entries and the result,
+                                 in the order the files are read.'
+        """
+        # The iterables can be endless. (ex: repeat)
+        arguments = list(islice(zip(*iterables), len(entries))) \
+            if iterables else [()] * len(entries)
+        throttled = self.bytes_limiter is not None or self.operations_limiter is not None
+
+        devices = defaultdict(list)
+        for position, entry in enumerate(entries):
+            devices[entry.device].append(position)
+
+        results = Queue()
+        stopped = Event()
+
+        def read_device(device: int, positions: list, backlog: deque, sorted_event: Event,
+                        first: bool):
+            try:
+                if first:
+                    try:
+                        self.__sort_device(device, entries, positions)
+                        backlog.extend(positions)
+                    finally:
+                        sorted_event.set()
+                else:
+                    sorted_event.wait()
+
+                if throttled:
+                    utils.set_read_throttle(self.__throttle)
+
+                while not stopped.is_set():
+                    # popleft is atomic, the workers of a device share its backlog.
+                    try:
+                        position = backlog.popleft()
+                    except IndexError:
+                        break
+
+                    # One operation for the open of each file.
+                    if self.operations_limiter is not None:
+                        self.operations_limiter.acquire(1)
+
+                    entry = entries[position]
+                    results.put((position, func(entry.path, *arguments[position]), None))
+            except Exception as error:  # pylint: disable=broad-except
+                results.put((None, None, error))
+            finally:
+                utils.set_read_throttle(None)
+
+        workers = sum(min(self.device_workers, len(positions)) for positions in devices.values())
+        if not workers:
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            try:
+                for device, positions in devices.items():
+                    backlog = deque()
+                    sorted_event = Event()
+
+                    for worker in range(min(self.device_workers, len(positions))):
+                        pool.submit(
+                            read_device, device, positions, backlog, sorted_event, worker == 0)
+
+                for _ in range(len(entries)):
+                    position, result, error = results.get()
+                    if error is not None:
+                        raise error
+
+                    yield position, result
+            finally:
+                # Stop the workers after their current file, when the caller stops early.
+                stopped.set()
+
+
+def create_scheduler(enabled: bool, device_workers: int, order: str,
+                     max_megabytes_per_second=0, max_operations=0):
+    """Summary:\n
+    Create the I/O scheduler, when enabled.
+
+    Args:\n
+        enabled (bool): 'Indicate if the reads are scheduled.'
+        device_workers (int): 'The number of files read at once on each device.'
+        order (str): 'The order of the reads on a device. (extent, inode or none)'
+        max_megabytes_per_second (int, optional): 'The maximum MB read per second (0 = no limit).'
+        max_operations (int, optional): 'The maximum read operations per second (0 = no limit).'
+
+    Returns:\n
+        (IOScheduler): 'The scheduler, or None when disabled.'
+    """
+    if not enabled:
+        return None
+
+    return IOScheduler(
+        device_workers, order, max_megabytes_per_second * 1024 * 1024, max_operations)
@@ -4,18 +4,65 @@ for this library.
 """
 import sys
 import re
+import atexit
 import ntpath
 import traceback
-from hashlib import md5
+from collections import defaultdict, namedtuple
+from contextlib import ExitStack
+from glob import glob, escape
+from hashlib import md5, sha256, blake2b
 from platform import system
 from os import environ as env
-from os import path, sep, makedirs
+from os import path, sep, makedirs, stat
+import os
 from shutil import copy2, rmtree
 from pathlib import Path
+from threading import Thread, local
+from time import perf_counter, time_ns
 
 # Custom imports
 import manager.core.constants as const
 
+# Optional fast hashers.
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+# Stat information of a loaded file, collected in a single pass.
+FileEntry = namedtuple(
+    'FileEntry', ['path', 'size', 'device', 'inode', 'mtime_ns', 'links'])
+
+# Throttle of the reads of the current thread, set by the I/O scheduler.
+__read_throttle = local()
+
+# Removals of the previous results running in the background, joined at exit.
+__removals = []
+
+
+@atexit.register
+def __join_removals():
+    """Wait for the removals of the previous results, so their folders are not
+    left behind when the process exits.
+    """
+    for thread in __removals:
+        thread.join()
+
+
+def __remove_folders(folders: list):
+    """Remove the given folders and their content, ignoring the errors.
+
+    Args:
+        folders (list(str)): The folders.
+    """
+    for folder in folders:
+        rmtree(folder, True)
+
 
 def __sanitize_paths(paths: str):
     """Sanitize the given string from spaces
@@ -76,11 +123,44 @@ def __get_from_system_args():
             index += 1
             continue
 
+        # Skip the flags. (ex: --resume)
+        if arg.startswith('--'):
+            continue
+
         result.append(arg)
 
     return result
 
 
+def has_system_flag(flag: str):
+    """Summary:\n
+    Check if the given flag was passed when running the command.
+    (ex: 'python <cmd> --resume <args>')
+
+    Args:\n
+        flag (str): 'The flag.'
+
+    Returns:\n
+        (bool): 'True if the flag was passed.'
+    """
+    return flag in sys.argv[1:]
+
+
+def get_system_settings():
+    """Summary:\n
+    Get the settings given by the flags of the command, for the scripts:
+    the library only reads the settings it is given. (ex: '--resume' = {"RESUME": "1"})
+
+    Returns:\n
+        (dict): 'The settings of the flags.'
+    """
+    settings = {}
+    if has_system_flag(const.C_RESUME_FLAG):
+        settings[const.E_RESUME] = '1'
+
+    return settings
+
+
 def __get_from_user_input():
     """Get the list of folder to scan from user input.
 
@@ -156,15 +236,18 @@ def get_folders_to_scan():
     return folders
 
 
-def get_output_folder():
+def get_output_folder(settings=None):
     """Get the output folder were to store the result
 
+    Args:
+        settings (dict, optional): Settings overriding the environment variables.
+
     Returns:
         (str): The output folder path.
     """
     # Check if the env var `OUTPUT_FOLDER` is set.
     # Otherwise set it to the current user home directory.
-    output_folder = env.get(const.E_OUTPUT_FOLDER)
+    output_folder = __get_setting(const.E_OUTPUT_FOLDER, settings)
 
     # Default to user home folder if no input.
     if not output_folder:
@@ -212,10 +295,17 @@ def create_folder(output_folder: str, for_duplicates: bool):
     folder_path = path.join(output_folder,  folder_name)
     folder = unify_separator(folder_path)
 
-    # Clear and remove if any exists
-    # This will allow to always start fresh.
+    # Move the previous result aside, and remove it in the background with the
+    # results left by an interrupted run. This will allow to always start fresh.
     if path.exists(folder):
-        rmtree(folder)
+        trash = f'{folder}.{os.getpid()}.{time_ns()}.old'
+        os.rename(folder, trash)
+
+    trash = glob(f'{escape(folder)}.*.old')
+    if trash:
+        thread = Thread(target=__remove_folders, args=(trash,))
+        thread.start()
+        __removals[:] = [item for item in __removals if item.is_alive()] + [thread]
 
     makedirs(folder, exist_ok=True)
 
@@ -262,16 +352,312 @@ def merge_dictionaries(base_dictionary, dict_to_be_merged):
     Returns:
         (dict): Merged dictionaries.
     """
-    for key in dict_to_be_merged.keys():
+    # Extend the lists in place, instead of copying them for each merge.
+    for key, values in dict_to_be_merged.items():
         if key in base_dictionary:
-            base_dictionary[key] = base_dictionary[key] + \
-                dict_to_be_merged[key]
+            base_dictionary[key].extend(values)
         else:
-            base_dictionary[key] = dict_to_be_merged[key]
+            base_dictionary[key] = list(values)
 
     return base_dictionary
 
 
+def __get_setting(name: str, settings=None):
+    """Get a setting from the given settings, or from the environment variables.
+
+    Args:
+        name (str): Name of the environment variable.
+        settings (dict, optional): Settings overriding the environment variables.
+
+    Returns:
+        The setting value, None when it is not set.
+    """
+    if settings and name in settings:
+        return settings[name]
+
+    return env.get(name)
+
+
+def get_str_from_environment(name: str, default: str, settings=None):
+    """Get a string setting from the environment variables.
+
+    Args:
+        name (str): Name of the environment variable.
+        default (str): Value returned when the variable is not set.
+        settings (dict, optional): Settings overriding the environment variables.
+
+    Returns:
+        (str): The setting value.
+    """
+    value = __get_setting(name, settings)
+    return str(value) if value else default
+
+
+def get_list_from_environment(name: str, settings=None):
+    """Get a list setting, separated by `;`, from the environment variables.
+
+    Args:
+        name (str): Name of the environment variable.
+        settings (dict, optional): Settings overriding the environment variables.
+
+    Returns:
+        (list(str)): The setting values, empty when the variable is not set.
+    """
+    values = __get_setting(name, settings)
+    if not values:
+        return []
+
+    # The settings can be given as a list.
+    if isinstance(values, str):
+        values = values.split(';')
+
+    return [value.strip() for value in values if value.strip()]
+
+
+def get_int_from_environment(name: str, default: int, settings=None):
+    """Get a positive integer setting from the environment variables.
+
+    Args:
+        name (str): Name of the environment variable.
+        default (int): Value returned when the variable is not set.
+        settings (dict, optional): Settings overriding the environment variables.
+
+    Raises:
+        Exception: 'Thrown when the value is not a positive integer.'
+
+    Returns:
+        (int): The setting value.
+    """
+    value = __get_setting(name, settings)
+    if value is None or value == '':
+        return default
+
+    value = str(value)
+    if not value.strip().isdigit():
+        raise Exception(
+            f'The environment variable ({name}) must be a positive integer!')
+
+    return int(value)
+
+
+def get_file_entry(file_path: str):
+    """Summary:\n
+    Stat the given file and return its entry.
+
+    Args:\n
+        file_path (str): 'The file we want to stat.'
+
+    Returns:\n
+        (FileEntry): 'The path, size, device, inode, modification time and links of the file.'
+    """
+    stats = stat(file_path)
+
+    return FileEntry(file_path, stats.st_size, stats.st_dev,
+                     stats.st_ino, stats.st_mtime_ns, stats.st_nlink)
+
+
+def format_size(size: int):
+    """Format the given number of bytes in a human readable string.
+
+    Args:
+        size (int): Number of bytes.
+
+    Returns:
+        (str): Formatted size. (ex: '1.50 GB')
+    """
+    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+        if size < 1024 or unit == 'TB':
+            break
+        size /= 1024
+
+    return f'{size:.2f} {unit}' if unit != 'B' else f'{size} {unit}'
+
+
+def __load_hashers():
+    """Build the registry of the available hash algorithms.
+
+    Returns:
+        (dict): The hasher factory of each algorithm name.
+    """
+    hashers = {
+        'md5': md5,
+        'sha256': sha256,
+        'blake2b': blake2b,
+    }
+
+    if xxhash is not None:
+        hashers['xxh3'] = xxhash.xxh3_128
+
+    if blake3 is not None:
+        hashers['blake3'] = blake3.blake3
+
+    return hashers
+
+
+HASHERS = __load_hashers()
+
+
+def get_hasher(algorithm: str):
+    """Summary:\n
+    Create a new hasher for the given algorithm.
+
+    Args:\n
+        algorithm (str): 'The name of the algorithm. (ex: md5, sha256, blake2b, xxh3, blake3)'
+
+    Raises:\n
+        Exception: 'Thrown when the algorithm is unknown or its package is not installed.'
+
+    Returns:\n
+        (object): 'The hasher, with the `update` and `hexdigest` methods.'
+    """
+    if algorithm not in HASHERS:
+        raise Exception(
+            f'Unknown or not installed hash algorithm ({algorithm})! '
+            f'please choose one of ({", ".join(HASHERS)}).')
+
+    return HASHERS[algorithm]()
+
+
+def set_read_throttle(throttle):
+    """Summary:\n
+    Set the function called with the size of each block read by the current
+    thread, to throttle the reads. (ex: the rate limits of the I/O scheduler)
+
+    Args:\n
+        throttle (callable): 'The function waiting until the block can be read,
+                              None to stop throttling.'
+    """
+    __read_throttle.func = throttle
+
+
+def __throttle(size: int):
+    """Wait until the given block can be read, when the reads of the thread are throttled.
+
+    Args:
+        size (int): The size of the block.
+    """
+    throttle = getattr(__read_throttle, 'func', None)
+    if throttle is not None:
+        throttle(size)
+
+
+def __advise(file_descriptor: int, advice: str):
+    """Give an access pattern advice to the kernel, when supported.
+
+    Args:
+        file_descriptor (int): The file descriptor.
+        advice (str): The name of the advice. (ex: POSIX_FADV_SEQUENTIAL)
+    """
+    if hasattr(os, 'posix_fadvise') and hasattr(os, advice):
+        os.posix_fadvise(file_descriptor, 0, 0, getattr(os, advice))
+
+
+def read_file_blocks(file_path: str, buffer_size=const.C_DEFAULT_BUFFER_SIZE):
+    """Summary:\n
+    Read the given file block by block without allocating a new buffer for each block.
+
+    The files are read with `readinto` in a reused buffer, by blocks of C_LARGE_FILE_BLOCK_SIZE
+    for the large files (>= C_LARGE_FILE_THRESHOLD). The kernel is told that the file is read
+    sequentially, and its pages are dropped from the cache once read. The blocks are
+    throttled one by one when the thread has a read throttle (see `set_read_throttle`).
+
+    Note: the yielded blocks are only valid until the next block is read.
+
+    Args:\n
+        file_path (str): 'The file we want to read.'
+        buffer_size (int): 'The buffer size that we want read the file. default to (65536)'
+
+    Returns:\n
+        (generator(memoryview)): 'The blocks of the file.'
+    """
+    with open(file_path, "rb", buffering=0) as file_to_read:
+        file_descriptor = file_to_read.fileno()
+        file_size = os.fstat(file_descriptor).st_size
+
+        # Files read in a single block don't benefit from the advices.
+        advise = file_size > buffer_size
+        if advise:
+            __advise(file_descriptor, 'POSIX_FADV_SEQUENTIAL')
+
+        if file_size >= const.C_LARGE_FILE_THRESHOLD:
+            buffer_size = max(buffer_size, const.C_LARGE_FILE_BLOCK_SIZE)
+
+        buffer = bytearray(max(1, min(buffer_size, file_size)))
+
+        with memoryview(buffer) as view:
+            size = file_to_read.readinto(buffer)
+
+            while size:
+                __throttle(size)
+
+                with view[:size] as block:
+                    yield block
+
+                size = file_to_read.readinto(buffer)
+
+        if advise:
+            __advise(file_descriptor, 'POSIX_FADV_DONTNEED')
+
+
+def genrate_hash(file_path, algorithm=const.C_DEFAULT_HASH_ALGORITHM,
+                 buffer_size=const.C_DEFAULT_BUFFER_SIZE):
+    """Summary:\n
+    Generate the checksum hash of the given file.
+
+    Args:\n
+        file_path (str): 'The files you want to generate hash from.'
+        algorithm (str): 'The hash algorithm. default to (md5)'
+        buffer_size (int): 'The buffer size that we want read the file. default to (65536)'
+
+    Returns:\n
+        (str): 'Checksum hash of the file.'
+    """
+    hasher = get_hasher(algorithm)
+
+    # Read the file until the end and update the hash at the same time.
+    for block in read_file_blocks(file_path, buffer_size):
+        hasher.update(block)
+
+    # Return the file hash.
+    return hasher.hexdigest()
+
+
+def try_read_file(file_path: str, func, *args):
+    """Summary:\n
+    Apply the given function to a file, the files removed or renamed since
+    they were listed are skipped instead of stopping the scan.
+
+    Args:\n
+        file_path (str): 'The file to read.'
+        func (callable): 'The function reading the file, called with the path and the arguments.'
+        args: 'The other arguments of the function.'
+
+    Returns:\n
+        'The result of the function, or C_UNREADABLE_FILE when the file can't be read.'
+    """
+    try:
+        return func(file_path, *args)
+    except OSError:
+        return const.C_UNREADABLE_FILE
+
+
+def genrate_timed_hash(file_path, algorithm=const.C_DEFAULT_HASH_ALGORITHM):
+    """Summary:\n
+    Generate the checksum hash of the given file, and measure the time it took.
+
+    Args:\n
+        file_path (str): 'The files you want to generate hash from.'
+        algorithm (str): 'The hash algorithm. default to (md5)'
+
+    Returns:\n
+        (tuple(str, float)): 'Checksum hash of the file, and the hashing time in seconds.'
+    """
+    started = perf_counter()
+    file_hash = genrate_hash(file_path, algorithm)
+
+    return file_hash, perf_counter() - started
+
+
 def genrate_md5_hash(file_path, buffer_size=const.C_DEFAULT_BUFFER_SIZE):
     """Summary:\n
     Generate the MD5 checksum hash of the given file.
@@ -283,16 +669,129 @@ def genrate_md5_hash(file_path, buffer_size=const.C_DEFAULT_BUFFER_SIZE):
     Returns:\n
         (str): 'Checksum hash of the file.'
     """
-    hasher = md5()
+    return genrate_hash(file_path, 'md5', buffer_size)
 
-    with open(file_path, "rb") as file_to_read:
-        # Initialize the buffer.
-        buffer = file_to_read.read(buffer_size)
 
-        # Read the file until the end and update the hash at the same time.
-        while buffer:
-            hasher.update(buffer)
-            buffer = file_to_read.read(buffer_size)
+def genrate_partial_hash(file_path: str, file_size: int, block_size: int, samples=0,
+                         algorithm=const.C_DEFAULT_HASH_ALGORITHM):
+    """Summary:\n
+    Generate the checksum hash of the head, the tail and the
+    sampled middle blocks of the given file.
+
+    Args:\n
+        file_path (str): 'The files you want to generate hash from.'
+        file_size (int): 'The size of the file.'
+        block_size (int): 'The size of each hashed block.'
+        samples (int, optional): 'The number of blocks sampled between the head and the tail.'
+        algorithm (str, optional): 'The hash algorithm. default to (md5)'
+
+    Returns:\n
+        (str): 'Checksum hash of the blocks, or None if the blocks cover the whole file.'
+    """
+    # When the blocks cover the file, the full hash costs the same.
+    if file_size <= block_size * (samples + 2):
+        return None
+
+    # Head, evenly spaced samples and tail offsets.
+    step = (file_size - block_size) // (samples + 1)
+    offsets = [step * index for index in range(samples + 1)]
+    offsets.append(file_size - block_size)
+
+    hasher = get_hasher(algorithm)
+
+    with open(file_path, "rb") as file_to_read:
+        for offset in offsets:
+            __throttle(block_size)
+            file_to_read.seek(offset)
+            hasher.update(file_to_read.read(block_size))
 
-    # Return the file hash.
     return hasher.hexdigest()
+
+
+def __read_block(handles: dict, file_path: str, offset: int, size: int):
+    """Read a block of the given file, from its open handle if any.
+
+    Args:
+        handles (dict): The open files, read sequentially.
+        file_path (str): The file to read.
+        offset (int): The offset of the block, used when the file is not open.
+        size (int): The size of the block.
+
+    Returns:
+        (bytes): The block, empty at the end of the file.
+    """
+    if file_path in handles:
+        return handles[file_path].read(size)
+
+    with open(file_path, 'rb') as file_to_read:
+        file_to_read.seek(offset)
+        return file_to_read.read(size)
+
+
+def split_identical_files(files_list: list, buffer_size=const.C_DEFAULT_BUFFER_SIZE):
+    """Summary:\n
+    Compare the given files byte-for-byte, reading all of them in lockstep,
+    and split them as soon as they diverge.
+
+    Each file is read at most once, and stops being read once it has no
+    identical peer left. The files that can't be read (removed since they
+    were listed) are left out of the groups.
+
+    Args:\n
+        files_list (list(str)): 'The files to compare.'
+        buffer_size (int): 'The maximum size of the compared blocks. default to (65536)'
+
+    Returns:\n
+        (list(list)): 'The groups of identical files, with at least two files each.'
+    """
+    # Keep the blocks held in memory bounded for large groups.
+    block_size = max(const.C_MIN_COMPARE_BLOCK_SIZE, min(
+        buffer_size, const.C_COMPARE_MEMORY // max(1, len(files_list))))
+
+    result = []
+
+    with ExitStack() as stack:
+        handles = {}
+        if len(files_list) <= const.C_COMPARE_MAX_OPEN_FILES:
+            for file_path in files_list:
+                try:
+                    handles[file_path] = stack.enter_context(open(file_path, 'rb'))
+                except OSError:
+                    continue
+
+            files_list = list(handles)
+
+        groups = [list(files_list)]
+        offset = 0
+
+        while groups:
+            pending = []
+
+            for group in groups:
+                blocks = defaultdict(list)
+                for file_path in group:
+                    try:
+                        block = __read_block(handles, file_path, offset, block_size)
+                    except OSError:
+                        continue
+
+                    blocks[block].append(file_path)
+
+                for block, members in blocks.items():
+                    # Diverged from every other file.
+                    if len(members) < 2:
+                        if members[0] in handles:
+                            handles.pop(members[0]).close()
+                        continue
+
+                    # Reached the end of the files.
+                    if not block:
+                        result.append(members)
+                        continue
+
+                    pending.append(members)
+
+            groups = pending
+            offset += block_size
+
+    return result
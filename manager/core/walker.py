@@ -0,0 +1,347 @@
+"""
+Streaming directory walker based on `os.scandir`.
+
+The folders can be listed concurrently by a bounded pool of threads,
+which hides the listing latency of the network mounts (NFS/SMB).
+"""
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from fnmatch import fnmatch
+from os import path, scandir, sep, stat
+from stat import S_ISREG
+
+# Custom imports
+from . import constants as const
+from . import custom_printer as log
+from .utils import FileEntry
+
+
+class FolderWalker:
+    """Summary:\n
+    Walk folder trees and yield their files, reusing the information
+    returned by `os.scandir` instead of joining and stating each path.
+    """
+
+    exclude_patterns: list
+    min_size: int
+    max_size: int
+    follow_symlinks: bool
+    workers: int
+
+    # Attributes for summary, the number of scanned folders of each root.
+    scanned_folders: dict
+
+    # Listings of the folders already listed by a resumed scan, by path (their
+    # files are stat'ed again when replayed), and
+    # the handler called with (root, folder, listing) for each listed folder.
+    listings: dict
+    on_listing = None
+
+    # Handler called with (root, message) for the warnings of the walk (ex: folder
+    # that can't be listed), printed when not set.
+    on_warning = None
+
+    def __init__(self, exclude_patterns=None, min_size=0, max_size=0,
+                 follow_symlinks=False, on_folder=None, workers=1):
+        """Summary:\n
+        Create the walker.
+
+        Args:\n
+            exclude_patterns (list(str), optional): 'Glob patterns of the names or paths to skip.'
+            min_size (int, optional): 'The minimum size of the files to yield.'
+            max_size (int, optional): 'The maximum size of the files to yield (0 = no limit).'
+            follow_symlinks (bool, optional): 'Indicate if the symbolic links are followed.'
+            on_folder (callable, optional): 'Called with the root folder being walked and the path
+                                             of each scanned folder.'
+            workers (int, optional): 'The number of folders listed concurrently.'
+        """
+        self.exclude_patterns = exclude_patterns or []
+        self.min_size = min_size
+        self.max_size = max_size
+        self.follow_symlinks = follow_symlinks
+        self.on_folder = on_folder
+        self.workers = max(1, workers)
+        self.scanned_folders = {}
+        self.listings = {}
+        self.__visited = set()
+
+    def __is_excluded(self, item):
+        """Check if the given entry matches one of the exclude patterns.
+
+        Args:
+            item (DirEntry): The entry to check.
+
+        Returns:
+            (bool): True if the entry must be skipped.
+        """
+        return any(fnmatch(item.name, pattern) or fnmatch(item.path, pattern)
+                   for pattern in self.exclude_patterns)
+
+    def __list_folder(self, folder: str):
+        """Summary:\n
+        List the files and the sub-folders of the given folder.
+
+        The symbolic links (unless followed), the special files and the
+        files outside of the size limits are skipped.
+
+        Args:\n
+            folder (str): 'The folder we want to list.'
+
+        Raises:\n
+            OSError: 'Thrown when the folder can't be listed.'
+
+        Returns:\n
+            (tuple): 'The files (FileEntry) and the sub-folders ((path, (device, inode))).'
+        """
+        with scandir(folder) as items:
+            items = list(items)
+
+        files = []
+        sub_folders = []
+
+        for item in items:
+            try:
+                if self.__is_excluded(item):
+                    continue
+
+                if item.is_symlink() and not self.follow_symlinks:
+                    continue
+
+                if item.is_dir(follow_symlinks=self.follow_symlinks):
+                    key = None
+                    if self.follow_symlinks:
+                        stats = item.stat()
+                        key = (stats.st_dev, stats.st_ino)
+
+                    sub_folders.append((item.path, key))
+                    continue
+
+                # Skip the special files (fifo, socket, device...).
+                if not item.is_file(follow_symlinks=self.follow_symlinks):
+                    continue
+
+                stats = item.stat(follow_symlinks=self.follow_symlinks)
+            except OSError:
+                # The file was removed or can't be accessed.
+                continue
+
+            if stats.st_size < self.min_size:
+                continue
+
+            if self.max_size and stats.st_size > self.max_size:
+                continue
+
+            files.append(FileEntry(item.path, stats.st_size, stats.st_dev,
+                                   stats.st_ino or item.inode(), stats.st_mtime_ns,
+                                   stats.st_nlink))
+
+        return files, sub_folders
+
+    def stat_file(self, root: str, file_path: str):
+        """Summary:\n
+        Get the entry of a single file of the given root folder, with the same
+        rules as the walk. (ex: a file reported by a watcher)
+
+        Args:\n
+            root (str): 'The root folder of the file.'
+            file_path (str): 'The file.'
+
+        Returns:\n
+            (FileEntry): 'The entry of the file, or None if it is skipped or missing.'
+        """
+        # The file and its folders under the root must not be excluded.
+        parts = path.relpath(file_path, root).split(sep)
+        for pattern in self.exclude_patterns:
+            if fnmatch(file_path, pattern) or any(fnmatch(part, pattern) for part in parts):
+                return None
+
+        try:
+            if path.islink(file_path) and not self.follow_symlinks:
+                return None
+
+            stats = stat(file_path, follow_symlinks=self.follow_symlinks)
+        except OSError:
+            return None
+
+        # Skip the folders and the special files (fifo, socket, device...).
+        if not S_ISREG(stats.st_mode):
+            return None
+
+        if stats.st_size < self.min_size:
+            return None
+
+        if self.max_size and stats.st_size > self.max_size:
+            return None
+
+        return FileEntry(file_path, stats.st_size, stats.st_dev, stats.st_ino,
+                         stats.st_mtime_ns, stats.st_nlink)
+
+    def walk(self, base_folder: str):
+        """Summary:\n
+        Walk the given folder.
+
+        Args:\n
+            base_folder (str): 'The folder we want to walk.'
+
+        Returns:\n
+            (generator(FileEntry)): 'The files of the folder and its sub-folders.'
+        """
+        for _, entry in self.walk_roots([base_folder]):
+            yield entry
+
+    def walk_roots(self, roots: list):
+        """Summary:\n
+        Walk the given folders, listing up to (workers) folders at once.
+
+        With a single worker, the folders are walked one after another, top-down in the
+        same order as `os.walk`. Otherwise the files are yielded in the order their
+        folders are listed, and the callers must sort them to stay deterministic.
+
+        Args:\n
+            roots (list(str)): 'The folders we want to walk.'
+
+        Returns:\n
+            (generator(tuple)): 'The root folder and the FileEntry of each file.'
+        """
+        self.scanned_folders = {root: 0 for root in roots}
+        self.__visited = set()
+
+        if self.workers == 1:
+            # Depth first, visiting the sub-folders in the listing order.
+            backlog = [(root, root) for root in reversed(roots)]
+
+            while backlog:
+                root, folder = backlog.pop()
+                listing = self.listings.pop(folder, None)
+                if listing is None:
+                    try:
+                        listing = self.__list_folder(folder)
+                    except OSError as error:
+                        self.__warn_unlisted(root, folder, error)
+                        continue
+
+                    self.__record(root, folder, listing)
+                else:
+                    listing = (self.__restat(root, listing[0]), listing[1])
+
+                yield from self.__accept(root, folder, listing[0])
+                backlog.extend(reversed(self.__not_visited(root, listing[1])))
+
+            return
+
+        backlog = deque((root, root) for root in roots)
+        max_in_flight = self.workers * const.C_HASH_QUEUE_FACTOR
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = {}
+
+            while backlog or pending:
+                while backlog and len(pending) < max_in_flight:
+                    root, folder = backlog.popleft()
+
+                    # The folders listed by a resumed scan are not listed again.
+                    listing = self.listings.pop(folder, None)
+                    if listing is not None:
+                        yield from self.__accept(root, folder, self.__restat(root, listing[0]))
+                        backlog.extend(self.__not_visited(root, listing[1]))
+                        continue
+
+                    pending[pool.submit(self.__list_folder, folder)] = (root, folder)
+
+                if not pending:
+                    continue
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    root, folder = pending.pop(future)
+                    try:
+                        listing = future.result()
+                    except OSError as error:
+                        self.__warn_unlisted(root, folder, error)
+                        continue
+
+                    self.__record(root, folder, listing)
+                    yield from self.__accept(root, folder, listing[0])
+                    backlog.extend(self.__not_visited(root, listing[1]))
+
+    def __warn_unlisted(self, root: str, folder: str, error: OSError):
+        """Send the warning of a folder that can't be listed to the `on_warning`
+        handler, or print it. Called by the walking thread, never by the pool.
+
+        Args:
+            root (str): The root folder being walked.
+            folder (str): The folder.
+            error (OSError): The error of the listing.
+        """
+        message = f"Can't list the folder ({folder}): {error.strerror}. Skipping..."
+
+        if self.on_warning is not None:
+            self.on_warning(root, message)
+        else:
+            log.print_warning(message)
+
+    def __record(self, root: str, folder: str, listing: tuple):
+        """Send the given listing to the `on_listing` handler, if any.
+
+        Args:
+            root (str): The root folder being walked.
+            folder (str): The listed folder.
+            listing (tuple): The files and the sub-folders of the folder.
+        """
+        if self.on_listing is not None:
+            self.on_listing(root, folder, listing)
+
+    def __restat(self, root: str, files: list):
+        """Stat again the files of a listing replayed from a resumed scan, they
+        may have changed or been removed since it was recorded.
+
+        Args:
+            root (str): The root folder being walked.
+            files (list(FileEntry)): The recorded files of the folder.
+
+        Returns:
+            (list(FileEntry)): The current entries of the files still present.
+        """
+        entries = (self.stat_file(root, entry.path) for entry in files)
+
+        return [entry for entry in entries if entry is not None]
+
+    def __not_visited(self, root: str, sub_folders: list):
+        """Drop the sub-folders already visited, when following the links.
+
+        Args:
+            root (str): The root folder being walked.
+            sub_folders (list(tuple)): The path and (device, inode) of the sub-folders.
+
+        Returns:
+            (list(tuple)): The root folder and the path of the sub-folders to visit.
+        """
+        result = []
+        for folder, key in sub_folders:
+            if key is not None:
+                if key in self.__visited:
+                    continue
+                self.__visited.add(key)
+
+            result.append((root, folder))
+
+        return result
+
+    def __accept(self, root: str, folder: str, files: list):
+        """Count the listed folder and yield its files.
+
+        Args:
+            root (str): The root folder being walked.
+            folder (str): The listed folder.
+            files (list(FileEntry)): The files of the folder.
+
+        Returns:
+            (generator(tuple)): The root folder and the FileEntry of each file.
+        """
+        if self.on_folder is not None:
+            self.on_folder(root, folder)
+        self.scanned_folders[root] += 1
+
+        for entry in files:
+            yield root, entry
@@ -0,0 +1,307 @@
+"""
+Watchers reporting the files changed in the watched folders.
+   - Inotify: the kernel events of the folders (Linux), through a small `ctypes` wrapper.
+   - Polling: walk the folders periodically and compare the sizes and modification times.
+
+Each call to `changes` returns the paths changed or removed since the previous call,
+a changed path can be a new folder, and a removed path a removed folder.
+"""
+import ctypes
+import ctypes.util
+import os
+import struct
+from os import path, scandir
+from select import select
+from time import monotonic, sleep
+
+# Custom imports
+from . import constants as const
+from . import custom_printer as log
+
+# Inotify events, see `inotify(7)`.
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+IN_WATCH_MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+                 | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+# Header of an event: watch descriptor, mask, cookie and length of the name.
+C_INOTIFY_EVENT = struct.Struct('iIII')
+
+
+def _load_libc():
+    """Load the C library, when it exposes inotify.
+
+    Returns:
+        (CDLL): The C library, or None when inotify is not available.
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    except (OSError, AttributeError, TypeError):
+        return None
+
+    return libc
+
+
+_libc = _load_libc()
+
+
+class InotifyWatcher:
+    """Summary:\n
+    Report the changed files from the inotify events of the watched folders.
+    """
+
+    roots: list
+
+    def __init__(self, roots: list, interval: int, on_warning=None):
+        """Summary:\n
+        Watch the given folders and their sub-folders.
+
+        Args:\n
+            roots (list(str)): 'The folders to watch.'
+            interval (int): 'The maximum number of seconds to wait for a change.'
+            on_warning (callable, optional): 'Called with the warnings, printed when not given.'
+
+        Raises:\n
+            OSError: 'Thrown when inotify is not available.'
+        """
+        if _libc is None:
+            raise OSError(0, 'inotify is not available')
+
+        self.roots = roots
+        self.interval = interval
+        self.on_warning = on_warning or log.print_warning
+        self.__fd = _libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.__fd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+
+        self.__folders = {}
+        for root in roots:
+            self.__watch_tree(root)
+
+    def __watch_tree(self, folder: str):
+        """Watch the given folder and its sub-folders, the symbolic links are not followed.
+
+        Args:
+            folder (str): The folder to watch.
+        """
+        backlog = [folder]
+
+        while backlog:
+            folder = backlog.pop()
+            descriptor = _libc.inotify_add_watch(
+                self.__fd, os.fsencode(folder), IN_WATCH_MASK)
+
+            if descriptor < 0:
+                self.on_warning(
+                    f"Can't watch the folder ({folder}): {os.strerror(ctypes.get_errno())}.")
+                continue
+
+            self.__folders[descriptor] = folder
+
+            try:
+                with scandir(folder) as items:
+                    backlog.extend(item.path for item in items
+                                   if item.is_dir(follow_symlinks=False))
+            except OSError:
+                continue
+
+    def changes(self):
+        """Summary:\n
+        Wait for the next events, and return the changed and removed paths.
+
+        The events are gathered for a short time, so the files being written
+        are reported once.
+
+        Returns:\n
+            (tuple(set, set, bool)): 'The changed and removed paths, and True
+                                      when the events overflowed and the folders
+                                      must be walked again.'
+        """
+        changed = set()
+        removed = set()
+        overflow = False
+
+        deadline = None
+        timeout = self.interval
+
+        while True:
+            readable, _, _ = select([self.__fd], [], [], timeout)
+            if not readable:
+                break
+
+            try:
+                data = os.read(self.__fd, const.C_INOTIFY_BUFFER_SIZE)
+            except BlockingIOError:
+                continue
+
+            overflow |= self.__parse(data, changed, removed)
+
+            # Gather the events following the first one.
+            if deadline is None:
+                deadline = monotonic() + const.C_WATCH_SETTLE_TIME
+            timeout = max(0, deadline - monotonic())
+
+        return changed, removed, overflow
+
+    def __parse(self, data: bytes, changed: set, removed: set):
+        """Parse the given events into the changed and removed paths.
+
+        Args:
+            data (bytes): The events read from inotify.
+            changed (set(str)): The changed paths.
+            removed (set(str)): The removed paths.
+
+        Returns:
+            (bool): True when the events overflowed.
+        """
+        overflow = False
+        offset = 0
+
+        while offset < len(data):
+            descriptor, mask, _, length = C_INOTIFY_EVENT.unpack_from(data, offset)
+            offset += C_INOTIFY_EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+
+            folder = self.__folders.get(descriptor)
+            if folder is None:
+                continue
+
+            if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                if mask & IN_IGNORED:
+                    del self.__folders[descriptor]
+                continue
+
+            item = path.join(folder, os.fsdecode(name))
+
+            if mask & (IN_DELETE | IN_MOVED_FROM):
+                removed.add(item)
+                changed.discard(item)
+                continue
+
+            # The new folders are watched, their existing files reported.
+            if mask & IN_ISDIR:
+                if not mask & (IN_CREATE | IN_MOVED_TO):
+                    continue
+                self.__watch_tree(item)
+
+            changed.add(item)
+            removed.discard(item)
+
+        return overflow
+
+    def close(self):
+        """Summary:\n
+        Stop watching the folders.
+        """
+        if self.__fd >= 0:
+            os.close(self.__fd)
+            self.__fd = -1
+
+
+class PollingWatcher:
+    """Summary:\n
+    Report the changed files by walking the folders periodically.
+    """
+
+    roots: list
+
+    def __init__(self, roots: list, interval: int, walker):
+        """Summary:\n
+        Watch the given folders, and take a first snapshot of their files.
+
+        Args:\n
+            roots (list(str)): 'The folders to watch.'
+            interval (int): 'The number of seconds between two walks.'
+            walker (FolderWalker): 'The walker listing the files of the folders.'
+        """
+        self.roots = roots
+        self.interval = interval
+        self.__walker = walker
+        self.__snapshot = self.__walk()
+
+    def __walk(self):
+        """Walk the folders and get the size and modification time of their files.
+
+        Returns:
+            (dict): The (size, mtime_ns) of each file.
+        """
+        return {entry.path: (entry.size, entry.mtime_ns)
+                for _, entry in self.__walker.walk_roots(self.roots)}
+
+    def changes(self):
+        """Summary:\n
+        Wait for the next walk, and return the changed and removed files.
+
+        Returns:\n
+            (tuple(set, set, bool)): 'The changed and removed files, and False (no overflow).'
+        """
+        sleep(self.interval)
+
+        snapshot = self.__walk()
+        changed = {file_path for file_path, stats in snapshot.items()
+                   if self.__snapshot.get(file_path) != stats}
+        removed = set(self.__snapshot).difference(snapshot)
+
+        self.__snapshot = snapshot
+
+        return changed, removed, False
+
+    def close(self):
+        """Summary:\n
+        Stop watching the folders.
+        """
+        self.__snapshot = {}
+
+
+def create_watcher(mode: str, roots: list, interval: int, walker, on_warning=None):
+    """Summary:\n
+    Create the watcher of the given folders.
+
+    Args:\n
+        mode (str): 'The watcher. (auto, inotify or poll)'
+        roots (list(str)): 'The folders to watch.'
+        interval (int): 'The number of seconds between two checks.'
+        walker (FolderWalker): 'The walker listing the files of the folders.'
+        on_warning (callable, optional): 'Called with the warnings, printed when not given.'
+
+    Raises:\n
+        Exception: 'Thrown when the mode is unknown.'
+
+    Returns:\n
+        (InotifyWatcher|PollingWatcher): 'The watcher, inotify falls back to polling
+                                          when not available.'
+    """
+    mode = mode.strip().lower()
+    on_warning = on_warning or log.print_warning
+
+    if mode not in ('auto', 'inotify', 'poll'):
+        raise Exception(
+            f'Unknown watch mode ({mode})! please choose one of (auto, inotify, poll).')
+
+    if mode != 'poll':
+        try:
+            return InotifyWatcher(roots, interval, on_warning)
+        except OSError as error:
+            on_warning(
+                f"Can't use inotify ({error.strerror}), polling the folders instead.")
+
+    return PollingWatcher(roots, interval, walker)
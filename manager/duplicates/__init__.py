@@ -2,6 +2,14 @@
 Duplicate Managers module:
    - Duplicates in folder
    - Compare two folders
+   - Watch folders for duplicates
+   - Asynchronous scan
+   - Similar images
+   - Partial duplicates
 """
 from .duplicates_in_folder import DuplicatesInFolder
 from .compare_folders import CompareFolders
+from .duplicates_watcher import DuplicatesWatcher
+from .scanner import scan
+from .similar_images import SimilarImages
+from .partial_duplicates import PartialDuplicates
@@ -2,24 +2,43 @@
 """
 Abstract Base manager class, contains the shared methods
 between the folders comparision and finding duplicates.
+
+The stages of the scan are shared from their modules. (load, hash, verify and report)
 """
 # pylint: disable=no-self-use
 # pylint: disable=too-few-public-methods
+# pylint: disable=broad-except
 
 # Based on the following solutions :
 #   - `https://www.pythoncentral.io/finding-duplicate-files-with-python/`
 #   - `https://gist.github.com/vinovator/a2ba7306e829bf3a9010`
 
 from abc import ABC
-from collections import defaultdict
-from os import path, walk
+from contextlib import contextmanager
+from os import path
+from threading import Event
 
 # Custom
+from ..core import constants as const
 from ..core import custom_printer as log
 from ..core import utils
-
-
-class BaseManager(ABC):
+from ..core.checkpoint import Checkpoint
+from ..core.deduplicator import Deduplicator
+from ..core.events import ScanCancelled, ScanEvent, ScanProgress
+from ..core.executors import SerialExecutor, create_executor
+from ..core.external_sort import ExternalSorter
+from ..core.file_index import FileIndex, RowGroups
+from ..core.hash_cache import HashCache
+from ..core.metrics import Metrics, create_metrics, profile
+from ..core.scheduler import IOScheduler, create_scheduler
+from ..core.walker import FolderWalker
+from .hash_stage import HashStageMixin
+from .load_stage import LoadStageMixin
+from .report_stage import ReportStageMixin
+from .verify_stage import VerifyStageMixin
+
+
+class BaseManager(LoadStageMixin, HashStageMixin, VerifyStageMixin, ReportStageMixin, ABC):
     """Summary:\n
     Module that offers the base methods required by the managers.
     """
@@ -27,166 +46,504 @@ class BaseManager(ABC):
     output_folder: str
     folders_to_scan: list
 
+    # Hash algorithms, the verify algorithm confirms the duplicates when set.
+    hash_algorithm: str
+    verify_algorithm: str
+
+    # Confirm the duplicates with a byte-for-byte comparison.
+    verify_content: bool
+
+    # Partial hash settings.
+    partial_block_size: int
+    partial_samples: int
+
+    # Persistent hash cache, None when disabled.
+    hash_cache: HashCache = None
+
+    # Checkpoint of the running scan, None when disabled or not running,
+    # and the previous checkpoint is resumed (`RESUME=1`, `--resume` for the scripts).
+    checkpoint: Checkpoint = None
+    checkpoint_enabled: bool
+    resume: bool
+
+    # Executor running the hashing of the files.
+    executor: SerialExecutor
+
+    # Schedules the reads of the hashed files by device, replacing the executor, None when disabled.
+    io_scheduler: IOScheduler = None
+
+    # Formats of the result files, beside the text format.
+    report_formats: list
+
+    # Walker listing the files of the folders.
+    walker: FolderWalker
+
+    # Replaces the duplicates with links once found, None when disabled.
+    deduplicator: Deduplicator = None
+
+    # External sort settings, the memory budget is in bytes.
+    external_sort: bool
+    sort_memory: int
+    sort_temp_folder: str
+
+    # Files and number of folders of the walked root folders, not explored yet, and
+    # the events of their walk, sent once their exploration started.
+    walked_files: dict
+    walked_folders: dict
+    walked_events: dict
+
     # Attributes for summary.
     scanned_folders: int = 0
+    total_files: int = 0
+    reclaimable_bytes: int = 0
 
-    # Attributes for data.
+    # Attributes for data, the hashed groups are the rows of the files hashed together.
     current_folder: str = ''
-    loaded_files: defaultdict(list)
+    file_index: FileIndex
+    hashed_groups: RowGroups
     duplicate_files: list
+    hard_link_files: list
+
+    # Scan all the folders into one index, and the folders scanned together
+    # with their loaded files (empty when a single folder is explored).
+    global_scan: bool
+    current_roots: list = []
+    root_files: dict = {}
+
+    # Sorted (size, digest, path) records of the external sort mode, None in memory.
+    sorted_groups: ExternalSorter = None
+
+    # Settings overriding the environment variables.
+    settings: dict
+
+    # Metrics of the scan and their export formats, None when disabled.
+    metrics: Metrics = None
+    metrics_formats: list
+    profile_mode: str
+
+    # Print the scanned sub-folders.
+    log_folders: bool
+
+    # Receives the events of the scan (ScanEvent), set when the scan must stop.
+    on_event = None
+    cancelled: Event
+    progress: ScanProgress
+    def __init__(self, folders=None, settings=None):
+        """Summary:\n
+        Create the manager, the settings are read from the environment variables.
+
+        Args:\n
+            folders (list(str), optional): 'The folders to scan, read from the environment,
+                                            the arguments or the user input when not given.'
+            settings (dict, optional): 'Settings overriding the environment variables.
+                                        (ex: {"HASH_ALGORITHM": "xxh3"})'
+        """
+        self.settings = dict(settings or {})
+        self.on_event = self._print_event
+        self.cancelled = Event()
+        self.progress = ScanProgress()
 
-    def __init__(self):
         # Get the list of folders to scan.
-        self.folders_to_scan = utils.get_folders_to_scan()
+        self.folders_to_scan = list(folders) if folders else utils.get_folders_to_scan()
 
         # Get the output file.
-        self.output_folder = utils.get_output_folder()
+        self.output_folder = utils.get_output_folder(self.settings)
+
+        # Get the hash algorithms, and make sure they are available.
+        self.hash_algorithm = utils.get_str_from_environment(
+            const.E_HASH_ALGORITHM, const.C_DEFAULT_HASH_ALGORITHM, self.settings)
+        self.verify_algorithm = utils.get_str_from_environment(
+            const.E_VERIFY_ALGORITHM, '', self.settings)
+
+        for algorithm in filter(None, [self.hash_algorithm, self.verify_algorithm]):
+            utils.get_hasher(algorithm)
+
+        self.verify_content = bool(utils.get_int_from_environment(
+            const.E_VERIFY_CONTENT, 0, self.settings))
+
+        # Get the partial hash settings.
+        self.partial_block_size = utils.get_int_from_environment(
+            const.E_PARTIAL_BLOCK_SIZE, const.C_DEFAULT_PARTIAL_BLOCK_SIZE, self.settings)
+        self.partial_samples = utils.get_int_from_environment(
+            const.E_PARTIAL_SAMPLES, const.C_DEFAULT_PARTIAL_SAMPLES, self.settings)
+
+        # Create the hashing executor.
+        self.executor = create_executor(
+            utils.get_str_from_environment(
+                const.E_HASH_EXECUTOR, const.C_DEFAULT_HASH_EXECUTOR, self.settings),
+            utils.get_int_from_environment(
+                const.E_HASH_WORKERS, const.C_DEFAULT_HASH_WORKERS, self.settings))
+
+        # Create the I/O scheduler, when enabled with `IO_SCHEDULER=1`.
+        self.io_scheduler = create_scheduler(
+            bool(utils.get_int_from_environment(const.E_IO_SCHEDULER, 0, self.settings)),
+            utils.get_int_from_environment(
+                const.E_IO_DEVICE_WORKERS, const.C_DEFAULT_IO_DEVICE_WORKERS, self.settings),
+            utils.get_str_from_environment(
+                const.E_IO_ORDER, const.C_DEFAULT_IO_ORDER, self.settings),
+            utils.get_int_from_environment(const.E_IO_MAX_MBPS, 0, self.settings),
+            utils.get_int_from_environment(const.E_IO_MAX_IOPS, 0, self.settings))
+
+        self.report_formats = utils.get_list_from_environment(
+            const.E_REPORT_FORMATS, self.settings)
+
+        # Create the folders walker.
+        self.walker = FolderWalker(
+            utils.get_list_from_environment(const.E_EXCLUDE_PATTERNS, self.settings),
+            utils.get_int_from_environment(const.E_MIN_FILE_SIZE, 0, self.settings),
+            utils.get_int_from_environment(const.E_MAX_FILE_SIZE, 0, self.settings),
+            bool(utils.get_int_from_environment(const.E_FOLLOW_SYMLINKS, 0, self.settings)),
+            self._on_folder,
+            utils.get_int_from_environment(
+                const.E_WALK_WORKERS, const.C_DEFAULT_WALK_WORKERS, self.settings))
+        self.walker.on_warning = self._on_walk_warning
+        self.walked_files = {}
+        self.walked_folders = {}
+        self.walked_events = {}
+
+        self.global_scan = bool(utils.get_int_from_environment(
+            const.E_GLOBAL_SCAN, 1, self.settings))
+
+        # Get the external sort settings.
+        self.external_sort = bool(utils.get_int_from_environment(
+            const.E_EXTERNAL_SORT, 0, self.settings))
+        self.sort_memory = utils.get_int_from_environment(
+            const.E_SORT_MEMORY, const.C_DEFAULT_SORT_MEMORY, self.settings) * 1024 * 1024
+        self.sort_temp_folder = utils.get_str_from_environment(
+            const.E_SORT_TEMP_FOLDER, '', self.settings)
+
+        # Create the deduplicator, when a `DEDUP_MODE` is given.
+        dedup_mode = utils.get_str_from_environment(const.E_DEDUP_MODE, '', self.settings)
+        if dedup_mode:
+            self.deduplicator = Deduplicator(
+                dedup_mode,
+                utils.get_str_from_environment(
+                    const.E_DEDUP_KEEPER, const.C_DEFAULT_DEDUP_KEEPER, self.settings),
+                utils.get_list_from_environment(const.E_DEDUP_PREFERRED_ROOTS, self.settings),
+                bool(utils.get_int_from_environment(const.E_DEDUP_DRY_RUN, 0, self.settings)),
+                path.join(self.output_folder, const.C_DEDUP_JOURNAL_FILE),
+                self.hash_algorithm,
+                self._warn)
+
+        # Create the metrics, when a `METRICS` export format is given.
+        self.metrics_formats = utils.get_list_from_environment(const.E_METRICS, self.settings)
+        self.metrics = create_metrics(
+            self.metrics_formats,
+            utils.get_int_from_environment(
+                const.E_METRICS_SLOW_FILE, const.C_DEFAULT_METRICS_SLOW_FILE, self.settings))
+        self.profile_mode = utils.get_str_from_environment(const.E_PROFILE, '', self.settings)
+        self.log_folders = bool(utils.get_int_from_environment(
+            const.E_LOG_FOLDERS, 1, self.settings))
+
+        # Checkpoint the scan when enabled with `CHECKPOINT=1`, or when it is resumed.
+        self.resume = bool(utils.get_int_from_environment(const.E_RESUME, 0, self.settings))
+        self.checkpoint_enabled = self.resume or bool(utils.get_int_from_environment(
+            const.E_CHECKPOINT, 0, self.settings))
+
+        # Open the hash cache, unless disabled with `HASH_CACHE=0`.
+        if utils.get_int_from_environment(const.E_HASH_CACHE, 1, self.settings):
+            self.hash_cache = HashCache(
+                path.join(self.output_folder, const.C_HASH_CACHE_FILE),
+                utils.get_int_from_environment(
+                    const.E_HASH_CACHE_MAX_ENTRIES, const.C_DEFAULT_HASH_CACHE_MAX_ENTRIES,
+                    self.settings),
+                utils.get_int_from_environment(
+                    const.E_HASH_CACHE_MAX_AGE, const.C_DEFAULT_HASH_CACHE_MAX_AGE, self.settings))
+
+    def close(self):
+        """Summary:\n
+        Stop the workers of the hashing executor, and save and close the hash cache.
+        The manager can't scan again once closed.
+        """
+        self.executor.shutdown()
+
+        if self.hash_cache is not None:
+            self.hash_cache.close()
+            self.hash_cache = None
+
+    def __enter__(self):
+        return self
 
-    def __load_files(self, folder_path: str, files_list: list, with_duplicates: bool):
+    def __exit__(self, *_):
+        self.close()
+
+    def _emit(self, kind: str, **data):
         """Summary:\n
-        Load the files of the given folder in a dictionary.
+        Send an event of the scan to the event handler.
 
         Args:\n
-            folder_path (str): 'The folder from which we are loading the files.'
-            files_list (list): 'The list of files in the specified folder.'
-            with_duplicates (bool): 'Indicate if we want to load duplicate files too.'
+            kind (str): 'The kind of the event, see `manager.core.events`.'
+            data (dict): 'The data of the event.'
 
-        Returns:\n
-            (dict(list)): 'Returns a dictionary of lists.'
+        Raises:\n
+            ScanCancelled: 'Thrown when the scan was cancelled.'
         """
-        # Dictionary to hold the Hash and files paths.
-        result = defaultdict(list)
+        if self.cancelled.is_set():
+            raise ScanCancelled('The scan was cancelled!')
 
-        for item in files_list:
-            full_path = path.join(folder_path, item)
+        if self.on_event is not None:
+            self.on_event(ScanEvent(kind, self.current_folder, data))
 
-            file_hash = utils.genrate_md5_hash(full_path)
+    def _warn(self, message: str):
+        """Summary:\n
+        Send a warning to the event handler, the `on_warning` handler of the
+        checkpoint, the deduplicator and the watchers.
 
-            if (file_hash not in result) and (not with_duplicates):
-                result[file_hash].append(full_path)
-            else:
-                result[file_hash].append(full_path)
+        Args:\n
+            message (str): 'The warning.'
 
-        return result
+        Raises:\n
+            ScanCancelled: 'Thrown when the scan was cancelled.'
+        """
+        self._emit('warning', message=message)
 
-    def _find_duplicates(self):
+    def _report_file(self, file_path: str):
         """Summary:\n
-        Find and return the list of duplicate files from the given dictionary.
+        Send the path of a written metrics or profile file to the event handler,
+        skipped once the scan was cancelled: they are written when it stops.
 
-        Returns:
-            list: 'The list of duplicate files.'
+        Args:\n
+            file_path (str): 'The written file.'
         """
-        self.duplicate_files = list(
-            filter(lambda x: len(x) > 1, self.loaded_files.values()))
+        if not self.cancelled.is_set():
+            self._emit('report', path=file_path)
 
-        if len(self.duplicate_files) < 1:
-            log.print_warning(
-                f'No duplicate files were found in the folder ({self.current_folder})!')
-            return defaultdict(list)
+    def _start_stage(self, stage: str, total_files=0, total_bytes=0):
+        """Summary:\n
+        Start a new stage of the scan, and emit its event.
 
-        return self.duplicate_files
+        Args:\n
+            stage (str): 'The stage.
+                          (walk, size, partial_hash, hash, group, verify, report or copy)'
+            total_files (int, optional): 'The number of files of the stage, 0 when unknown.'
+            total_bytes (int, optional): 'The number of bytes of the stage, 0 when unknown.'
 
-    def _explore_folder(self, base_folder: str, with_duplicates=True):
+        Raises:\n
+            ScanCancelled: 'Thrown when the scan was cancelled.'
+        """
+        # Sent before the counters are reset, the handler can still read the previous stage.
+        self._emit('stage', stage=stage, total_files=total_files, total_bytes=total_bytes)
+
+        if self.metrics is not None:
+            self.metrics.start_stage(stage, self.progress)
+
+        self.progress.start(stage, total_files, total_bytes)
+
+    def _on_folder(self, root: str, folder: str):
         """Summary:\n
-        Walks the given folder and load its files.
+        Count the folder listed by the walker, and emit its event.
 
         Args:\n
-            base_folder (str): 'The folder we want to load.'
-            with_duplicates (bool, optional): 'Indicate if we want to load duplicate files too.'
+            root (str): 'The root folder being walked.'
+            folder (str): 'The listed folder.'
+        """
+        if self.metrics is not None:
+            self.metrics.count('listed_folders')
 
-        Raises:\n
-            Exception: 'Thrown when the base folder is not supplied.'
+        self.__walk_event(root, 'folder', path=folder)
+
+    def _on_walk_warning(self, root: str, message: str):
+        """Summary:\n
+        Emit a warning of the walker.
+
+        Args:\n
+            root (str): 'The root folder being walked.'
+            message (str): 'The warning.'
+        """
+        self.__walk_event(root, 'warning', message=message)
+
+    def __walk_event(self, root: str, kind: str, **data):
+        """Emit an event of the walk, or keep it when its root folder is walked
+        before its exploration started.
+
+        Args:
+            root (str): The root folder being walked.
+            kind (str): The kind of the event.
+            data (dict): The data of the event.
+        """
+        events = self.walked_events.get(root)
+        if events is not None:
+            events.append((kind, data))
+        else:
+            self._emit(kind, **data)
+
+    def _fingerprint(self):
+        """Summary:\n
+        Get the settings that change the files and the hashes of a scan, a checkpoint
+        is only resumed by a scan with the same settings.
 
         Returns:\n
-            dict(list): 'Returns the loaded files.'
+            (dict): 'The manager, the folders, the walker and the hash settings.'
+        """
+        return {
+            'manager': type(self).__name__,
+            'folders': self.folders_to_scan,
+            'global_scan': self.global_scan,
+            'external_sort': self.external_sort,
+            'exclude_patterns': self.walker.exclude_patterns,
+            'min_size': self.walker.min_size,
+            'max_size': self.walker.max_size,
+            'follow_symlinks': self.walker.follow_symlinks,
+            'hash_algorithm': self.hash_algorithm,
+            'verify_algorithm': self.verify_algorithm,
+            'partial_block_size': self.partial_block_size,
+            'partial_samples': self.partial_samples,
+        }
+
+    @contextmanager
+    def _instrumented(self):
+        """Summary:\n
+        Profile the code run in the context when `PROFILE` is set, and export
+        the metrics once it is done, even when it failed.
+
+        The scan is checkpointed while it runs, the checkpoint is removed once
+        the scan is done and kept when it failed or was cancelled.
+        """
+        if self.checkpoint_enabled:
+            self.checkpoint = Checkpoint(
+                path.join(self.output_folder, const.C_CHECKPOINT_FILE), self._fingerprint(),
+                self.resume, self._warn)
+            self.walker.listings = self.checkpoint.listings
+            self.walker.on_listing = self.checkpoint.add_listing
+
+        finished = False
+        try:
+            with profile(self.profile_mode, self.output_folder, self._report_file):
+                yield
+            finished = True
+        finally:
+            if self.checkpoint is not None:
+                self.checkpoint.close(remove=finished)
+                self.checkpoint = None
+                self.walker.listings = {}
+                self.walker.on_listing = None
+
+            if self.metrics is not None:
+                self.metrics.stop_stage(self.progress)
+                self.metrics.export(self.metrics_formats, self.output_folder, self._report_file)
+
+    def _advance(self, files: int, size: int):
+        """Summary:\n
+        Count the processed files, and emit a progress event when due.
+
+        Args:\n
+            files (int): 'The number of processed files.'
+            size (int): 'Their size.'
+
+        Raises:\n
+            ScanCancelled: 'Thrown when the scan was cancelled.'
+        """
+        self.progress.advance(files, size)
+
+        if self.cancelled.is_set():
+            raise ScanCancelled('The scan was cancelled!')
+
+        if self.progress.due():
+            self._emit('progress', **self.progress.snapshot())
+
+    def _print_event(self, event: ScanEvent):
+        """Summary:\n
+        Print the given event to the console, the default event handler.
+
+        Args:\n
+            event (ScanEvent): 'The event of the scan.'
+        """
+        if event.kind == 'started' and event.data['roots']:
+            log.print_title(
+                f'Searching the base folders ({"; ".join(event.data["roots"])})...')
+        elif event.kind == 'started':
+            log.print_title(f'Searching the base folder ({event.folder})...')
+        elif event.kind == 'folder' and self.log_folders:
+            log.print_ok(f'Searching the folder: ({event.data["path"]})...')
+        elif event.kind == 'warning':
+            log.print_warning(event.data['message'])
+        elif event.kind == 'message' and event.data['level'] == 'detail':
+            # The details close a step.
+            log.print_debug(event.data['message'])
+            print()
+        elif event.kind == 'message':
+            printer = log.print_ok if event.data['level'] == 'ok' else log.print_inf
+            printer(event.data['message'])
+        elif event.kind == 'report':
+            log.print_title(
+                f'Saving the result to the file: ({event.data["path"]}).')
+        elif event.kind == 'summary':
+            repeat_count = 40
+            log.print_debug(f'{"="*repeat_count} SUMMARY {"="*repeat_count}')
+            for line in event.data['lines']:
+                log.print_debug(line)
+            log.print_debug(f'{"="*(repeat_count*2 + 9)}')
+            print()
+
+    def _reset(self, base_folder: str, roots=None):
+        """Summary:\n
+        Start the exploration of the given folder, and reset its data and its summary.
+
+        Args:\n
+            base_folder (str): 'The folder we want to explore, or the name of the global result.'
+            roots (list(str), optional): 'The folders explored together, in a global scan.'
+
+        Raises:\n
+            Exception: 'Thrown when the base folder is not supplied.'
         """
         if not base_folder:
             raise Exception(
                 'Base folder required! please specify a valid folder!')
 
-        log.print_title(f'Searching the base folder ({base_folder})...')
+        self.current_folder = base_folder
+        self.current_roots = list(roots or [])
+        self.root_files = dict.fromkeys(self.current_roots, 0)
+        self._emit('started', roots=self.current_roots)
 
-        if not path.exists(base_folder):
-            log.print_warning(
-                f"Folder ({base_folder}) doesn't exists! Skipping...")
+        for folder in self.current_roots or [base_folder]:
+            if not path.exists(folder):
+                self._emit('warning', message=f"Folder ({folder}) doesn't exists! Skipping...")
 
-        self.current_folder = base_folder
         self.scanned_folders = 0
-        self.loaded_files = defaultdict(list)
+        self.total_files = 0
+        self.skipped_files = 0
+        self.skipped_bytes = 0
+        self.prefiltered_files = 0
+        self.prefiltered_bytes = 0
+        self.cached_files = 0
+        self.unreadable_files = 0
+        self.reclaimable_bytes = 0
+        self.hashed_groups = RowGroups()
+        self.duplicate_files = []
+        self.hard_link_files = []
+        self.sorted_groups = None
+
+    def _explorations(self):
+        """Summary:\n
+        Get the explorations of the scan: all the folders at once in a global scan,
+        or each folder.
 
-        # Scan the folder and load the files into a dictionary.
-        for folder_name, _, files_list in walk(self.current_folder):
-            log.print_ok(f'Searching the folder: ({folder_name})...')
-            self.scanned_folders += 1
+        Returns:\n
+            (list(tuple)): 'The explored folder, or the name of the global result,
+                            and the folders explored together. (None for a single folder)'
+        """
+        if self.global_scan and len(self.folders_to_scan) > 1:
+            return [(const.C_GLOBAL_RESULT_NAME, self.folders_to_scan)]
 
-            files_in_folder = self.__load_files(
-                folder_name, files_list, with_duplicates)
+        return [(folder, None) for folder in self.folders_to_scan]
 
-            utils.merge_dictionaries(self.loaded_files, files_in_folder)
+    def _run_in_console(self, process: str, run):
+        """Summary:\n
+        Run the scan, printing its events and its errors to the console.
 
-        return self.loaded_files
+        Args:\n
+            process (str): 'The name of the process. (ex: duplicate search)'
+            run (callable): 'The method running the scan.'
+        """
+        try:
+            print()
+            log.print_inf(f'Starting the {process} process')
 
-    def _write_to_file(self):
-        """Summary:\n
-        Writes the summary and the result of the search in a files and print it to console.
-
-        If the [OUTPUT_FOLDER] environment variable is not set, the method
-        will default to the user home directory. (ex: <selected/path>/<folder-name>_result.txt).
-
-        Example: \n
-        ================ SUMMARY ===============================\n
-        Base folder: (path/to/folder).\n
-        Scanned sub-folders: (n).\n
-        Loaded files: (n).\n
-        Duplicate files: (n).\n
-        ========================================================\n
-
-        path/to/folder/W1.jpg\n
-        path/to/duplicate/file/name.jpg\n
-        '----------------------------------------------------------------------------------------'\n
-        """
-        # Get the name of the parent folder being searched for
-        # duplicates, to set the name of the file with it.
-        folder_name = path\
-            .split(self.current_folder)[1]\
-            .strip('\\').strip('/').strip(' ')
-
-        output_file = path.join(
-            self.output_folder,  f'{folder_name}_result.txt')
-        output_file = utils.unify_separator(output_file)
-
-        log.print_title(
-            f'Saving the result to the file: ({output_file}).')
-
-        current_folder_msg = f'Base folder: ({self.current_folder}).'
-        scanned_folders_msg = f'Scanned sub-folders: ({self.scanned_folders}).'
-        loaded_files_msg = f'Loaded files: ({len(self.loaded_files)}).'
-        duplicates_msg = f'Duplicate files: ({len(self.duplicate_files)}).'
-
-        # Print to file.
-        repeat = 40
-        output_file = open(output_file, "w", encoding='utf-8')
-        output_file.write(f'{"="*repeat} SUMMARY {"="*repeat}\n')
-        output_file.write(f'{current_folder_msg}\n')
-        output_file.write(f'{scanned_folders_msg}\n')
-        output_file.write(f'{loaded_files_msg}\n')
-        output_file.write(f'{duplicates_msg}\n')
-        output_file.write(f'{"="*(repeat*2 + 9)}\n\n')
-
-        for item in self.duplicate_files:
-            for sub_item in item:
-                output_file.write(f'{sub_item}\n')
-
-            output_file.writelines(f'{"-"*(repeat*2 + 9)}\n\n')
-
-        output_file.close()
-
-        # Print to screen.
-        repeat = 40
-        log.print_debug(f'{"="*repeat} SUMMARY {"="*repeat}')
-        log.print_debug(current_folder_msg)
-        log.print_debug(scanned_folders_msg)
-        log.print_debug(loaded_files_msg)
-        log.print_debug(duplicates_msg)
-        log.print_debug(f'{"="*(repeat*2 + 9)}')
-        print()
+            self.on_event = self._print_event
+            run()
+
+            log.print_inf(f'Finished the {process} process for the given folders!')
+
+        except Exception as message:
+            error = utils.format_error_message(message)
+            log.print_error(error)
@@ -6,11 +6,16 @@ from the source folder.
 # pylint: disable=broad-except
 
 from collections import defaultdict
+from os import path
 
 # Custom
+from ..core import constants as const
+from ..core import materializers
 from ..core import utils
 from .base_manager import BaseManager
 from ..core import custom_printer as log
+from ..core.destination_index import DestinationIndex
+from ..core.executors import ThreadExecutor
 
 
 class CompareFolders(BaseManager):
@@ -23,6 +28,29 @@ class CompareFolders(BaseManager):
     destination_files: dict = defaultdict(list)
     non_duplicate_files: list = []
 
+    # Persistent index of the destination folder, disabled when empty.
+    destination_index: str
+    refresh_index: bool
+
+    # How the compared files are materialized, and by how many threads.
+    materialize_mode: str
+    materialize_workers: int
+
+    def __init__(self, folders=None, settings=None):
+        super().__init__(folders, settings)
+
+        self.destination_index = utils.get_str_from_environment(
+            const.E_DESTINATION_INDEX, '', self.settings)
+        self.refresh_index = bool(utils.get_int_from_environment(
+            const.E_DESTINATION_INDEX_REFRESH, 1, self.settings))
+
+        self.materialize_mode = utils.get_str_from_environment(
+            const.E_MATERIALIZE_MODE, const.C_DEFAULT_MATERIALIZE_MODE, self.settings)
+        self.materialize_workers = utils.get_int_from_environment(
+            const.E_MATERIALIZE_WORKERS, const.C_DEFAULT_MATERIALIZE_WORKERS, self.settings)
+
+        materializers.get_materializer(self.materialize_mode)
+
     def __compare_folders_for_duplicates(self):
         self.duplicate_files = []
         self.non_duplicate_files = []
@@ -34,48 +62,184 @@ class CompareFolders(BaseManager):
             else:
                 self.non_duplicate_files.append(value[0])
 
+    def __compare_with_index(self):
+        """Summary:\n
+        Compare the source folder with the persistent index of the destination folder.
+
+        Only the source files sharing their size with a destination file (or with
+        another source file) are hashed, and the destination files are only hashed
+        once, when a source file has their size.
+        """
+        source_folder, destination_folder = self.folders_to_scan[:2]
+
+        index = DestinationIndex(
+            self.destination_index, destination_folder, self.hash_algorithm)
+
+        try:
+            if self.refresh_index or not len(index):
+                self._emit('message', level='info',
+                           message='Updating the index of the destination folder!')
+                index.update(self.walker.walk(destination_folder))
+
+            self._emit('message', level='detail',
+                       message=f'Indexed ({len(index)}) file(s) from ({destination_folder}).')
+
+            self._emit('message', level='info', message='Loading the files from the source folder!')
+            self._walk_folders([source_folder])
+            source_index = self.walked_files.pop(source_folder)
+            self.walked_folders.pop(source_folder)
+
+            groups = source_index.group_by_size(1)
+            matched = index.sizes(source_index.size(group[0]) for group in groups)
+
+            # Hash the destination files of the matched sizes, once for all.
+            entries = index.unhashed(matched)
+            for start in range(0, len(entries), const.C_HASH_BATCH_SIZE):
+                batch = entries[start:start + const.C_HASH_BATCH_SIZE]
+                index.set_hashes(batch, self._hash_files(batch, self.hash_algorithm))
+
+            destination_hashes = index.hashes(matched)
+        finally:
+            index.close()
+
+        self._emit('message', level='info',
+                   message='Compare folders (Source/Destination) for duplicates!')
+
+        self.duplicate_files = []
+        self.non_duplicate_files = []
+        self.source_files = {}
+
+        # The files of a unique size can't have a duplicate, in any folder.
+        hashed = []
+        for group in groups:
+            if len(group) > 1 or source_index.size(group[0]) in matched:
+                hashed.extend(group)
+            else:
+                self.non_duplicate_files.append(source_index.path(group[0]))
+
+        for start in range(0, len(hashed), const.C_HASH_BATCH_SIZE):
+            rows = hashed[start:start + const.C_HASH_BATCH_SIZE]
+            hashes = self._hash_files(
+                [source_index.entry(row) for row in rows], self.hash_algorithm)
+
+            for row, file_hash in zip(rows, hashes):
+                # Removed or renamed since it was walked.
+                if file_hash is None:
+                    continue
+
+                key = (source_index.size(row), file_hash)
+                self.source_files.setdefault(key, []).append(source_index.path(row))
+
+        # Keep one version of the source duplicates.
+        for (size, file_hash), files in self.source_files.items():
+            if file_hash in destination_hashes.get(size, ()):
+                self.duplicate_files.append(min(files))
+            else:
+                self.non_duplicate_files.append(min(files))
+
+        self.duplicate_files.sort()
+        self.non_duplicate_files.sort()
+
+        if self.hash_cache is not None:
+            self.hash_cache.save()
+
     def __move_duplicate_files(self):
         # Should copy the duplicate files into a result folder.
+        source_folder = self.folders_to_scan[0]
+        func = materializers.get_materializer(self.materialize_mode)
+
+        self._start_stage(
+            'copy', len(self.duplicate_files) + len(self.non_duplicate_files))
+
+        if func is None:
+            self._emit('message', level='ok',
+                       message='Writing the manifest of the compared files...')
+            manifest = [
+                (kind, file_path, materializers.get_target(folder, source_folder, file_path))
+                for kind, folder, files in [
+                    ('duplicate', const.C_DUPLICATES_FOLDER, self.duplicate_files),
+                    ('non_duplicate', const.C_NON_DUPLICATES_FOLDER, self.non_duplicate_files)]
+                for file_path in files]
+            materializers.write_manifest(
+                path.join(self.output_folder, const.C_COMPARE_MANIFEST_FILE), manifest)
+            return
+
         duplicate_folder = utils.create_folder(self.output_folder, True)
         non_duplicate_folder = utils.create_folder(self.output_folder, False)
 
-        # Copy duplicates
-        log.print_ok('Extracting the duplicate files...')
-        utils.copy_files(duplicate_folder, self.duplicate_files)
-
-        # Copy non-duplicates
-        log.print_ok('Extracting the non-duplicate files...')
-        utils.copy_files(non_duplicate_folder, self.non_duplicate_files)
+        executor = ThreadExecutor(self.materialize_workers)
 
-    def compare(self):
-        """
-        Compare the given folders for duplicates.
+        try:
+            # Copy duplicates
+            self._emit('message', level='ok', message='Extracting the duplicate files...')
+            copied = materializers.materialize_files(func, [
+                (file_path, materializers.get_target(
+                    duplicate_folder, source_folder, file_path))
+                for file_path in self.duplicate_files], executor)
+            self._advance(copied, 0)
+
+            # Copy non-duplicates
+            self._emit('message', level='ok', message='Extracting the non-duplicate files...')
+            copied = materializers.materialize_files(func, [
+                (file_path, materializers.get_target(
+                    non_duplicate_folder, source_folder, file_path))
+                for file_path in self.non_duplicate_files], executor)
+            self._advance(copied, 0)
+        finally:
+            executor.shutdown()
+
+    def run(self):
+        """Summary:\n
+        Compare the given folders for duplicates, and move or copy the files of the
+        source folder to the duplicate and non-duplicate folders, sending the
+        events of the scan to the event handler (`on_event`).
+
+        Raises:\n
+            ScanCancelled: 'Thrown when the scan was cancelled.'
         """
+        with self._instrumented():
+            # Compare the source folder with the index of the destination folder.
+            if self.destination_index:
+                self.__compare_with_index()
 
-        try:
-            log.print_inf('Loading the files from the source folder!')
-            self.source_files = self._explore_folder(
-                self.folders_to_scan[0], False)
+                self._emit('message', level='info', message='Filtering the result!')
+                self.__move_duplicate_files()
+                return
+
+            # Walk the source and the destination folders at once.
+            self._walk_folders(self.folders_to_scan[:2], True)
 
-            log.print_debug(
-                f'Loaded ({len(self.source_files)}) file(s) from ({self.folders_to_scan[0]}).')
-            print()
+            self._emit('message', level='info', message='Loading the files from the source folder!')
+            self._explore_folder(self.folders_to_scan[0], False)
+            self.source_files = self._load_hashes()
 
-            log.print_inf('Loading the files from the destination folder!')
-            self.destination_files = self._explore_folder(
-                self.folders_to_scan[1], False)
+            self._emit('message', level='detail', message=(
+                f'Loaded ({len(self.source_files)}) file(s) from ({self.folders_to_scan[0]}).'))
 
-            log.print_debug(
-                f'Loaded ({len(self.destination_files)}) file(s) from ({self.folders_to_scan[1]}).')
-            print()
+            self._emit('message', level='info',
+                       message='Loading the files from the destination folder!')
+            self._explore_folder(self.folders_to_scan[1], False)
+            self.destination_files = self._load_hashes()
 
-            log.print_inf(
-                'Compare folders (Source/Destination) for duplicates!')
+            self._emit('message', level='detail', message=(
+                f'Loaded ({len(self.destination_files)}) file(s) '
+                f'from ({self.folders_to_scan[1]}).'))
+
+            self._emit('message', level='info',
+                       message='Compare folders (Source/Destination) for duplicates!')
             self.__compare_folders_for_duplicates()
 
-            log.print_inf('Filtering the result!')
+            self._emit('message', level='info', message='Filtering the result!')
             self.__move_duplicate_files()
 
+    def compare(self):
+        """
+        Compare the given folders for duplicates.
+        """
+
+        try:
+            self.run()
+
         except Exception as message:
             error = utils.format_error_message(message)
             log.print_error(error)
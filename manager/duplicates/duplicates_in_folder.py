@@ -2,12 +2,9 @@
 Get the list of all duplicate files in the given folder.
 """
 # pylint: disable=too-few-public-methods
-# pylint: disable=broad-except
 
 # Custom
 from .base_manager import BaseManager
-from ..core import utils
-from ..core import custom_printer as log
 
 
 class DuplicatesInFolder(BaseManager):
@@ -15,30 +12,46 @@ class DuplicatesInFolder(BaseManager):
     Get the list of all duplicate files in the given folder.
     """
 
-    def find_in_folders(self):
+    def run(self):
         """Summary:\n
-        Find duplicate files in the given folders and write the
-        result to a file in the specified output folder.
+        Find duplicate files in the given folders and write the result to
+        a file in the specified output folder, sending the events of the scan
+        to the event handler (`on_event`).
+
+        Raises:\n
+            ScanCancelled: 'Thrown when the scan was cancelled.'
         """
+        with self._instrumented():
+            # Load all the folders into one index, the groups can span several folders.
+            explorations = self._explorations()
 
-        try:
-            print()
-            log.print_inf('Starting the duplicate search process')
+            # Walk all the folders at once, unless they are sorted on the disk, their
+            # events are sent as each folder is explored.
+            if len(explorations) > 1 and not self.external_sort:
+                self._walk_folders(self.folders_to_scan, True)
 
-            for folder in self.folders_to_scan:
+            for folder, roots in explorations:
 
                 # Start exploring the folder.
-                self._explore_folder(folder, True)
+                if self.external_sort:
+                    self._explore_folder_external(folder, roots)
+                else:
+                    self._explore_folder(folder, True, roots)
 
                 # Clean the loaded files and return the duplicates.
                 self._find_duplicates()
 
+                # Replace the duplicates with links, as they are written.
+                if self.deduplicator is not None:
+                    self.duplicate_files = self.deduplicator.apply(
+                        self.duplicate_files)
+
                 # Write the result of each folder into a dedicated file.
                 self._write_to_file()
 
-            log.print_inf(
-                'Finished the duplicate search process for the given folders!')
-
-        except Exception as message:
-            error = utils.format_error_message(message)
-            log.print_error(error)
+    def find_in_folders(self):
+        """Summary:\n
+        Find duplicate files in the given folders and write the
+        result to a file in the specified output folder.
+        """
+        self._run_in_console('duplicate search', self.run)
@@ -0,0 +1,317 @@
+"""
+Watch the given folders and keep their duplicate groups up to date.
+"""
+# pylint: disable=too-few-public-methods
+# pylint: disable=broad-except
+
+import json
+from collections import defaultdict
+from os import path
+from time import time
+
+# Custom
+from .base_manager import BaseManager
+from ..core import constants as const
+from ..core import utils
+from ..core import custom_printer as log
+from ..core.walker import FolderWalker
+from ..core.watchers import create_watcher
+
+
+class DuplicatesWatcher(BaseManager):
+    """
+    Watch the given folders, and emit the duplicate groups added or removed
+    as the files change.
+    """
+
+    # Watcher settings.
+    watch_mode: str
+    watch_interval: int
+
+    # The loaded files and their hashes by path, the paths by size,
+    # and the emitted duplicate groups by size and hash.
+    entries: dict
+    hashes: dict
+    sizes: defaultdict(set)
+    groups: dict
+
+    def __init__(self, folders=None, settings=None):
+        super().__init__(folders, settings)
+
+        self.watch_mode = utils.get_str_from_environment(
+            const.E_WATCH_MODE, const.C_DEFAULT_WATCH_MODE, self.settings)
+        self.watch_interval = utils.get_int_from_environment(
+            const.E_WATCH_INTERVAL, const.C_DEFAULT_WATCH_INTERVAL, self.settings)
+
+        self.entries = {}
+        self.hashes = {}
+        self.sizes = defaultdict(set)
+        self.groups = {}
+        self.__deltas = None
+        self.__quiet_walker = None
+
+    def __root_of(self, file_path: str):
+        """Get the watched folder containing the given path.
+
+        Args:
+            file_path (str): The path.
+
+        Returns:
+            (str): The watched folder, the deepest one first.
+        """
+        for root in sorted(self.folders_to_scan, key=len, reverse=True):
+            if file_path == root or file_path.startswith(path.join(root, '')):
+                return root
+
+        return self.folders_to_scan[0]
+
+    def __add(self, entry, dirty: set):
+        """Load the given file, replacing its previous version.
+
+        Args:
+            entry (FileEntry): The file.
+            dirty (set(int)): The sizes whose groups must be updated.
+        """
+        previous = self.entries.get(entry.path)
+        if previous is not None:
+            if (previous.size, previous.mtime_ns, previous.inode) == \
+                    (entry.size, entry.mtime_ns, entry.inode):
+                return
+
+            self.__remove(entry.path, dirty)
+
+        self.entries[entry.path] = entry
+        self.sizes[entry.size].add(entry.path)
+        dirty.add(entry.size)
+
+    def __remove(self, file_path: str, dirty: set):
+        """Unload the given file.
+
+        Args:
+            file_path (str): The file.
+            dirty (set(int)): The sizes whose groups must be updated.
+        """
+        entry = self.entries.pop(file_path, None)
+        if entry is None:
+            return
+
+        self.hashes.pop(file_path, None)
+        self.sizes[entry.size].discard(file_path)
+        if not self.sizes[entry.size]:
+            del self.sizes[entry.size]
+
+        dirty.add(entry.size)
+
+    @staticmethod
+    def __is_in_folders(file_path: str, folders: set):
+        """Check if the given file is inside one of the given folders, at any depth.
+
+        Args:
+            file_path (str): The file.
+            folders (set(str)): The folders.
+
+        Returns:
+            (bool): True if one of the parent folders of the file is in the set.
+        """
+        folder = path.dirname(file_path)
+        while folder not in folders:
+            parent = path.dirname(folder)
+            if parent == folder:
+                return False
+            folder = parent
+
+        return True
+
+    def __apply(self, changed: set, removed: set, dirty: set):
+        """Apply the changed and removed paths reported by the watcher.
+
+        Args:
+            changed (set(str)): The changed files or new folders.
+            removed (set(str)): The removed files or folders.
+            dirty (set(int)): The sizes whose groups must be updated.
+        """
+        folders = set()
+        for item in removed:
+            if item in self.entries:
+                self.__remove(item, dirty)
+            else:
+                folders.add(item)
+
+        # The removed folders, their files are unloaded in a single pass.
+        if folders:
+            for file_path in [key for key in self.entries if self.__is_in_folders(key, folders)]:
+                self.__remove(file_path, dirty)
+
+        for item in changed:
+            root = self.__root_of(item)
+
+            if path.isdir(item):
+                for entry in self.__quiet_walker.walk(item):
+                    self.__add(entry, dirty)
+                continue
+
+            entry = self.walker.stat_file(root, item)
+            if entry is None:
+                self.__remove(item, dirty)
+            else:
+                self.__add(entry, dirty)
+
+    def __rescan(self, dirty: set):
+        """Walk all the folders again, when the watcher lost events.
+
+        Args:
+            dirty (set(int)): The sizes whose groups must be updated.
+        """
+        seen = set()
+        for _, entry in self.__quiet_walker.walk_roots(self.folders_to_scan):
+            seen.add(entry.path)
+            self.__add(entry, dirty)
+
+        for file_path in [key for key in self.entries if key not in seen]:
+            self.__remove(file_path, dirty)
+
+    def __refresh(self, dirty: set):
+        """Hash the new files of the given sizes, and emit the changes of their groups.
+
+        The files removed before they are hashed are unloaded, as if their removal
+        was reported, and the next events of the watcher keep being handled.
+
+        Args:
+            dirty (set(int)): The sizes whose groups must be updated.
+        """
+        missing = [self.entries[file_path]
+                   for size in sorted(dirty) if len(self.sizes.get(size, ())) > 1
+                   for file_path in sorted(self.sizes[size])
+                   if file_path not in self.hashes]
+
+        for start in range(0, len(missing), const.C_HASH_BATCH_SIZE):
+            batch = missing[start:start + const.C_HASH_BATCH_SIZE]
+            for entry, file_hash in zip(batch, self._hash_files(batch, self.hash_algorithm)):
+                if file_hash is None:
+                    self.__remove(entry.path, dirty)
+                else:
+                    self.hashes[entry.path] = file_hash
+
+        if self.hash_cache is not None:
+            self.hash_cache.save()
+
+        for size in sorted(dirty):
+            self.__update_groups(size)
+
+    def __update_groups(self, size: int):
+        """Group the files of the given size by hash, and emit the groups added or removed.
+
+        Args:
+            size (int): The size of the files.
+        """
+        linked = {}
+        for file_path in sorted(self.sizes.get(size, ())):
+            if file_path not in self.hashes:
+                continue
+
+            # Hard links share their content, only the first link is loaded.
+            entry = self.entries[file_path]
+            linked.setdefault((entry.device, entry.inode), file_path)
+
+        by_hash = defaultdict(list)
+        for file_path in sorted(linked.values()):
+            by_hash[self.hashes[file_path]].append(file_path)
+
+        groups = {file_hash: tuple(files)
+                  for file_hash, files in by_hash.items() if len(files) > 1}
+        previous = self.groups.pop(size, {})
+
+        for file_hash, files in sorted(previous.items()):
+            if groups.get(file_hash) != files:
+                self.__emit('remove', size, file_hash, files)
+
+        for file_hash, files in sorted(groups.items()):
+            if previous.get(file_hash) != files:
+                self.__emit('add', size, file_hash, files)
+
+        if groups:
+            self.groups[size] = groups
+
+    def __emit(self, event: str, size: int, file_hash: str, files: tuple):
+        """Write the given delta to the deltas file and to the console.
+
+        Args:
+            event (str): The delta. (add or remove)
+            size (int): The size of the files.
+            file_hash (str): The hash of the files.
+            files (tuple(str)): The files of the group.
+        """
+        self.__deltas.write(json.dumps({
+            'event': event, 'time': time(), 'size': size,
+            'hash': file_hash, 'files': list(files)}) + '\n')
+        self.__deltas.flush()
+
+        printer = log.print_ok if event == 'add' else log.print_warning
+        printer(f'[{event}] ({len(files)}) duplicate file(s) of '
+                f'({utils.format_size(size)}): {", ".join(files)}')
+
+    def watch(self, cycles=0):
+        """Summary:\n
+        Load the given folders, then watch them and emit the duplicate groups
+        added or removed to the deltas file, until interrupted.
+
+        Args:\n
+            cycles (int, optional): 'The number of checks before returning (0 = forever).'
+        """
+        watcher = None
+
+        try:
+            print()
+            log.print_inf('Starting the duplicate watch process')
+
+            self.__quiet_walker = FolderWalker(
+                self.walker.exclude_patterns, self.walker.min_size, self.walker.max_size,
+                self.walker.follow_symlinks, None, self.walker.workers)
+            self.__quiet_walker.on_warning = self._on_walk_warning
+
+            deltas_path = path.join(self.output_folder, const.C_WATCH_DELTAS_FILE)
+            self.__deltas = open(deltas_path, 'a', encoding='utf-8')
+            log.print_title(f'Writing the changes to the file: ({deltas_path}).')
+
+            # Load the folders, the existing groups are emitted as added.
+            watcher = create_watcher(
+                self.watch_mode, self.folders_to_scan, self.watch_interval, self.__quiet_walker,
+                self._warn)
+
+            dirty = set()
+            for _, entry in self.walker.walk_roots(self.folders_to_scan):
+                self.__add(entry, dirty)
+
+            self.__refresh(dirty)
+            log.print_inf(
+                f'Watching ({len(self.entries)}) file(s) '
+                f'in ({len(self.folders_to_scan)}) folder(s)...')
+
+            cycle = 0
+            while not cycles or cycle < cycles:
+                cycle += 1
+                changed, removed, overflow = watcher.changes()
+
+                dirty = set()
+                if overflow:
+                    self._warn('Events were lost, walking the folders again...')
+                    self.__rescan(dirty)
+                else:
+                    self.__apply(changed, removed, dirty)
+
+                self.__refresh(dirty)
+
+        except KeyboardInterrupt:
+            log.print_inf('Finished the duplicate watch process!')
+
+        except Exception as message:
+            error = utils.format_error_message(message)
+            log.print_error(error)
+
+        finally:
+            if watcher is not None:
+                watcher.close()
+
+            if self.__deltas is not None:
+                self.__deltas.close()
+                self.__deltas = None
@@ -0,0 +1,256 @@
+"""
+Hashing stage of the managers: split the files of the same size by partial hash,
+and hash the remaining files, from the caches or with the hashing executor.
+"""
+from collections import defaultdict
+from itertools import repeat
+
+# Custom
+from ..core import constants as const
+from ..core import utils
+from ..core.file_index import RowGroups
+
+
+class HashStageMixin:
+    """Summary:\n
+    Hash the loaded files of the managers, see `BaseManager`.
+    """
+
+    # Attributes for summary.
+    prefiltered_files: int = 0
+    prefiltered_bytes: int = 0
+    cached_files: int = 0
+    unreadable_files: int = 0
+
+    def __batches(self, groups: list):
+        """Summary:\n
+        Split the given groups in batches of about C_HASH_BATCH_SIZE files,
+        to keep the hashing stages busy while bounding their memory.
+
+        Args:\n
+            groups (iterable(array)): 'The groups of rows.'
+
+        Returns:\n
+            (generator(list)): 'The batches of groups.'
+        """
+        batch = []
+        count = 0
+
+        for group in groups:
+            batch.append(group)
+            count += len(group)
+
+            if count >= const.C_HASH_BATCH_SIZE:
+                yield batch
+                batch = []
+                count = 0
+
+        if batch:
+            yield batch
+
+    def _load_files(self, groups: list):
+        """Summary:\n
+        Hash the files of the given groups and store their digests in the index.
+
+        Args:\n
+            groups (iterable(array)): 'The groups of rows to be hashed.'
+        """
+        for batch in self.__batches(groups):
+            rows = [row for group in batch for row in group]
+            entries = [self.file_index.entry(row) for row in rows]
+
+            hashes = self._hash_files(entries, self.hash_algorithm)
+
+            # The files that can't be read anymore are dropped from their group.
+            unreadable = set()
+            for row, file_hash in zip(rows, hashes):
+                if file_hash is None:
+                    unreadable.add(row)
+                else:
+                    self.file_index.set_digest(row, bytes.fromhex(file_hash))
+
+            if unreadable:
+                batch = [[row for row in group if row not in unreadable] for group in batch]
+                batch = [group for group in batch if group]
+
+            self.hashed_groups.extend(batch)
+
+    def _map_files(self, func, entries: list, *iterables):
+        """Summary:\n
+        Apply the function to the path of each file, followed by the items of the
+        iterables, with the I/O scheduler when enabled or the hashing executor.
+
+        The files removed or renamed since they were walked give C_UNREADABLE_FILE.
+
+        Args:\n
+            func (callable): 'The function to apply, reading the file.'
+            entries (list(FileEntry)): 'The files.'
+            iterables (iterable): 'The other arguments of the function.'
+
+        Returns:\n
+            (iterator(tuple)): 'The position of the file in the entries and the result.
+                                In order with the executor, in the reading order with
+                                the scheduler.'
+        """
+        if self.io_scheduler is not None:
+            return self.io_scheduler.map(
+                utils.try_read_file, entries, repeat(func), *iterables)
+
+        return enumerate(self.executor.map(
+            utils.try_read_file, [entry.path for entry in entries], repeat(func), *iterables))
+
+    def _hash_files(self, entries: list, algorithm: str):
+        """Summary:\n
+        Get the hashes of the given files from the cache, or generate them
+        with the hashing executor.
+
+        Args:\n
+            entries (list(FileEntry)): 'The files to be hashed.'
+            algorithm (str): 'The hash algorithm.'
+
+        Returns:\n
+            (list(str)): 'Checksum hashes of the files, in the same order. None for the
+                          files that can't be read anymore, counted as unreadable.'
+        """
+        hashes = [None] * len(entries)
+        missing = []
+
+        for index, entry in enumerate(entries):
+            if self.checkpoint is not None:
+                hashes[index] = self.checkpoint.get(entry, algorithm)
+
+            if hashes[index] is None and self.hash_cache is not None:
+                hashes[index] = self.hash_cache.get(entry, algorithm)
+
+            if hashes[index] is None:
+                missing.append(index)
+            else:
+                self.cached_files += 1
+                self._advance(1, entry.size)
+
+        if self.metrics is not None:
+            self.metrics.count('cached_files', len(entries) - len(missing))
+
+        results = self._map_files(
+            utils.genrate_hash if self.metrics is None else utils.genrate_timed_hash,
+            [entries[index] for index in missing], repeat(algorithm))
+
+        for position, file_hash in results:
+            index = missing[position]
+            self._advance(1, entries[index].size)
+
+            if file_hash == const.C_UNREADABLE_FILE:
+                self.unreadable_files += 1
+                continue
+
+            if self.metrics is not None:
+                file_hash = self.metrics.record_hash(entries[index], file_hash)
+
+            hashes[index] = file_hash
+
+            if self.hash_cache is not None:
+                self.hash_cache.set(entries[index], algorithm, file_hash)
+
+            if self.checkpoint is not None:
+                self.checkpoint.set(entries[index], algorithm, file_hash)
+
+        return hashes
+
+    def _filter_by_size(self):
+        """Summary:\n
+        Group the files by size, and drop the files that have a unique size,
+        since they can't have a duplicate.
+
+        Returns:\n
+            (RowGroups): 'The rows of the files sharing their size with another file.'
+        """
+        groups = self.file_index.group_by_size()
+
+        loaded_files, loaded_bytes = self.file_index.totals()
+        self.skipped_files = loaded_files - groups.count()
+        self.skipped_bytes = loaded_bytes - sum(
+            len(group) * self.file_index.size(group[0]) for group in groups)
+
+        return groups
+
+    def _filter_by_partial_hash(self, groups: list):
+        """Summary:\n
+        Split the files of the same size by the hash of their head,
+        tail and sampled blocks, and drop the files that are left alone.
+
+        Args:\n
+            groups (iterable(array)): 'The rows of the files of the same size.'
+
+        Returns:\n
+            (iterable(array)): 'The groups of rows that still need a full hash.'
+        """
+        if not self.partial_block_size:
+            return groups
+
+        result = RowGroups()
+
+        for batch in self.__batches(groups):
+            rows = [row for group in batch for row in group]
+            partial_hashes = self.__partial_hashes(rows)
+
+            # Files too small to benefit from a partial hash stay grouped by size.
+            for group in batch:
+                split = defaultdict(list)
+                for row in group:
+                    partial_hash = next(partial_hashes)
+                    self._advance(1, 0)
+
+                    if partial_hash != const.C_UNREADABLE_FILE:
+                        split[partial_hash].append(row)
+
+                for item in split.values():
+                    if len(item) > 1:
+                        result.append(item)
+                        continue
+
+                    self.prefiltered_files += 1
+                    self.prefiltered_bytes += self.file_index.size(item[0])
+
+        return result
+
+    def __partial_hashes(self, rows: list):
+        """Summary:\n
+        Get the partial hashes of the given files from the checkpoint, or generate
+        them with the hashing executor.
+
+        Args:\n
+            rows (list(int)): 'The rows of the files.'
+
+        Returns:\n
+            (iterator(str)): 'The partial hashes of the files, in the same order.
+                              C_UNREADABLE_FILE for the files that can't be read anymore.'
+        """
+        entries = [self.file_index.entry(row) for row in rows]
+        hashes = [None] * len(entries)
+
+        if self.checkpoint is not None:
+            hashes = [self.checkpoint.get(entry, const.C_CHECKPOINT_PARTIAL) for entry in entries]
+
+        missing = [index for index, partial_hash in enumerate(hashes) if partial_hash is None]
+
+        results = self._map_files(
+            utils.genrate_partial_hash,
+            [entries[index] for index in missing],
+            [entries[index].size for index in missing],
+            repeat(self.partial_block_size),
+            repeat(self.partial_samples),
+            repeat(self.hash_algorithm))
+
+        for position, partial_hash in results:
+            index = missing[position]
+            hashes[index] = partial_hash
+
+            if partial_hash == const.C_UNREADABLE_FILE:
+                self.unreadable_files += 1
+                continue
+
+            # The files covered by their blocks have no partial hash, and are not read.
+            if partial_hash is not None and self.checkpoint is not None:
+                self.checkpoint.set(entries[index], const.C_CHECKPOINT_PARTIAL, partial_hash)
+
+        return iter(hashes)
@@ -0,0 +1,357 @@
+"""
+Loading stage of the managers: walk the folders and load their files into an index,
+or into sorted runs on the disk with the external sort.
+"""
+from itertools import groupby
+from operator import itemgetter
+from os import path
+
+# Custom
+from ..core import constants as const
+from ..core import utils
+from ..core.external_sort import ExternalSorter
+from ..core.file_index import FileIndex, RowGroups
+from ..core.reports import GroupRecord
+
+
+class LoadStageMixin:
+    """Summary:\n
+    Walk the folders and load the files of the managers, see `BaseManager`.
+    """
+
+    # Attributes for summary.
+    skipped_files: int = 0
+    skipped_bytes: int = 0
+
+    def _walk_folders(self, folders: list, ahead=False):
+        """Summary:\n
+        Walk the given root folders at once, and keep their files until they are explored.
+
+        Args:\n
+            folders (list(str)): 'The root folders we want to walk.'
+            ahead (bool, optional): 'Indicate if the folders are walked before their exploration
+                                     starts, their events are then sent once it started.'
+        """
+        folders = [folder for folder in dict.fromkeys(folders)
+                   if folder not in self.walked_files]
+
+        if ahead:
+            self.walked_events.update((folder, []) for folder in folders)
+
+        digest_size = utils.get_hasher(self.hash_algorithm).digest_size
+        walked_files = {folder: FileIndex(digest_size) for folder in folders}
+
+        self._start_stage('walk')
+
+        for root, entry in self.walker.walk_roots(folders):
+            walked_files[root].add(entry)
+            self._advance(1, entry.size)
+
+            if self.metrics is not None:
+                self.metrics.observe_size(entry.size)
+
+        for folder, file_index in walked_files.items():
+            self.walked_files[folder] = file_index
+            self.walked_folders[folder] = self.walker.scanned_folders[folder]
+
+    @staticmethod
+    def _top_roots(roots: list):
+        """Summary:\n
+        Drop the duplicate folders, and the folders inside another folder of the list.
+
+        Args:\n
+            roots (list(str)): 'The folders.'
+
+        Returns:\n
+            (list(str)): 'The folders to walk, in the given order.'
+        """
+        prefixes = {root: path.join(path.abspath(root), '') for root in roots}
+        result = []
+
+        for root in dict.fromkeys(roots):
+            if not any(prefixes[root].startswith(prefixes[other]) and
+                       (prefixes[root] != prefixes[other] or other in result)
+                       for other in roots if other != root):
+                result.append(root)
+
+        return result
+
+    def _roots_of(self, file_path: str):
+        """Summary:\n
+        Get the folders of the global scan containing the given file.
+
+        Args:\n
+            file_path (str): 'The file.'
+
+        Returns:\n
+            (tuple(str)): 'The folders containing the file, nested folders included.'
+        """
+        return tuple(root for root in self.current_roots
+                     if file_path.startswith(path.join(root, '')))
+
+    def __count_root_file(self, file_path: str):
+        """Count a walked file in the folders of the global scan containing it.
+
+        Args:
+            file_path (str): The walked file.
+        """
+        for root in self._roots_of(file_path):
+            self.root_files[root] += 1
+
+    def __walk_roots(self, roots: list):
+        """Summary:\n
+        Walk the given folders into one index, each file is walked once
+        even when the folders overlap.
+
+        Args:\n
+            roots (list(str)): 'The folders of the global scan.'
+        """
+        self.file_index = FileIndex(utils.get_hasher(self.hash_algorithm).digest_size)
+
+        self._start_stage('walk')
+
+        for _, entry in self.walker.walk_roots(self._top_roots(roots)):
+            self.file_index.add(entry)
+            self.__count_root_file(entry.path)
+            self._advance(1, entry.size)
+
+            if self.metrics is not None:
+                self.metrics.observe_size(entry.size)
+
+        self.scanned_folders = sum(self.walker.scanned_folders.values())
+
+    def _explore_folder(self, base_folder: str, size_filter=True, roots=None):
+        """Summary:\n
+        Walks the given folder and load its files.
+
+        The files are first grouped by size, then by the hash of a few blocks,
+        and only the files still sharing those with another file are fully hashed.
+
+        Args:\n
+            base_folder (str): 'The folder we want to load, or the name of the global result.'
+            size_filter (bool, optional): 'Indicate if we skip the hashing of files with
+                                           a unique size or blocks.'
+            roots (list(str), optional): 'The folders loaded into one index, in a global scan.'
+
+        Raises:\n
+            Exception: 'Thrown when the base folder is not supplied.'
+
+        Returns:\n
+            (FileIndex): 'Returns the index of the loaded files.'
+        """
+        self._reset(base_folder, roots)
+
+        if roots:
+            self.__walk_roots(roots)
+        else:
+            # Scan the folder, unless already walked.
+            if self.current_folder not in self.walked_files:
+                self._walk_folders([self.current_folder])
+
+            self.file_index = self.walked_files.pop(self.current_folder)
+            self.scanned_folders = self.walked_folders.pop(self.current_folder)
+
+            for kind, data in self.walked_events.pop(self.current_folder, []):
+                self._emit(kind, **data)
+
+        self.total_files = len(self.file_index)
+
+        self._start_stage('size', self.total_files)
+
+        # Hard links share their content, only the first link is loaded.
+        for rows in self.file_index.linked_rows():
+            rows.sort(key=self.file_index.path)
+
+            for row in rows[1:]:
+                self.file_index.exclude(row)
+
+            self.hard_link_files.append(GroupRecord(
+                'hard_links', self.file_index.size(rows[0]), None, 0,
+                [self.file_index.path(row) for row in rows]))
+
+        self.hard_link_files.sort(key=lambda record: record.files)
+
+        # Group the files by size, and by partial hash.
+        if size_filter:
+            groups = self._filter_by_size()
+            self._advance(self.total_files, 0)
+            self._start_stage('partial_hash', groups.count())
+            groups = self._filter_by_partial_hash(groups)
+        else:
+            groups = self.file_index.group_by_size(1)
+            self._advance(self.total_files, 0)
+
+        # Hash the remaining files and store their digests in the index.
+        self._start_stage(
+            'hash', groups.count(),
+            sum(len(group) * self.file_index.size(group[0]) for group in groups))
+        self._load_files(groups)
+
+        if self.hash_cache is not None:
+            self.hash_cache.save()
+
+        return self.file_index
+
+    def _explore_folder_external(self, base_folder: str, roots=None):
+        """Summary:\n
+        Walks the given folder and load its files, using sorted runs
+        on the disk instead of keeping the files in memory.
+
+        The files are sorted by (size, device, inode, path) to find the hard links
+        and the files of the same size, which are hashed by batches. The (size, hash, path)
+        records are sorted again to find the duplicates, in the same order as in memory.
+
+        Args:\n
+            base_folder (str): 'The folder we want to load, or the name of the global result.'
+            roots (list(str), optional): 'The folders loaded together, in a global scan.'
+
+        Raises:\n
+            Exception: 'Thrown when the base folder is not supplied.'
+        """
+        self._reset(base_folder, roots)
+
+        files = ExternalSorter(
+            self.sort_memory, self.sort_temp_folder,
+            lambda record: len(record[3]) + const.C_SORT_RECORD_OVERHEAD)
+
+        self._start_stage('walk')
+
+        for _, entry in self.walker.walk_roots(self._top_roots(roots) if roots else [base_folder]):
+            files.add((entry.size, entry.device, entry.inode,
+                       entry.path, entry.mtime_ns, entry.links))
+            self._advance(1, entry.size)
+
+            if roots:
+                self.__count_root_file(entry.path)
+
+            if self.metrics is not None:
+                self.metrics.observe_size(entry.size)
+
+        self.scanned_folders = sum(self.walker.scanned_folders.values())
+        self.total_files = len(files)
+
+        # The files of the same size are hashed, the hard links are kept aside.
+        hashes = ExternalSorter(
+            self.sort_memory // 2, self.sort_temp_folder,
+            lambda record: len(record[2]) + const.C_SORT_RECORD_OVERHEAD)
+        links = ExternalSorter(
+            self.sort_memory // 2, self.sort_temp_folder, self.__group_size)
+
+        # The totals are unknown until the files are sorted by size.
+        self._start_stage('hash')
+
+        batch = []
+        batch_files = 0
+
+        for size, records in groupby(files, key=itemgetter(0)):
+            group = []
+            chunked = False
+
+            for entry in self.__unlink_files(size, records, links):
+                group.append(entry)
+
+                # The huge groups are hashed by chunks, without partial hash.
+                if len(group) >= const.C_HASH_BATCH_SIZE:
+                    self.__hash_entries([group], hashes, False)
+                    group = []
+                    chunked = True
+
+            if chunked:
+                if group:
+                    self.__hash_entries([group], hashes, False)
+                continue
+
+            if len(group) < 2:
+                self.skipped_files += len(group)
+                self.skipped_bytes += len(group) * size
+                continue
+
+            batch.append(group)
+            batch_files += len(group)
+
+            if batch_files >= const.C_HASH_BATCH_SIZE:
+                self.__hash_entries(batch, hashes, True)
+                batch = []
+                batch_files = 0
+
+        if batch:
+            self.__hash_entries(batch, hashes, True)
+
+        if self.hash_cache is not None:
+            self.hash_cache.save()
+
+        # The files of the same size and hash are the duplicates, read as they are written.
+        self.sorted_groups = hashes
+        self.file_index = None
+        self.hashed_groups = RowGroups()
+        self.hard_link_files = (
+            GroupRecord('hard_links', size, None, 0, list(group))
+            for group, size in links)
+
+    @staticmethod
+    def __group_size(record: tuple):
+        """Estimate the memory of a sorted group record, the paths are the first item.
+
+        Args:
+            record (tuple): The group record.
+
+        Returns:
+            (int): The estimated size of the record.
+        """
+        return sum(len(file_path) + const.C_SORT_RECORD_OVERHEAD for file_path in record[0])
+
+    def __unlink_files(self, size: int, records, links: ExternalSorter):
+        """Summary:\n
+        Yield the files of the same size, keeping only the first path of the hard links.
+
+        Args:\n
+            size (int): 'The size of the files.'
+            records (iterable(tuple)): 'The (size, device, inode, path, mtime, links)
+                                        records, sorted.'
+            links (ExternalSorter): 'The sorter receiving the groups of hard links.'
+
+        Returns:\n
+            (generator(FileEntry)): 'The files to be hashed.'
+        """
+        for _, items in groupby(records, key=itemgetter(1, 2)):
+            items = [utils.FileEntry(item[3], size, item[1], item[2], item[4], item[5])
+                     for item in items]
+
+            # Hard links share their content, only the first link is loaded.
+            if len(items) > 1 and items[0].links != 1:
+                links.add((tuple(entry.path for entry in items), size))
+                items = items[:1]
+
+            yield from items
+
+    def __hash_entries(self, groups: list, hashes: ExternalSorter, prefilter: bool):
+        """Summary:\n
+        Hash the given groups of files of the same size, and add their
+        (size, digest, path) records to the given sorter.
+
+        Args:\n
+            groups (list(list)): 'The groups of FileEntry of the same size.'
+            hashes (ExternalSorter): 'The sorter receiving the hashed files.'
+            prefilter (bool): 'Indicate if the groups are complete, and can be split
+                               by partial hash.'
+        """
+        self.file_index = FileIndex(utils.get_hasher(self.hash_algorithm).digest_size)
+        self.hashed_groups = RowGroups()
+
+        rows = []
+        for group in groups:
+            start = len(self.file_index)
+            for entry in group:
+                self.file_index.add(entry)
+
+            rows.append(list(range(start, len(self.file_index))))
+
+        if prefilter:
+            rows = self._filter_by_partial_hash(rows)
+
+        self._load_files(rows)
+
+        for group in self.hashed_groups:
+            for row in group:
+                hashes.add((self.file_index.size(row), self.file_index.digest(row),
+                            self.file_index.path(row)))
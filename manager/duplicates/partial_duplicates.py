@@ -0,0 +1,248 @@
+"""
+Find the files sharing a part of their content in the given folders.
+"""
+# pylint: disable=too-few-public-methods
+
+from collections import defaultdict
+from itertools import combinations, repeat
+
+# Custom
+from .base_manager import BaseManager
+from ..core import constants as const
+from ..core import utils
+from ..core import chunker
+
+
+class PartialDuplicates(BaseManager):
+    """
+    Find the pairs of files sharing a part of their content, by splitting
+    the large files in content-defined chunks.
+    """
+
+    # Chunk sizes, minimum size of the chunked files, minimum shared ratio (%) of the pairs
+    # and maximum number of files of a chunk counted in the pairs (0 = no limit).
+    chunk_sizes: tuple
+    chunk_min_file_size: int
+    chunk_min_ratio: int
+    chunk_max_files: int
+
+    # Attributes for summary.
+    chunked_files: int = 0
+    chunked_bytes: int = 0
+    unreadable_files: int = 0
+    unique_bytes: int = 0
+    common_chunks: int = 0
+
+    # Attributes for data: the chunked files, the size and the files of each chunk
+    # digest, and the pairs of files sharing their chunks.
+    files: list
+    chunks: dict
+    pairs: list
+
+    def __init__(self, folders=None, settings=None):
+        super().__init__(folders, settings)
+
+        avg_size = utils.get_int_from_environment(
+            const.E_CHUNK_AVG_SIZE, const.C_DEFAULT_CHUNK_AVG_SIZE, self.settings)
+        self.chunk_sizes = (
+            avg_size // const.C_CHUNK_SIZE_FACTOR, avg_size, avg_size * const.C_CHUNK_SIZE_FACTOR)
+
+        self.chunk_min_file_size = utils.get_int_from_environment(
+            const.E_CHUNK_MIN_FILE_SIZE, const.C_DEFAULT_CHUNK_MIN_FILE_SIZE, self.settings)
+        self.chunk_min_ratio = utils.get_int_from_environment(
+            const.E_CHUNK_MIN_RATIO, const.C_DEFAULT_CHUNK_MIN_RATIO, self.settings)
+        self.chunk_max_files = utils.get_int_from_environment(
+            const.E_CHUNK_MAX_FILES, const.C_DEFAULT_CHUNK_MAX_FILES, self.settings)
+
+        self.files = []
+        self.chunks = {}
+        self.pairs = []
+
+    def __load_files(self, roots: list):
+        """Walk the given folders and keep their large files, the hard links are loaded once.
+
+        Args:
+            roots (list(str)): The folders to walk.
+        """
+        self._start_stage('walk')
+
+        linked = set()
+        for _, entry in self.walker.walk_roots(self._top_roots(roots)):
+            self._advance(1, entry.size)
+
+            if entry.size < self.chunk_min_file_size or (entry.device, entry.inode) in linked:
+                continue
+
+            linked.add((entry.device, entry.inode))
+            self.files.append(entry)
+
+        self.scanned_folders = sum(self.walker.scanned_folders.values())
+
+    def __chunk_files(self):
+        """Split the loaded files in chunks with the hashing executor (or the I/O
+        scheduler), and index the size and the files of each chunk digest.
+        """
+        self._start_stage('chunk', len(self.files), sum(entry.size for entry in self.files))
+
+        results = self._map_files(
+            chunker.chunk_file, self.files,
+            repeat(self.hash_algorithm), *(repeat(size) for size in self.chunk_sizes))
+
+        for file_id, chunks in results:
+            self._advance(1, self.files[file_id].size)
+
+            if chunks is None:
+                self.unreadable_files += 1
+                continue
+
+            self.chunked_files += 1
+
+            # A chunk repeated in the file is indexed once for the file.
+            for digest, size in dict(chunks).items():
+                item = self.chunks.get(digest)
+                if item is None:
+                    self.chunks[digest] = (size, [file_id])
+                    self.unique_bytes += size
+                else:
+                    item[1].append(file_id)
+
+            self.chunked_bytes += sum(size for _, size in chunks)
+
+    def __pair_files(self):
+        """Sum the bytes shared by each pair of files, and keep the pairs sharing
+        at least CHUNK_MIN_RATIO % of the smaller file.
+
+        The chunks shared by more than CHUNK_MAX_FILES files are skipped, their
+        pairs grow with the square of their files. (ex: the runs of zeros)
+        """
+        self._start_stage('pair', len(self.chunks))
+
+        shared = defaultdict(int)
+        for size, file_ids in self.chunks.values():
+            if self.chunk_max_files and len(file_ids) > self.chunk_max_files:
+                self.common_chunks += 1
+                continue
+
+            for pair in combinations(file_ids, 2):
+                shared[pair] += size
+
+        self._advance(len(self.chunks), 0)
+
+        self.pairs = []
+        for pair, shared_bytes in shared.items():
+            first, second = sorted(pair, key=lambda file_id: self.files[file_id].path)
+            ratio = shared_bytes / min(self.files[first].size, self.files[second].size)
+            if ratio * 100 >= self.chunk_min_ratio:
+                self.pairs.append((shared_bytes, ratio, first, second))
+
+        self.pairs.sort(key=lambda pair: (
+            -pair[0], self.files[pair[2]].path, self.files[pair[3]].path))
+
+    def __explore(self, base_folder: str, roots: list):
+        """Find the partial duplicates of the given folders.
+
+        Args:
+            base_folder (str): The explored folder, or the name of the global result.
+            roots (list(str)): The folders explored together, None for a single folder.
+        """
+        self._reset(base_folder, roots)
+
+        self.chunked_files = 0
+        self.chunked_bytes = 0
+        self.unique_bytes = 0
+        self.common_chunks = 0
+        self.files = []
+        self.chunks = {}
+        self.pairs = []
+
+        self.__load_files(roots or [base_folder])
+        self.__chunk_files()
+        self.__pair_files()
+
+    def _write_to_file(self):
+        """Summary:\n
+        Writes the summary and the pairs of partial duplicates to a text file and a
+        JSON Lines file (ex: <selected/path>/<folder-name>_partial.txt).
+
+        The pairs are sorted by shared bytes, the ratio is the share of the smaller
+        file found in the other file. The block-level savings are the bytes of the
+        repeated chunks, that a block-level deduplication would store once.
+
+        Example: \n
+        ================ SUMMARY ===============================\n
+        Base folder: (path/to/folder).\n
+        Scanned sub-folders: (n).\n
+        Hash algorithm: (md5).\n
+        Chunk sizes: (16.0 KB, 64.0 KB, 256.0 KB).\n
+        Chunked files: (n), (n B).\n
+        Unreadable files: (n).\n
+        Unique chunks: (n), (n B).\n
+        Common chunks not paired: (n), shared by more than (64) files.\n
+        Block-level savings: (n B), (n%).\n
+        Partial duplicate pairs: (n), sharing at least (50%).\n
+        ========================================================\n
+
+        path/to/folder/disk.img\n
+        path/to/folder/disk-backup.img\n
+        Shared: (n B), (n%).\n
+        '----------------------------------------------------------------------------------------'\n
+        """
+
+        savings = self.chunked_bytes - self.unique_bytes
+        savings_ratio = savings / self.chunked_bytes if self.chunked_bytes else 0
+
+        summary = [
+            *self._summary_header(),
+            f'Hash algorithm: ({self.hash_algorithm}).',
+            f'Chunk sizes: ({", ".join(utils.format_size(size) for size in self.chunk_sizes)}).',
+            f'Chunked files: ({self.chunked_files}), ({utils.format_size(self.chunked_bytes)}).',
+            f'Unreadable files: ({self.unreadable_files}).',
+            f'Unique chunks: ({len(self.chunks)}), ({utils.format_size(self.unique_bytes)}).',
+            f'Block-level savings: ({utils.format_size(savings)}), ({savings_ratio:.1%}).',
+            f'Partial duplicate pairs: ({len(self.pairs)}), '
+            f'sharing at least ({self.chunk_min_ratio}%).',
+        ]
+        if self.common_chunks:
+            summary.insert(-2, f'Common chunks not paired: ({self.common_chunks}), '
+                               f'shared by more than ({self.chunk_max_files}) files.')
+
+        results = []
+        for shared_bytes, ratio, first, second in self.pairs:
+            files = [{'path': self.files[file_id].path, 'size': self.files[file_id].size}
+                     for file_id in (first, second)]
+
+            results.append((
+                'pair', {'shared': shared_bytes, 'ratio': ratio, 'files': files},
+                [item['path'] for item in files] +
+                [f'Shared: ({utils.format_size(shared_bytes)}), ({ratio:.1%}).']))
+
+        self._write_results(
+            const.C_PARTIAL_RESULT_SUFFIX, summary, results,
+            f'No partial duplicates were found in the folder ({self.current_folder})!')
+
+    def run(self):
+        """Summary:\n
+        Find the partial duplicates in the given folders and write the result to
+        a file in the specified output folder, sending the events of the scan
+        to the event handler (`on_event`).
+
+        Raises:\n
+            Exception: 'Thrown when numpy is not installed.'
+            ScanCancelled: 'Thrown when the scan was cancelled.'
+        """
+        if not chunker.is_available():
+            raise Exception(
+                'The partial duplicates search requires numpy! '
+                'please install it (pip install numpy).')
+
+        with self._instrumented():
+            for folder, roots in self._explorations():
+                self.__explore(folder, roots)
+                self._write_to_file()
+
+    def find_partial(self):
+        """Summary:\n
+        Find the partial duplicates in the given folders and write the
+        result to a file in the specified output folder.
+        """
+        self._run_in_console('partial duplicates search', self.run)
@@ -0,0 +1,270 @@
+"""
+Report stage of the managers: write the summary and the result of the explored
+folder to the result files, and send them as events.
+"""
+import json
+from itertools import chain
+from os import path
+
+# Custom
+from ..core import utils
+from ..core.reports import GroupRecord, create_writers
+
+
+class ReportStageMixin:
+    """Summary:\n
+    Write the result files of the managers, see `BaseManager`.
+    """
+
+    def _write_to_file(self):
+        """Summary:\n
+        Writes the summary and the result of the search in a files and print it to console.
+
+        If the [OUTPUT_FOLDER] environment variable is not set, the method
+        will default to the user home directory. (ex: <selected/path>/<folder-name>_result.txt).
+
+        The groups are streamed to the text file and to the files of the [REPORT_FORMATS]
+        (ex: <folder-name>_result.jsonl), as they are found.
+
+        In a global scan, the groups are annotated with the folders they span, and each
+        folder gets a view of the global result: the groups with at least one of its files.
+
+        Example: \n
+        ================ SUMMARY ===============================\n
+        Base folder: (path/to/folder).\n
+        Scanned sub-folders: (n).\n
+        Hash algorithm: (md5).\n
+        Verification: (unverified, digest only).\n
+        Loaded files: (n).\n
+        Skipped by size: (n) file(s), (n B).\n
+        Skipped by partial hash: (n) file(s), (n B).\n
+        Cached hashes: (n).\n
+        Hard link groups: (n).\n
+        Duplicate files: (n).\n
+        Reclaimable space: (n B).\n
+        ========================================================\n
+
+        path/to/folder/W1.jpg\n
+        path/to/duplicate/file/name.jpg\n
+        '----------------------------------------------------------------------------------------'\n
+        """
+        writers = self.__create_writers(self.current_folder)
+        self._emit('report', path=writers[0].file_path)
+
+        # The view of each folder of a global scan: its writers and counters.
+        views = {}
+        for root in self.current_roots:
+            views[root] = {'writers': self.__create_writers(root),
+                           'duplicates': 0, 'hard_links': 0, 'reclaimable': 0}
+            self._emit('report', path=views[root]['writers'][0].file_path)
+
+        # The groups are confirmed as they are written.
+        self._start_stage(
+            'verify' if self.verify_algorithm or self.verify_content else 'report')
+
+        duplicates = 0
+        hard_links = 0
+        self.reclaimable_bytes = 0
+
+        for record in chain(self.duplicate_files, self.hard_link_files):
+            if record.kind == 'duplicates':
+                duplicates += 1
+                self.reclaimable_bytes += record.wasted
+            else:
+                hard_links += 1
+
+            if views:
+                record = self.__write_views(record, views)
+
+            for writer in writers:
+                writer.write_group(record)
+
+            self._emit('group', record=record)
+            self._advance(len(record.files), len(record.files) * record.size)
+
+        if duplicates < 1:
+            self._emit('warning', message=(
+                f'No duplicate files were found in the folder ({self.current_folder})!'))
+
+        algorithm = self.hash_algorithm if not self.verify_algorithm else \
+            f'{self.hash_algorithm}, verified with {self.verify_algorithm}'
+        verification = 'verified byte-for-byte' \
+            if self.verify_content else 'unverified, digest only'
+
+
+        summary = [
+            *self._summary_header(),
+            f'Hash algorithm: ({algorithm}).',
+            f'Verification: ({verification}).',
+            f'Loaded files: ({self.total_files}).',
+            f'Skipped by size: ({self.skipped_files}) file(s), '
+            f'({utils.format_size(self.skipped_bytes)}).',
+            f'Skipped by partial hash: ({self.prefiltered_files}) file(s), '
+            f'({utils.format_size(self.prefiltered_bytes)}).',
+            f'Cached hashes: ({self.cached_files}).',
+            f'Hard link groups: ({hard_links}).',
+            f'Duplicate files: ({duplicates}).',
+            f'Reclaimable space: ({utils.format_size(self.reclaimable_bytes)}).',
+        ]
+
+        if self.unreadable_files:
+            summary.append(
+                f'Skipped as unreadable: ({self.unreadable_files}) file(s), '
+                'removed or renamed during the scan.')
+
+        if self.checkpoint is not None and self.checkpoint.resumed:
+            summary.append(
+                f'Resumed from the checkpoint: ({self.checkpoint.resumed_folders}) folder(s), '
+                f'({self.checkpoint.resumed_hashes}) hash(es).')
+
+        if self.deduplicator is not None:
+            dry_run = ', dry run' if self.deduplicator.dry_run else ''
+            summary.append(
+                f'Replaced with {self.deduplicator.mode}s{dry_run}: '
+                f'({self.deduplicator.replaced_files}) file(s), '
+                f'({utils.format_size(self.deduplicator.reclaimed_bytes)}) reclaimed, '
+                f'({self.deduplicator.skipped_files}) skipped.')
+
+        for writer in writers:
+            writer.close(summary)
+
+        for root, view in views.items():
+            view_summary = [
+                f'Base folder: ({root}).',
+                f'Scanned with: ({"; ".join(item for item in views if item != root)}).',
+                f'Global result: ({writers[0].file_path}).',
+                f'Hash algorithm: ({algorithm}).',
+                f'Verification: ({verification}).',
+                f'Loaded files: ({self.root_files[root]}).',
+                f'Hard link groups: ({view["hard_links"]}).',
+                f'Duplicate files: ({view["duplicates"]}).',
+                f'Reclaimable space: ({utils.format_size(view["reclaimable"])}).',
+            ]
+
+            for writer in view['writers']:
+                writer.close(view_summary)
+
+        self._emit('summary', lines=summary)
+
+    def __create_writers(self, folder: str):
+        """Create the writers of the result files of the given folder.
+
+        Args:
+            folder (str): The explored folder, or the name of the global result.
+
+        Returns:
+            (list): The writers, the text writer first.
+        """
+        return create_writers(
+            self.report_formats, utils.unify_separator(self.output_folder),
+            self._folder_name(folder))
+
+    @staticmethod
+    def _folder_name(folder: str):
+        """Summary:\n
+        Get the name of the given folder, the result files are named with it.
+
+        Args:\n
+            folder (str): 'The explored folder, or the name of the global result.'
+
+        Returns:\n
+            (str): 'The name of the folder.'
+        """
+        return path\
+            .split(folder)[1]\
+            .strip('\\').strip('/').strip(' ')
+
+    def _summary_header(self):
+        """Summary:\n
+        Get the first lines of the summary of the explored folder.
+
+        Returns:\n
+            (list(str)): 'The explored folders, and the number of their sub-folders.'
+        """
+        base_folder = f'Base folders: ({"; ".join(self.current_roots)}).' \
+            if self.current_roots else f'Base folder: ({self.current_folder}).'
+
+        return [base_folder, f'Scanned sub-folders: ({self.scanned_folders}).']
+
+    def _write_results(self, suffix: str, summary: list, results: list, empty_message: str):
+        """Summary:\n
+        Writes the summary and the results of the explored folder to a text file and a
+        JSON Lines file (ex: <selected/path>/<folder-name>_<suffix>.txt), and send the
+        results as events.
+
+        Args:\n
+            suffix (str): 'The suffix of the result files, and the kind of their records.'
+            summary (list(str)): 'The lines of the summary.'
+            results (list(tuple)): 'The event kind, the data and the lines of the text file of
+                                    each result, the data has the processed `files`.'
+            empty_message (str): 'The warning sent when there is no result.'
+        """
+        file_path = path.join(
+            utils.unify_separator(self.output_folder),
+            f'{self._folder_name(self.current_folder)}_{suffix}')
+
+        self._emit('report', path=f'{file_path}.txt')
+        self._start_stage('report', len(results))
+
+        separator = f'{"-"*89}\n\n'
+
+        repeat_count = 40
+        with open(f'{file_path}.txt', 'w', encoding='utf-8') as text_file, \
+                open(f'{file_path}.jsonl', 'w', encoding='utf-8') as jsonl_file:
+            text_file.write(f'{"="*repeat_count} SUMMARY {"="*repeat_count}\n')
+            for line in summary:
+                text_file.write(f'{line}\n')
+            text_file.write(f'{"="*(repeat_count*2 + 9)}\n\n')
+
+            for kind, data, lines in results:
+                for line in lines:
+                    text_file.write(f'{line}\n')
+                text_file.write(separator)
+
+                jsonl_file.write(json.dumps({'kind': suffix, **data}) + '\n')
+
+                self._emit(kind, **data)
+                self._advance(len(data['files']), sum(item['size'] for item in data['files']))
+
+            jsonl_file.write(json.dumps({'kind': 'summary', 'lines': summary}) + '\n')
+
+        if not results:
+            self._emit('warning', message=empty_message)
+
+        self._emit('summary', lines=summary)
+
+    def __write_views(self, record: GroupRecord, views: dict):
+        """Annotate the given group with the folders it spans, and write it to their views.
+
+        A folder can reclaim its files of the group, except the first
+        file of the group when it is one of them.
+
+        Args:
+            record (GroupRecord): The group of the global scan.
+            views (dict): The writers and the counters of each folder.
+
+        Returns:
+            (GroupRecord): The annotated group.
+        """
+        files_by_root = {root: 0 for root in views}
+        for file_path in record.files:
+            for root in self._roots_of(file_path):
+                files_by_root[root] += 1
+
+        record = record._replace(
+            roots=tuple(root for root, count in files_by_root.items() if count))
+
+        for root in record.roots:
+            view = views[root]
+
+            if record.kind == 'duplicates':
+                kept = 1 if root in self._roots_of(record.files[0]) else 0
+                view['duplicates'] += 1
+                view['reclaimable'] += (files_by_root[root] - kept) * record.size
+            else:
+                view['hard_links'] += 1
+
+            for writer in view['writers']:
+                writer.write_group(record)
+
+        return record
@@ -0,0 +1,100 @@
+"""
+Asynchronous scan of the given folders, streaming its events.
+
+The search runs in a worker thread, its events are passed to the event loop
+through a bounded queue: the scan waits while the consumer is behind,
+and stops as soon as the consumer leaves the loop or is cancelled.
+
+    async for event in scan(['path/to/folder'], {'HASH_ALGORITHM': 'xxh3'}):
+        if event.kind == 'progress':
+            print(event.data['files_per_second'], event.data['eta'])
+        elif event.kind == 'group':
+            print(event.data['record'].files)
+
+The other managers run the same way, ex: `scan([source, destination], manager=CompareFolders)`.
+"""
+import asyncio
+from threading import Event
+
+# Custom
+from .duplicates_in_folder import DuplicatesInFolder
+from ..core import constants as const
+
+# Put in the queue once the scan is finished.
+_FINISHED = object()
+
+
+async def scan(roots: list, options=None, max_pending=const.C_SCAN_QUEUE_SIZE, executor=None,
+               manager=DuplicatesInFolder):
+    """Summary:\n
+    Find the duplicate files in the given folders, and yield the events of the scan.
+
+    The result files are written as with the blocking method of the manager.
+    (ex: `DuplicatesInFolder.find_in_folders`)
+
+    Args:\n
+        roots (list(str)): 'The folders to scan.'
+        options (dict, optional): 'Settings overriding the environment variables.
+                                   (ex: {"HASH_ALGORITHM": "xxh3"})'
+        max_pending (int, optional): 'The number of events queued before the scan
+                                      waits for the consumer.'
+        executor (Executor, optional): 'The executor running the scan, the default
+                                        executor of the loop if not given.'
+        manager (type, optional): 'The manager running the scan. (ex: CompareFolders,
+                                   SimilarImages or PartialDuplicates)'
+
+    Raises:\n
+        ValueError: 'Thrown when no folder is given.'
+        Exception: 'The errors of the scan.'
+
+    Returns:\n
+        (async_generator(ScanEvent)): 'The events of the scan, see `manager.core.events`.'
+    """
+    # The manager would ask for the folders on the standard input.
+    if not roots:
+        raise ValueError('No folder to scan was given!')
+
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(max_pending)
+    cancelled = Event()
+
+    def on_event(event):
+        # Blocks the worker until the event is queued.
+        asyncio.run_coroutine_threadsafe(queue.put(event), loop).result()
+
+    def run():
+        try:
+            # Created in the worker, the caches are bound to their thread.
+            with manager(roots, options) as instance:
+                instance.on_event = on_event
+                instance.cancelled = cancelled
+                instance.run()
+        finally:
+            asyncio.run_coroutine_threadsafe(queue.put(_FINISHED), loop).result()
+
+    future = loop.run_in_executor(executor, run)
+
+    try:
+        while True:
+            event = await queue.get()
+            if event is _FINISHED:
+                break
+
+            yield event
+
+        # Raise the error of the scan, if any.
+        await future
+
+    finally:
+        cancelled.set()
+
+        # Unblock the worker until it stops at its next event.
+        while not future.done():
+            while not queue.empty():
+                queue.get_nowait()
+
+            await asyncio.wait([future], timeout=const.C_PROGRESS_INTERVAL / 10)
+
+        # The worker stopped with ScanCancelled, or its error was raised above.
+        if not future.cancelled():
+            future.exception()
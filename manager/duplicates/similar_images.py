@@ -0,0 +1,250 @@
+"""
+Find the similar images (resized, re-encoded...) in the given folders.
+"""
+# pylint: disable=too-few-public-methods
+
+from itertools import repeat
+from os import path
+
+# Custom
+from .base_manager import BaseManager
+from ..core import constants as const
+from ..core import utils
+from ..core import perceptual
+from ..core.executors import create_executor
+
+
+class SimilarImages(BaseManager):
+    """
+    Find the similar images in the given folders, using their perceptual hashes.
+    """
+
+    # Perceptual hash, maximum Hamming distance between two similar images,
+    # extensions of the images and number of decoding processes.
+    similarity_hash: str
+    similarity_radius: int
+    similarity_extensions: list
+    similarity_workers: int
+
+    # Attributes for summary.
+    image_files: int = 0
+    unreadable_files: int = 0
+
+    # Attributes for data, the hashed images and the clusters of similar images.
+    images: list
+    hashes: list
+    clusters: list
+
+    def __init__(self, folders=None, settings=None):
+        super().__init__(folders, settings)
+
+        self.similarity_hash = utils.get_str_from_environment(
+            const.E_SIMILARITY_HASH, const.C_DEFAULT_SIMILARITY_HASH, self.settings).strip().lower()
+        self.similarity_radius = utils.get_int_from_environment(
+            const.E_SIMILARITY_RADIUS, const.C_DEFAULT_SIMILARITY_RADIUS, self.settings)
+        extensions = utils.get_list_from_environment(
+            const.E_SIMILARITY_EXTENSIONS, self.settings) or const.C_DEFAULT_SIMILARITY_EXTENSIONS
+        self.similarity_extensions = [
+            extension.strip().lower().lstrip('.') for extension in extensions]
+        self.similarity_workers = utils.get_int_from_environment(
+            const.E_SIMILARITY_WORKERS, const.C_DEFAULT_SIMILARITY_WORKERS, self.settings)
+
+        if self.similarity_hash not in perceptual.C_PERCEPTUAL_HASHES:
+            raise Exception(
+                f'Unknown perceptual hash ({self.similarity_hash})! '
+                f'please choose one of ({", ".join(perceptual.C_PERCEPTUAL_HASHES)}).')
+
+        self.images = []
+        self.hashes = []
+        self.clusters = []
+
+    def __is_image(self, file_path: str):
+        """Check if the given file has one of the image extensions.
+
+        Args:
+            file_path (str): The file.
+
+        Returns:
+            (bool): True if the file is an image.
+        """
+        return path.splitext(file_path)[1][1:].lower() in self.similarity_extensions
+
+    def __load_images(self, roots: list):
+        """Walk the given folders and keep their images, the hard links are loaded once.
+
+        Args:
+            roots (list(str)): The folders to walk.
+        """
+        self._start_stage('walk')
+
+        linked = set()
+        for _, entry in self.walker.walk_roots(self._top_roots(roots)):
+            self._advance(1, entry.size)
+
+            if not self.__is_image(entry.path) or (entry.device, entry.inode) in linked:
+                continue
+
+            linked.add((entry.device, entry.inode))
+            self.images.append(entry)
+
+        self.scanned_folders = sum(self.walker.scanned_folders.values())
+        self.image_files = len(self.images)
+
+    def __hash_images(self, executor):
+        """Get the perceptual hashes of the loaded images from the cache, or decode
+        them with the given executor.
+
+        Args:
+            executor (SerialExecutor): The executor decoding the images.
+        """
+        self._start_stage('decode', len(self.images), sum(entry.size for entry in self.images))
+
+        self.hashes = [None] * len(self.images)
+        missing = []
+
+        for index, entry in enumerate(self.images):
+            if self.hash_cache is not None:
+                self.hashes[index] = self.hash_cache.get(entry, self.similarity_hash)
+
+            if self.hashes[index] is None:
+                missing.append(index)
+            else:
+                self.cached_files += 1
+                self._advance(1, entry.size)
+
+        results = executor.map(
+            perceptual.image_hash,
+            [self.images[index].path for index in missing],
+            repeat(self.similarity_hash))
+
+        for index, image_hash in zip(missing, results):
+            self.hashes[index] = image_hash
+            self._advance(1, self.images[index].size)
+
+            # The unreadable images are cached too (empty hash), until they change.
+            if self.hash_cache is not None:
+                self.hash_cache.set(self.images[index], self.similarity_hash, image_hash)
+
+        if self.hash_cache is not None:
+            self.hash_cache.save()
+
+    def __cluster_images(self):
+        """Cluster the hashed images within the similarity radius, the clusters
+        and their images are sorted by path.
+        """
+        hashes = {index: int(image_hash, 16)
+                  for index, image_hash in enumerate(self.hashes) if image_hash}
+        self.unreadable_files = len(self.images) - len(hashes)
+
+        self._start_stage('cluster', len(hashes))
+
+        self.clusters = sorted(
+            (sorted(cluster, key=lambda index: self.images[index].path)
+             for cluster in perceptual.cluster_hashes(hashes, self.similarity_radius)),
+            key=lambda cluster: self.images[cluster[0]].path)
+
+        self._advance(len(hashes), 0)
+
+    def __explore(self, base_folder: str, roots: list, executor):
+        """Find the similar images of the given folders.
+
+        Args:
+            base_folder (str): The explored folder, or the name of the global result.
+            roots (list(str)): The folders explored together, None for a single folder.
+            executor (SerialExecutor): The executor decoding the images.
+        """
+        self._reset(base_folder, roots)
+
+        self.images = []
+        self.hashes = []
+        self.clusters = []
+
+        self.__load_images(roots or [base_folder])
+        self.__hash_images(executor)
+        self.__cluster_images()
+
+    def _write_to_file(self):
+        """Summary:\n
+        Writes the summary and the clusters of similar images to a text file and a
+        JSON Lines file (ex: <selected/path>/<folder-name>_similar.txt).
+
+        Each image is followed by the Hamming distance of its hash to the hash
+        of the first image of its cluster.
+
+        Example: \n
+        ================ SUMMARY ===============================\n
+        Base folder: (path/to/folder).\n
+        Scanned sub-folders: (n).\n
+        Perceptual hash: (dhash, radius 6).\n
+        Loaded images: (n).\n
+        Unreadable images: (n).\n
+        Cached hashes: (n).\n
+        Similar images: (n) in (n) cluster(s).\n
+        ========================================================\n
+
+        path/to/folder/W1.jpg (0)\n
+        path/to/resized/W1.jpg (3)\n
+        '----------------------------------------------------------------------------------------'\n
+        """
+
+        summary = [
+            *self._summary_header(),
+            f'Perceptual hash: ({self.similarity_hash}, radius {self.similarity_radius}).',
+            f'Loaded images: ({self.image_files}).',
+            f'Unreadable images: ({self.unreadable_files}).',
+            f'Cached hashes: ({self.cached_files}).',
+            f'Similar images: ({sum(len(cluster) for cluster in self.clusters)}) '
+            f'in ({len(self.clusters)}) cluster(s).',
+        ]
+
+        results = []
+        for cluster in self.clusters:
+            first = int(self.hashes[cluster[0]], 16)
+            files = [{'path': self.images[index].path,
+                      'size': self.images[index].size,
+                      'hash': self.hashes[index],
+                      'distance': perceptual.hamming_distance(
+                          first, int(self.hashes[index], 16))}
+                     for index in cluster]
+
+            results.append((
+                'cluster', {'method': self.similarity_hash, 'files': files},
+                [f'{item["path"]} ({item["distance"]})' for item in files]))
+
+        self._write_results(
+            const.C_SIMILAR_RESULT_SUFFIX, summary, results,
+            f'No similar images were found in the folder ({self.current_folder})!')
+
+    def run(self):
+        """Summary:\n
+        Find the similar images in the given folders and write the result to
+        a file in the specified output folder, sending the events of the scan
+        to the event handler (`on_event`).
+
+        Raises:\n
+            Exception: 'Thrown when pillow or numpy is not installed.'
+            ScanCancelled: 'Thrown when the scan was cancelled.'
+        """
+        if not perceptual.is_available():
+            raise Exception(
+                'The similar images search requires pillow and numpy! '
+                'please install them (pip install pillow numpy).')
+
+        # The images are decoded in a pool of processes, the decoding is CPU bound.
+        executor = create_executor(
+            'process' if self.similarity_workers > 1 else 'serial', self.similarity_workers)
+
+        try:
+            with self._instrumented():
+                for folder, roots in self._explorations():
+                    self.__explore(folder, roots, executor)
+                    self._write_to_file()
+        finally:
+            executor.shutdown()
+
+    def find_similar(self):
+        """Summary:\n
+        Find the similar images in the given folders and write the
+        result to a file in the specified output folder.
+        """
+        self._run_in_console('similar images search', self.run)
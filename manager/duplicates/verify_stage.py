@@ -0,0 +1,173 @@
+"""
+Verification stage of the managers: group the hashed files by digest, and confirm
+the duplicate groups with the verify algorithm or byte-for-byte, as they are written.
+"""
+from collections import defaultdict
+from itertools import groupby, islice
+from operator import itemgetter
+
+# Custom
+from ..core import constants as const
+from ..core import utils
+from ..core.reports import GroupRecord
+
+
+class VerifyStageMixin:
+    """Summary:\n
+    Find and confirm the duplicate groups of the managers, see `BaseManager`.
+    """
+
+    # Attributes for summary.
+    unreadable_files: int = 0
+
+    def _find_duplicates(self):
+        """Summary:\n
+        Find the duplicate files from the loaded files.
+
+        The groups are read by (size, digest), then confirmed and yielded
+        by batches, as the result is written.
+
+        Returns:
+            (generator(GroupRecord)): 'The groups of duplicate files.'
+        """
+        self._start_stage('group')
+
+        if self.sorted_groups is not None:
+            groups = self.__sorted_duplicates()
+        else:
+            groups = self.__index_duplicates()
+
+        self.duplicate_files = self.__iter_duplicates(groups)
+
+        return self.duplicate_files
+
+    def __index_duplicates(self):
+        """Read the groups of duplicate files from the hashed groups of the index.
+
+        The hashed groups are in the order of their size, and a size can be split
+        in a few groups by partial hash. The paths are only resolved as the groups are read.
+
+        Returns:
+            (generator(GroupRecord)): The groups of duplicate files, by (size, digest).
+        """
+        for size, groups in groupby(
+                self.hashed_groups, key=lambda group: self.file_index.size(group[0])):
+            rows = [row for group in groups for row in group]
+
+            for group in self.file_index.group_by_digest(rows):
+                yield GroupRecord(
+                    'duplicates', size, self.file_index.digest(group[0]).hex(), 0,
+                    sorted(self.file_index.path(row) for row in group))
+
+    def __sorted_duplicates(self):
+        """Read the groups of duplicate files from the sorted (size, digest, path) records.
+
+        Returns:
+            (generator(GroupRecord)): The groups of duplicate files, by (size, digest).
+        """
+        for (size, digest), records in groupby(self.sorted_groups, key=itemgetter(0, 1)):
+            files = [record[2] for record in records]
+
+            if len(files) > 1:
+                yield GroupRecord('duplicates', size, digest.hex(), 0, files)
+
+    def _load_hashes(self):
+        """Summary:\n
+        Get the hashed files of the explored folder by hash.
+
+        Returns:\n
+            (dict(list)): 'The paths of the files, sorted, by hash.'
+        """
+        result = {}
+
+        for group in self.hashed_groups:
+            for rows in self.file_index.group_by_digest(group, 1):
+                files = sorted(self.file_index.path(row) for row in rows)
+                result[self.file_index.digest(rows[0]).hex()] = files
+
+        return result
+
+    def __iter_duplicates(self, groups):
+        """Summary:\n
+        Yield the given groups of duplicate files, confirmed with the
+        verify algorithm or byte-for-byte when enabled.
+
+        Args:\n
+            groups (iterator(GroupRecord)): 'The groups of duplicate files, by (size, digest).'
+
+        Returns:
+            (generator(GroupRecord)): 'The groups of duplicate files.'
+        """
+        while True:
+            batch = list(islice(groups, const.C_VERIFY_BATCH_SIZE))
+            if not batch:
+                break
+
+            if self.verify_algorithm:
+                batch = self._verify_duplicates(batch)
+
+            if self.verify_content:
+                batch = self._compare_duplicates(batch)
+
+            # Every copy but one of each group can be reclaimed.
+            for record in batch:
+                yield record._replace(wasted=(len(record.files) - 1) * record.size)
+
+    def _verify_duplicates(self, groups: list):
+        """Summary:\n
+        Confirm the given duplicate groups with the verify algorithm,
+        and split the groups whose files don't match.
+
+        Args:\n
+            groups (list(GroupRecord)): 'The groups of duplicate files.'
+
+        Returns:\n
+            (list(GroupRecord)): 'The confirmed groups of duplicate files.'
+        """
+        entries = {}
+        for record in groups:
+            for file_path in record.files:
+                try:
+                    entries[file_path] = utils.get_file_entry(file_path)
+                except OSError:
+                    # Removed or renamed since it was hashed.
+                    self.unreadable_files += 1
+
+        hashes = dict(zip(entries, self._hash_files(list(entries.values()), self.verify_algorithm)))
+
+        # The files were explored, and their cache saved, before they were verified.
+        if self.hash_cache is not None:
+            self.hash_cache.save()
+
+        result = []
+        for record in groups:
+            confirmed = defaultdict(list)
+            for file_path in record.files:
+                if hashes.get(file_path) is not None:
+                    confirmed[hashes[file_path]].append(file_path)
+
+            result.extend(record._replace(files=item)
+                          for item in confirmed.values() if len(item) > 1)
+
+        return result
+
+    def _compare_duplicates(self, groups: list):
+        """Summary:\n
+        Confirm the given duplicate groups with a byte-for-byte comparison,
+        and split the groups whose files don't match.
+
+        Args:\n
+            groups (list(GroupRecord)): 'The groups of duplicate files.'
+
+        Returns:\n
+            (list(GroupRecord)): 'The confirmed groups of duplicate files.'
+        """
+        results = self.executor.map(
+            utils.split_identical_files, [record.files for record in groups])
+
+        result = []
+        for record, confirmed in zip(groups, results):
+            result.extend(record._replace(files=item) for item in confirmed)
+            self._advance(len(record.files), len(record.files) * record.size)
+
+        return result
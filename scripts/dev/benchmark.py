@@ -0,0 +1,404 @@
+"""
+Benchmark of the scan, hash and compare pipeline on a synthetic tree.
+
+The tree is generated in a temp folder from a seed, so two runs with the same
+parameters scan the same files, and is reused while the parameters don't change.
+Each scenario runs in its own process, its stages are timed from the events of
+the scan, and the results are saved as JSON to be compared over time.
+
+    python scripts/dev/benchmark.py --files 20000 --sizes "4K:70,1M:25,32M:5" --runs 3
+
+The settings of the managers are read from the environment variables (ex: HASH_ALGORITHM).
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import random
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from os import path
+from shutil import rmtree
+from time import perf_counter
+
+from manager import CompareFolders, DuplicatesInFolder
+from manager.core import constants as const
+from manager.core import custom_printer as log
+
+# Optional peak memory of the processes (Unix).
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Description of the generated tree, to reuse it while the parameters don't change.
+TREE_FILE = 'tree.json'
+
+# Size of the blocks written to the generated files.
+WRITE_BLOCK_SIZE = 1024 * 1024
+
+SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+def parse_sizes(text: str):
+    """Parse a size distribution, the sizes and their weights. (ex: "4K:70,1M:25,32M:5")
+
+    Args:
+        text (str): The distribution.
+
+    Returns:
+        (list(tuple)): The (size, weight) of each size.
+    """
+    sizes = []
+
+    for item in text.split(','):
+        size, _, weight = item.strip().partition(':')
+        size = size.strip().upper().rstrip('B')
+        unit = size[-1:] if size[-1:] in SIZE_UNITS else ''
+        sizes.append((int(float(size[:len(size) - len(unit)]) * SIZE_UNITS[unit]),
+                      float(weight or 1)))
+
+    return sizes
+
+
+def write_content(file_path: str, size: int, seed: int):
+    """Write the content generated from the given seed to the given file.
+
+    Args:
+        file_path (str): The file.
+        size (int): The size of the file.
+        seed (int): The seed of the content, the same seed gives the same content.
+    """
+    generator = random.Random(seed)
+
+    with open(file_path, 'wb') as file:
+        remaining = size
+        while remaining:
+            block = min(remaining, WRITE_BLOCK_SIZE)
+            file.write(generator.randbytes(block))
+            remaining -= block
+
+
+def generate_tree(root: str, params: dict):
+    """Generate the synthetic tree, or reuse it when generated with the same parameters.
+
+    The files are spread between a `source` and a `destination` folder, at the given depth:
+        - duplicates: a copy of a previous file.
+        - same_size: a previous file size, with another content.
+        - hard_links: a hard link to a previous file.
+        - the other files have a size drawn from the distribution, and their own content.
+
+    Args:
+        root (str): The folder of the tree.
+        params (dict): The parameters of the tree (files, sizes, duplicates,
+                       same_size, hard_links, depth, fanout and seed).
+
+    Returns:
+        (dict): The parameters and the statistics of the tree.
+    """
+    tree_file = path.join(root, TREE_FILE)
+
+    if path.exists(tree_file):
+        with open(tree_file, 'r', encoding='utf-8') as file:
+            tree = json.load(file)
+
+        if tree['params'] == params:
+            log.print_ok(f'Reusing the tree ({root})...')
+            return tree
+
+    log.print_ok(f'Generating the tree ({root})...')
+    rmtree(root, ignore_errors=True)
+
+    generator = random.Random(params['seed'])
+    sizes, weights = zip(*parse_sizes(params['sizes']))
+
+    originals = []
+    stats = {'files': 0, 'bytes': 0, 'folders': set(), 'unique': 0,
+             'duplicates': 0, 'same_size': 0, 'hard_links': 0}
+
+    for index in range(params['files']):
+        top = 'source' if generator.random() < 0.5 else 'destination'
+        folder = path.join(root, top, *[f'd{generator.randrange(params["fanout"])}'
+                                        for _ in range(params['depth'])])
+        file_path = path.join(folder, f'f{index:07d}.bin')
+        draw = generator.random()
+
+        os.makedirs(folder, exist_ok=True)
+        stats['folders'].add(folder)
+
+        if originals and draw < params['duplicates']:
+            kind = 'duplicates'
+            _, size, seed = generator.choice(originals)
+        elif originals and draw < params['duplicates'] + params['same_size']:
+            kind = 'same_size'
+            size, seed = generator.choice(originals)[1], generator.getrandbits(64)
+        elif originals and draw < params['duplicates'] + params['same_size'] + params['hard_links']:
+            source, size, _ = generator.choice(originals)
+            os.link(source, file_path)
+            stats['hard_links'] += 1
+            stats['files'] += 1
+            stats['bytes'] += size
+            continue
+        else:
+            kind = 'unique'
+            size, seed = generator.choices(sizes, weights)[0], generator.getrandbits(64)
+            originals.append((file_path, size, seed))
+
+        write_content(file_path, size, seed)
+        stats[kind] += 1
+        stats['files'] += 1
+        stats['bytes'] += size
+
+    stats['folders'] = len(stats['folders'])
+    tree = {'params': params, 'stats': stats}
+
+    with open(tree_file, 'w', encoding='utf-8') as file:
+        json.dump(tree, file, indent=2)
+
+    return tree
+
+
+class StageTimer:
+    """Time the stages of a scan from its events.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.stages = {}
+        self.__stage = None
+        self.__started = 0.0
+
+    def __call__(self, event):
+        if event.kind == 'stage':
+            self.close()
+            self.__stage = event.data['stage']
+            self.__started = perf_counter()
+
+    def close(self):
+        """Add the time and the counters of the current stage, a stage can run once per folder.
+        """
+        if self.__stage is None:
+            return
+
+        stage = self.stages.setdefault(self.__stage, {'seconds': 0.0, 'files': 0, 'bytes': 0})
+        stage['seconds'] += perf_counter() - self.__started
+        stage['files'] += self.manager.progress.files
+        stage['bytes'] += self.manager.progress.bytes
+        self.__stage = None
+
+
+def __rates(item: dict):
+    """Add the files/sec and MB/s of the given timed item.
+
+    Args:
+        item (dict): The seconds, files and bytes.
+
+    Returns:
+        (dict): The same item, with its rates.
+    """
+    seconds = max(item['seconds'], 1e-9)
+    item['files_per_second'] = item['files'] / seconds
+    item['mb_per_second'] = item['bytes'] / seconds / 1024 ** 2
+
+    return item
+
+
+def __peak_rss():
+    """Get the peak resident memory of the process and of its finished children.
+
+    Returns:
+        (tuple(float, float)): The peak RSS (MB) of the process and of its children,
+            None when unknown.
+    """
+    if resource is None:
+        return None, None
+
+    # Reported in KB on Linux, and in bytes on macOS.
+    unit = 1 if sys.platform == 'darwin' else 1024
+
+    return tuple(resource.getrusage(who).ru_maxrss * unit / 1024 ** 2
+                 for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN))
+
+
+def run_scenario(scenario: str, root: str, settings: dict, verbose: bool, results):
+    """Run the given scenario on the tree, in its own process. The errors of the
+    managers are not caught, they fail the scenario.
+
+    Args:
+        scenario (str): The scenario. (find or compare)
+        root (str): The folder of the tree.
+        settings (dict): The settings overriding the environment variables.
+        verbose (bool): Indicate if the output of the managers is printed.
+        results (Queue): The queue receiving the result of the scenario.
+    """
+    if not verbose:
+        sys.stdout = open(os.devnull, 'w', encoding='utf-8')
+
+    folders = [path.join(root, 'source'), path.join(root, 'destination')]
+    started = perf_counter()
+
+    if scenario == 'find':
+        manager = DuplicatesInFolder([root], settings)
+    else:
+        manager = CompareFolders(folders, settings)
+
+    with manager:
+        timer = StageTimer(manager)
+        manager.on_event = timer
+        manager.run()
+
+    timer.close()
+    walk = timer.stages.get('walk', {'files': 0, 'bytes': 0})
+    peak_rss, peak_children_rss = __peak_rss()
+
+    results.put({
+        'scenario': scenario,
+        'seconds': perf_counter() - started,
+        'files': walk['files'],
+        'bytes': walk['bytes'],
+        'peak_rss_mb': peak_rss,
+        'peak_children_rss_mb': peak_children_rss,
+        'stages': {stage: __rates(item) for stage, item in timer.stages.items()},
+    })
+
+
+def __git_commit():
+    """Get the current commit of the repository, to compare the runs over time.
+
+    Returns:
+        (str): The commit, None when unknown.
+    """
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            check=True, cwd=path.dirname(path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def __print_run(result: dict):
+    """Print the result of a run of a scenario.
+
+    Args:
+        result (dict): The result of the run.
+    """
+    log.print_title(
+        f'[{result["scenario"]} #{result["run"]}] {result["seconds"]:.3f}s, '
+        f'{result["files_per_second"]:.0f} files/s, {result["mb_per_second"]:.1f} MB/s, '
+        f'peak RSS {result["peak_rss_mb"] or 0:.1f} MB')
+
+    for stage, item in result['stages'].items():
+        log.print_debug(
+            f'    {stage:<14}{item["seconds"]:>10.3f}s{item["files_per_second"]:>14.0f} files/s'
+            f'{item["mb_per_second"]:>12.1f} MB/s')
+
+
+def main():
+    """Generate the tree, run the scenarios and save the results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--root', default=path.join(tempfile.gettempdir(), 'dfm_benchmark'),
+                        help='Folder of the synthetic tree and of the results.')
+    parser.add_argument('--files', type=int, default=5000, help='Number of files.')
+    parser.add_argument('--sizes', default='512:20,4K:40,64K:25,1M:12,16M:3',
+                        help='Size distribution, the sizes and their weights.')
+    parser.add_argument('--duplicates', type=float, default=0.3,
+                        help='Ratio of copies of a previous file.')
+    parser.add_argument('--same-size', type=float, default=0.1,
+                        help='Ratio of files with the size of a previous file, '
+                             'and another content.')
+    parser.add_argument('--hard-links', type=float, default=0.02,
+                        help='Ratio of hard links to a previous file.')
+    parser.add_argument('--depth', type=int, default=3, help='Depth of the folders.')
+    parser.add_argument('--fanout', type=int, default=8, help='Sub-folders per folder.')
+    parser.add_argument('--seed', type=int, default=1, help='Seed of the tree.')
+    parser.add_argument('--scenarios', default='find,compare',
+                        help='Scenarios to run: find and/or compare.')
+    parser.add_argument('--runs', type=int, default=3, help='Runs of each scenario.')
+    parser.add_argument('--hash-cache', action='store_true',
+                        help='Keep the hash cache between the runs.')
+    parser.add_argument('--output', help='Result file (default: <root>/benchmark_<time>.json).')
+    parser.add_argument('--verbose', action='store_true', help='Print the output of the managers.')
+    args = parser.parse_args()
+
+    params = {
+        'files': args.files, 'sizes': args.sizes, 'duplicates': args.duplicates,
+        'same_size': args.same_size, 'hard_links': args.hard_links,
+        'depth': args.depth, 'fanout': args.fanout, 'seed': args.seed,
+    }
+
+    tree_folder = path.join(args.root, 'tree')
+    output_folder = path.join(args.root, 'output')
+    tree = generate_tree(tree_folder, params)
+
+    settings = {const.E_OUTPUT_FOLDER: output_folder}
+    if not args.hash_cache:
+        settings[const.E_HASH_CACHE] = '0'
+
+    # A fresh process for each run, to measure its own peak memory.
+    context = multiprocessing.get_context('spawn')
+    runs = []
+
+    for run in range(1, args.runs + 1):
+        for scenario in args.scenarios.split(','):
+            if not args.hash_cache:
+                rmtree(output_folder, ignore_errors=True)
+
+            results = context.Queue()
+            process = context.Process(
+                target=run_scenario,
+                args=(scenario.strip(), tree_folder, settings, args.verbose, results))
+            process.start()
+
+            result = None
+            while result is None and (process.is_alive() or not results.empty()):
+                try:
+                    result = results.get(timeout=1)
+                except queue.Empty:
+                    continue
+
+            process.join()
+
+            if result is None or process.exitcode:
+                raise Exception(
+                    f'The scenario ({scenario}) failed with the code ({process.exitcode})!')
+
+            result['run'] = run
+            runs.append(__rates(result))
+            __print_run(result)
+
+    best = {}
+    for result in runs:
+        name = result['scenario']
+        if name not in best or result['seconds'] < best[name]['seconds']:
+            best[name] = result
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': __git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'settings': {name: os.environ[name] for key, name in vars(const).items()
+                     if key.startswith('E_') and name in os.environ},
+        'tree': tree,
+        'runs': runs,
+        'best': {scenario: {'run': result['run'], 'seconds': result['seconds']}
+                 for scenario, result in best.items()},
+    }
+
+    output = args.output or path.join(
+        args.root, f'benchmark_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json')
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+
+    print()
+    log.print_inf(f'Saved the results to the file: ({output}).')
+
+
+if __name__ == "__main__":
+    main()
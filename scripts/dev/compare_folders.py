@@ -3,9 +3,10 @@ Process to start the folders compare.
 """
 
 from manager import CompareFolders
+from manager.core.utils import get_system_settings
 
 if __name__ == "__main__":
-    cmpFolders = CompareFolders()
+    with CompareFolders(settings=get_system_settings()) as cmpFolders:
 
-    # Start The process
-    cmpFolders.compare()
+        # Start The process
+        cmpFolders.compare()
@@ -3,9 +3,10 @@ Process to find duplicates in the given folder.
 """
 
 from manager import DuplicatesInFolder
+from manager.core.utils import get_system_settings
 
 if __name__ == "__main__":
-    dupFinder = DuplicatesInFolder()
+    with DuplicatesInFolder(settings=get_system_settings()) as dupFinder:
 
-    # Start The process
-    dupFinder.find_in_folders()
+        # Start The process
+        dupFinder.find_in_folders()
@@ -0,0 +1,12 @@
+"""
+Process to find partial duplicates in the given folders.
+"""
+
+from manager import PartialDuplicates
+from manager.core.utils import get_system_settings
+
+if __name__ == "__main__":
+    with PartialDuplicates(settings=get_system_settings()) as partialFinder:
+
+        # Start The process
+        partialFinder.find_partial()
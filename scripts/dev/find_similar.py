@@ -0,0 +1,12 @@
+"""
+Process to find similar images in the given folders.
+"""
+
+from manager import SimilarImages
+from manager.core.utils import get_system_settings
+
+if __name__ == "__main__":
+    with SimilarImages(settings=get_system_settings()) as imageFinder:
+
+        # Start The process
+        imageFinder.find_similar()
@@ -0,0 +1,14 @@
+"""
+Process to undo the replacements of the duplicates, from the undo journal.
+"""
+from os import path
+
+from manager.core import constants as const
+from manager.core import utils
+from manager.core.deduplicator import undo_journal
+
+if __name__ == "__main__":
+    journal = path.join(utils.get_output_folder(), const.C_DEDUP_JOURNAL_FILE)
+
+    # Start The process
+    undo_journal(journal, bool(utils.get_int_from_environment(const.E_DEDUP_DRY_RUN, 0)))
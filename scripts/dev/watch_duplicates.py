@@ -0,0 +1,11 @@
+"""
+Process to watch the given folders for duplicates.
+"""
+
+from manager import DuplicatesWatcher
+
+if __name__ == "__main__":
+    with DuplicatesWatcher() as dupWatcher:
+
+        # Start The process
+        dupWatcher.watch()
@@ -33,4 +33,18 @@ setup(
         'termcolor',
         'colorama'
     ],
+
+    # Optional fast hash algorithms (xxh3, blake3) and vectorized grouping (numpy).
+    extras_require={
+        'fast': [
+            'xxhash',
+            'blake3',
+            'numpy'
+        ],
+        # Perceptual hashes of the similar images search.
+        'images': [
+            'pillow',
+            'numpy'
+        ],
+    },
 )
@@ -0,0 +1,41 @@
+"""
+Helpers shared by the tests of the scans.
+"""
+import os
+
+import pytest
+
+from manager import DuplicatesInFolder
+
+
+def write_tree(root, files: dict):
+    """Write the given files, relative paths mapped to their content, under the root."""
+    for relative, content in files.items():
+        file_path = os.path.join(str(root), relative)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        with open(file_path, 'wb') as file_to_write:
+            file_to_write.write(content)
+
+
+def group_files(records: list, kind='duplicates'):
+    """The sorted files of the groups of the given kind."""
+    return sorted(sorted(record.files) for record in records if record.kind == kind)
+
+
+@pytest.fixture(name='run_scan')
+def fixture_run_scan(tmp_path):
+    """Scan the given folder and return the records of its 'group' events."""
+
+    def run_scan(folder, manager=DuplicatesInFolder, **settings):
+        settings = dict({'OUTPUT_FOLDER': str(tmp_path / 'output'), 'HASH_CACHE': '0',
+                         'CHECKPOINT': '0', 'LOG_FOLDERS': '0'}, **settings)
+        events = []
+
+        with manager([str(folder)], settings) as scan:
+            scan.on_event = events.append
+            scan.run()
+
+        return [event.data['record'] for event in events if event.kind == 'group']
+
+    return run_scan
@@ -0,0 +1,79 @@
+"""
+Tests of the resume of an interrupted scan from its checkpoint.
+"""
+import json
+import os
+
+import pytest
+
+from conftest import group_files, write_tree
+from manager import DuplicatesInFolder, ScanCancelled
+from manager.core import constants as const, utils
+
+
+@pytest.fixture(name='hashed')
+def fixture_hashed(monkeypatch):
+    """Record the files hashed by the scans."""
+    hashed = []
+
+    def genrate_hash(file_path, *args):
+        hashed.append(file_path)
+        return real_genrate_hash(file_path, *args)
+
+    real_genrate_hash = utils.genrate_hash
+    monkeypatch.setattr(utils, 'genrate_hash', genrate_hash)
+
+    return hashed
+
+
+def checkpointed_files(checkpoint, paths):
+    """The given files whose hash was recorded by the checkpoint."""
+    with open(checkpoint, encoding='utf-8') as records:
+        inodes = {tuple(record['file'][:2]) for record in map(json.loads, records)
+                  if record['kind'] == 'hash'}
+
+    return {path for path in paths if (os.stat(path).st_dev, os.stat(path).st_ino) in inodes}
+
+
+def test_resume_reuses_the_hashes_of_the_unchanged_files(
+        tmp_path, run_scan, hashed, monkeypatch):
+    root = tmp_path / 'tree'
+    write_tree(root, {
+        f'{copy}/{index}.bin': bytes([index]) * (100 + index)
+        for index in range(20) for copy in 'ab'})
+    settings = {'OUTPUT_FOLDER': str(tmp_path / 'output'), 'HASH_CACHE': '0',
+                'LOG_FOLDERS': '0', 'PARTIAL_BLOCK_SIZE': '0', 'HASH_WORKERS': '1'}
+    checkpoint = tmp_path / 'output' / 'dfm_output' / 'scan_checkpoint.jsonl'
+
+    # A progress event follows each hash.
+    monkeypatch.setattr(const, 'C_PROGRESS_INTERVAL', 0)
+
+    with DuplicatesInFolder([str(root)], dict(settings, CHECKPOINT='1')) as scan:
+        def cancel(event):
+            if event.kind == 'progress' and len(hashed) >= 10:
+                scan.cancelled.set()
+
+        scan.on_event = cancel
+        with pytest.raises(ScanCancelled):
+            scan.run()
+
+    assert checkpoint.exists()
+    interrupted = checkpointed_files(checkpoint, set(hashed))
+    assert 2 <= len(interrupted) < 40
+
+    # A checkpointed file changes, another one is removed.
+    changed, removed = sorted(interrupted)[:2]
+    write_tree(root, {os.path.relpath(changed, root): b'\xff' * os.path.getsize(changed)})
+    os.utime(changed, ns=(10**18, 10**18))
+    os.remove(removed)
+
+    hashed.clear()
+    resumed = run_scan(root, **dict(settings, RESUME='1'))
+
+    assert changed in hashed
+    assert not interrupted - {changed} & set(hashed)
+    assert not checkpoint.exists()
+
+    hashed.clear()
+    assert group_files(resumed) == group_files(run_scan(root, **settings))
+    assert len(hashed) == 38
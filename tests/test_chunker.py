@@ -0,0 +1,66 @@
+"""
+Tests of the content-defined chunks, and of their boundaries after an insertion.
+"""
+import random
+
+import pytest
+
+from manager.core import chunker, constants as const
+
+pytest.importorskip('numpy')
+
+SIZES = (2048, 8192, 65536)
+
+
+@pytest.fixture(name='data')
+def fixture_data():
+    """Random content of a few hundred chunks."""
+    return random.Random(5).randbytes(2 * 1024 * 1024)
+
+
+def split(tmp_path, data: bytes, name='file.bin'):
+    """Write the given content, and return its chunks."""
+    file_path = tmp_path / name
+    file_path.write_bytes(data)
+
+    return [bytes(chunk) for chunk in chunker.iter_chunks(str(file_path), *SIZES)]
+
+
+def test_chunks_cover_the_file(tmp_path, data):
+    chunks = split(tmp_path, data)
+
+    assert b''.join(chunks) == data
+    assert all(SIZES[0] <= len(chunk) <= SIZES[2] for chunk in chunks[:-1])
+    assert SIZES[1] // 2 < len(data) / len(chunks) < SIZES[1] * 2
+
+
+def test_boundaries_do_not_depend_on_the_read_blocks(tmp_path, data, monkeypatch):
+    chunks = split(tmp_path, data)
+
+    monkeypatch.setattr(const, 'C_CHUNK_READ_SIZE', 10000)
+
+    assert split(tmp_path, data) == chunks
+
+
+def test_insertion_only_moves_the_boundaries_around_it(tmp_path, data):
+    chunks = split(tmp_path, data)
+
+    middle = len(data) // 2
+    inserted = split(tmp_path, data[:middle] + b'inserted' * 100 + data[middle:], 'other.bin')
+
+    # The chunks before the insertion are the same, and the next ones are found again.
+    changed = set(inserted).difference(chunks)
+    assert len(changed) <= 3
+    assert len(set(chunks).difference(inserted)) <= 3
+    assert inserted[:len(chunks) // 3] == chunks[:len(chunks) // 3]
+    assert inserted[-len(chunks) // 3:] == chunks[-len(chunks) // 3:]
+
+
+def test_chunk_file_returns_the_digests_and_sizes(tmp_path, data):
+    file_path = tmp_path / 'file.bin'
+    file_path.write_bytes(data)
+
+    chunks = chunker.chunk_file(str(file_path), 'md5', *SIZES)
+
+    assert [size for _, size in chunks] == [len(chunk) for chunk in split(tmp_path, data)]
+    assert chunker.chunk_file(str(tmp_path / 'missing.bin'), 'md5', *SIZES) is None
@@ -0,0 +1,170 @@
+"""
+Tests of the replacement of the duplicates with links, and of their undo.
+"""
+import hashlib
+import json
+import os
+import shutil
+
+import pytest
+
+from manager.core import deduplicator
+from manager.core.deduplicator import Deduplicator, undo_journal
+from manager.core.reports import GroupRecord
+
+CONTENT = b'duplicate content\n' * 64
+
+
+class Crash(BaseException):
+    """Stops the replacement as if the process was killed."""
+
+
+@pytest.fixture(name='files')
+def fixture_files(tmp_path):
+    """Two identical files, the first one is the oldest and is kept."""
+    keeper = tmp_path / 'keeper.bin'
+    duplicate = tmp_path / 'duplicate.bin'
+
+    for index, file_path in enumerate([keeper, duplicate]):
+        file_path.write_bytes(CONTENT)
+        os.utime(file_path, ns=(1_000_000_000 * (index + 1),) * 2)
+
+    os.chmod(duplicate, 0o640)
+
+    return str(keeper), str(duplicate)
+
+
+def deduplicate(files, journal, mode='hardlink'):
+    """Replace the duplicate of the given files, and return the deduplicator."""
+    warnings = []
+    dedup = Deduplicator(mode, 'oldest', [], False, str(journal), 'md5', warnings.append)
+    record = GroupRecord('duplicates', len(CONTENT), hashlib.md5(CONTENT).hexdigest(), 0,
+                         list(files))
+
+    assert list(dedup.apply([record])) == [record]
+    assert not warnings
+
+    return dedup
+
+
+def read_journal(journal):
+    """Read the lines of the given journal."""
+    return [json.loads(line) for line in journal.read_text(encoding='utf-8').splitlines()]
+
+
+def test_replace_with_hard_links(files, tmp_path):
+    keeper, duplicate = files
+    journal = tmp_path / 'journal.jsonl'
+
+    dedup = deduplicate(files, journal)
+
+    assert os.path.samefile(keeper, duplicate)
+    assert (dedup.replaced_files, dedup.reclaimed_bytes) == (1, len(CONTENT))
+
+    entry, completion = read_journal(journal)
+    assert (entry['keeper'], entry['file']) == (keeper, duplicate)
+    assert completion == {
+        'file': duplicate, 'ctime_ns': os.stat(duplicate).st_ctime_ns}
+
+
+def test_undo_restores_the_replaced_files(files, tmp_path):
+    keeper, duplicate = files
+    journal = tmp_path / 'journal.jsonl'
+    deduplicate(files, journal)
+
+    assert undo_journal(str(journal)) == 1
+
+    assert not os.path.samefile(keeper, duplicate)
+    with open(duplicate, 'rb') as restored:
+        assert restored.read() == CONTENT
+
+    stats = os.stat(duplicate)
+    assert (stats.st_mode & 0o7777, stats.st_mtime_ns) == (0o640, 2_000_000_000)
+    assert not journal.exists()
+    assert (tmp_path / 'journal.jsonl.undone').exists()
+
+
+def test_undo_skips_the_files_modified_after_the_replacement(files, tmp_path):
+    keeper, duplicate = files
+    journal = tmp_path / 'journal.jsonl'
+    deduplicate(files, journal)
+
+    # Same size, the links still share their inode.
+    modified = CONTENT.upper()
+    with open(duplicate, 'r+b') as linked:
+        linked.write(modified)
+
+    assert undo_journal(str(journal)) == 0
+    assert os.path.samefile(keeper, duplicate)
+
+
+def test_crash_between_the_link_and_the_rename(files, tmp_path, monkeypatch):
+    keeper, duplicate = files
+    journal = tmp_path / 'journal.jsonl'
+    duplicate_ino = os.stat(duplicate).st_ino
+
+    def crash(*_):
+        raise Crash()
+
+    monkeypatch.setattr(deduplicator.os, 'replace', crash)
+    with pytest.raises(Crash):
+        deduplicate(files, journal)
+    monkeypatch.undo()
+
+    # Journaled and linked, but never renamed.
+    entry, = read_journal(journal)
+    assert os.path.samefile(keeper, entry['temp'])
+    assert os.stat(duplicate).st_ino == duplicate_ino
+
+    assert undo_journal(str(journal)) == 0
+
+    assert not os.path.lexists(entry['temp'])
+    assert os.stat(duplicate).st_ino == duplicate_ino
+    with open(duplicate, 'rb') as untouched:
+        assert untouched.read() == CONTENT
+
+
+def test_undo_of_the_reflinks(files, tmp_path, monkeypatch):
+    keeper, duplicate = files
+    journal = tmp_path / 'journal.jsonl'
+
+    # A copy stands for a clone, on the file systems without reflinks.
+    monkeypatch.setattr(deduplicator, 'reflink_file', shutil.copyfile)
+
+    if os.getuid() == 0:
+        os.chown(duplicate, 1234, 1234)
+
+    deduplicate(files, journal, 'reflink')
+    clone = os.stat(duplicate)
+
+    assert clone.st_ino != os.stat(keeper).st_ino
+    assert clone.st_mtime_ns == 2_000_000_000
+
+    assert undo_journal(str(journal)) == 1
+
+    restored = os.stat(duplicate)
+    assert restored.st_ino != clone.st_ino
+    if os.getuid() == 0:
+        assert (restored.st_uid, restored.st_gid) == (1234, 1234)
+
+
+def test_undo_skips_the_reflinks_modified_after_the_replacement(files, tmp_path, monkeypatch):
+    keeper, duplicate = files
+    journal = tmp_path / 'journal.jsonl'
+
+    monkeypatch.setattr(deduplicator, 'reflink_file', shutil.copyfile)
+    deduplicate(files, journal, 'reflink')
+
+    # The times are set back, the content is checked too.
+    clone = os.stat(duplicate)
+    with open(duplicate, 'r+b') as modified:
+        modified.write(CONTENT.upper())
+    os.utime(duplicate, ns=(clone.st_atime_ns, clone.st_mtime_ns))
+
+    assert undo_journal(str(journal), True) == 0
+    assert undo_journal(str(journal)) == 0
+
+    with open(duplicate, 'rb') as kept:
+        assert kept.read() == CONTENT.upper()
+    with open(keeper, 'rb') as kept:
+        assert kept.read() == CONTENT
@@ -0,0 +1,71 @@
+"""
+Tests of the external sort, and of the scans that spill to the disk.
+"""
+import os
+import random
+
+import pytest
+
+from conftest import write_tree
+from manager.core import external_sort
+from manager.core.external_sort import ExternalSorter
+
+
+@pytest.fixture(name='spills')
+def fixture_spills(monkeypatch):
+    """Spill a run every few records, and count the spilled folders."""
+    folders = []
+
+    def mkdtemp(*args, **kwargs):
+        folders.append(real_mkdtemp(*args, **kwargs))
+        return folders[-1]
+
+    real_mkdtemp = external_sort.mkdtemp
+    monkeypatch.setattr(external_sort, 'mkdtemp', mkdtemp)
+    monkeypatch.setattr(external_sort.const, 'C_SORT_RECORD_OVERHEAD', 300 * 1024)
+    monkeypatch.setattr(external_sort.const, 'C_SORT_CHUNK_SIZE', 3)
+    monkeypatch.setattr(external_sort.const, 'C_SORT_MAX_RUNS', 2)
+
+    return folders
+
+
+def test_sorter_merges_the_runs(tmp_path, spills):
+    records = [(random.randrange(100), str(index)) for index in range(200)]
+    sorter = ExternalSorter(1024 * 1024, str(tmp_path))
+
+    for record in records:
+        sorter.add(record)
+
+    assert len(sorter) == len(records)
+    assert list(sorter) == sorted(records)
+    assert spills and not any(os.path.exists(folder) for folder in spills)
+
+
+def make_tree(root):
+    """Groups of several sizes, with files of the same size and other contents."""
+    generator = random.Random(7)
+    files = {}
+
+    for index in range(60):
+        size = generator.choice([10, 100, 5000, 20000])
+        content = bytes([generator.randrange(4)]) * size
+        files[f'{index % 5}/{index}.bin'] = content
+
+    write_tree(root, files)
+    os.link(root / '0' / '0.bin', root / '1' / 'link.bin')
+
+
+def test_external_sort_finds_the_same_groups(tmp_path, run_scan, spills):
+    root = tmp_path / 'tree'
+    make_tree(root)
+
+    in_memory = run_scan(root, EXTERNAL_SORT='0')
+    assert not spills
+
+    external = run_scan(root, EXTERNAL_SORT='1', SORT_MEMORY='1',
+                        SORT_TEMP_FOLDER=str(tmp_path))
+
+    assert spills
+    assert [record.kind for record in in_memory].count('hard_links') == 1
+    assert [(record.kind, record.size, record.hash, record.files) for record in external] == \
+        [(record.kind, record.size, record.hash, record.files) for record in in_memory]
@@ -0,0 +1,75 @@
+"""
+Tests of the grouping of the duplicates by size, partial hash and full hash.
+"""
+import os
+from collections import defaultdict
+
+import pytest
+
+from conftest import group_files, write_tree
+
+BLOCK = 4096
+
+
+def make_tree(root):
+    """Files of the same size that differ in their head, middle or tail blocks."""
+    base = bytes(range(256)) * (BLOCK * 4 // 256)
+    middle = bytearray(base)
+    middle[len(base) // 2] ^= 0xFF
+    tail = bytearray(base)
+    tail[-1] ^= 0xFF
+
+    write_tree(root, {
+        'a/base.bin': base,
+        'b/base.bin': base,
+        'c/base copy.bin': base,
+        'a/middle.bin': bytes(middle),
+        'b/middle.bin': bytes(middle),
+        'a/tail.bin': bytes(tail),
+        'a/head.bin': b'\0' + base[1:],
+        'a/small.txt': b'small',
+        'b/small.txt': b'small',
+        'b/other.txt': b'other',
+        'a/empty': b'',
+    })
+
+
+def brute_force(root):
+    """Group the non empty files of the folder by their whole content."""
+    groups = defaultdict(list)
+
+    for folder, _, files in os.walk(root):
+        for name in files:
+            file_path = os.path.join(folder, name)
+            with open(file_path, 'rb') as file_to_read:
+                content = file_to_read.read()
+            if content:
+                groups[content].append(file_path)
+
+    return sorted(sorted(files) for files in groups.values() if len(files) > 1)
+
+
+@pytest.mark.parametrize('settings', [
+    {'PARTIAL_BLOCK_SIZE': '0'},
+    {'PARTIAL_BLOCK_SIZE': str(BLOCK)},
+    {'PARTIAL_BLOCK_SIZE': '512', 'PARTIAL_SAMPLES': '2'},
+    {'PARTIAL_BLOCK_SIZE': '512', 'VERIFY_ALGORITHM': 'sha256'},
+])
+def test_partial_hash_keeps_the_groups(tmp_path, run_scan, settings):
+    root = tmp_path / 'tree'
+    make_tree(root)
+
+    assert group_files(run_scan(root, **settings)) == brute_force(root)
+
+
+def test_groups_are_sorted_by_size_and_digest(tmp_path, run_scan):
+    root = tmp_path / 'tree'
+    make_tree(root)
+
+    records = run_scan(root)
+
+    assert [(record.size, record.hash) for record in records] == \
+        sorted((record.size, record.hash) for record in records)
+    for record in records:
+        assert record.files == sorted(record.files)
+        assert record.wasted == record.size * (len(record.files) - 1)
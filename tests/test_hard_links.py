@@ -0,0 +1,40 @@
+"""
+Tests of the hard links, reported apart from the duplicates.
+"""
+import os
+
+from conftest import group_files, write_tree
+
+CONTENT = b'linked content\n' * 256
+
+
+def test_hard_links_are_not_duplicates(tmp_path, run_scan):
+    root = tmp_path / 'tree'
+    write_tree(root, {'a/file.bin': CONTENT, 'c/copy.bin': CONTENT})
+    os.makedirs(root / 'b')
+    os.link(root / 'a' / 'file.bin', root / 'b' / 'link.bin')
+    os.link(root / 'a' / 'file.bin', root / 'b' / 'other link.bin')
+
+    records = run_scan(root)
+
+    assert group_files(records, 'hard_links') == [[
+        str(root / 'a' / 'file.bin'), str(root / 'b' / 'link.bin'),
+        str(root / 'b' / 'other link.bin')]]
+
+    # Only the first link is compared, the links don't waste any space.
+    duplicates, = [record for record in records if record.kind == 'duplicates']
+    assert sorted(duplicates.files) == [
+        str(root / 'a' / 'file.bin'), str(root / 'c' / 'copy.bin')]
+    assert duplicates.wasted == len(CONTENT)
+
+
+def test_links_alone_are_not_duplicates(tmp_path, run_scan):
+    root = tmp_path / 'tree'
+    write_tree(root, {'file.bin': CONTENT})
+    os.link(root / 'file.bin', root / 'link.bin')
+
+    records = run_scan(root)
+
+    assert group_files(records) == []
+    assert group_files(records, 'hard_links') == [
+        [str(root / 'file.bin'), str(root / 'link.bin')]]
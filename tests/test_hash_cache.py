@@ -0,0 +1,64 @@
+"""
+Tests of the invalidation of the cached hashes.
+"""
+import os
+
+from conftest import group_files, write_tree
+from manager.core.hash_cache import HashCache
+from manager.core.utils import FileEntry
+
+CONTENT = b'cached content\n' * 512
+
+
+def test_entries_are_invalidated_by_the_size_and_mtime(tmp_path):
+    entry = FileEntry('file.bin', 100, 1, 2, 1_000, 1)
+    cache = HashCache(str(tmp_path / 'cache.sqlite'), 0, 0)
+
+    cache.set(entry, 'md5', 'first')
+    cache.save()
+
+    assert cache.get(entry, 'md5') == 'first'
+    assert cache.get(entry, 'sha256') is None
+    assert cache.get(entry._replace(size=101), 'md5') is None
+    assert cache.get(entry._replace(mtime_ns=2_000), 'md5') is None
+
+    cache.set(entry._replace(mtime_ns=2_000), 'md5', 'second')
+    cache.save()
+
+    assert cache.get(entry, 'md5') is None
+    assert cache.get(entry._replace(mtime_ns=2_000), 'md5') == 'second'
+    cache.close()
+
+
+def test_cached_entries_persist_between_the_scans(tmp_path):
+    entry = FileEntry('file.bin', 100, 1, 2, 1_000, 1)
+    cache_file = str(tmp_path / 'cache.sqlite')
+
+    cache = HashCache(cache_file, 0, 0)
+    cache.set(entry, 'md5', 'first')
+    cache.close()
+
+    cache = HashCache(cache_file, 0, 0)
+    assert cache.get(entry, 'md5') == 'first'
+    cache.close()
+
+
+def test_rescan_sees_the_modified_files(tmp_path, run_scan):
+    root = tmp_path / 'tree'
+    write_tree(root, {'a.bin': CONTENT, 'b.bin': CONTENT, 'c.bin': CONTENT})
+    paths = [str(root / name) for name in ['a.bin', 'b.bin', 'c.bin']]
+
+    assert group_files(run_scan(root, HASH_CACHE='1')) == [paths]
+    assert (tmp_path / 'output' / 'dfm_output' / 'hash_cache.sqlite').exists()
+
+    # Same size, new content and mtime.
+    write_tree(root, {'b.bin': CONTENT.upper()})
+    os.utime(paths[1], ns=(10**18, 10**18))
+    # New size.
+    write_tree(root, {'c.bin': CONTENT + b'!'})
+
+    assert group_files(run_scan(root, HASH_CACHE='1')) == []
+
+    write_tree(root, {'b.bin': CONTENT})
+
+    assert group_files(run_scan(root, HASH_CACHE='1')) == [paths[:2]]
@@ -0,0 +1,58 @@
+"""
+Tests of the BK-tree radius search and of the clustering of the perceptual hashes.
+"""
+import random
+
+import pytest
+
+from manager.core.perceptual import BKTree, cluster_hashes, hamming_distance
+
+
+@pytest.fixture(name='hashes')
+def fixture_hashes():
+    """Random 16 bits hashes, some of them shared by several items."""
+    generator = random.Random(3)
+    values = [generator.getrandbits(16) for _ in range(300)]
+
+    return {f'item {index}': values[generator.randrange(len(values))] if index % 7 == 0
+            else value for index, value in enumerate(values)}
+
+
+def test_search_finds_the_hashes_within_the_radius(hashes):
+    tree = BKTree()
+    for item, value in hashes.items():
+        tree.add(value, item)
+
+    assert len(tree) == len(hashes)
+
+    for radius in [0, 1, 3, 6]:
+        for value in list(hashes.values())[:50] + [0, 0xFFFF]:
+            expected = sorted((hamming_distance(value, other), item)
+                              for item, other in hashes.items()
+                              if hamming_distance(value, other) <= radius)
+
+            assert sorted(tree.search(value, radius)) == expected
+
+
+def test_empty_tree_finds_nothing():
+    assert BKTree().search(0, 64) == []
+
+
+def test_clusters_link_the_close_hashes(hashes):
+    radius = 2
+    items = list(hashes)
+
+    # Single linkage, by comparing every pair.
+    clusters = {item: {item} for item in items}
+    for index, item in enumerate(items):
+        for other in items[index + 1:]:
+            if hamming_distance(hashes[item], hashes[other]) <= radius and \
+                    clusters[item] is not clusters[other]:
+                merged = clusters[item] | clusters[other]
+                for member in merged:
+                    clusters[member] = merged
+
+    expected = {frozenset(cluster) for cluster in clusters.values() if len(cluster) > 1}
+
+    assert {frozenset(cluster) for cluster in cluster_hashes(hashes, radius)} == expected
+    assert expected
@@ -0,0 +1,67 @@
+"""
+Tests of the duplicate groups added and removed by the watcher.
+"""
+import json
+import os
+
+from conftest import write_tree
+from manager.duplicates import duplicates_watcher
+from manager.duplicates.duplicates_watcher import DuplicatesWatcher
+
+CONTENT = b'watched content\n' * 64
+
+
+class ScriptedWatcher:
+    """Apply the given changes to the folder, one per check, and report them."""
+
+    def __init__(self, steps: list):
+        self.steps = steps
+
+    def changes(self):
+        """Apply the next change, and return what it changed."""
+        change, changed, removed, overflow = self.steps.pop(0)
+        change()
+        return set(changed), set(removed), overflow
+
+    def close(self):
+        """Nothing to stop."""
+
+
+def test_watcher_emits_the_changed_groups(tmp_path, monkeypatch):
+    root = tmp_path / 'tree'
+    write_tree(root, {'a.bin': CONTENT, 'b.bin': CONTENT})
+    a, b, c = (str(root / name) for name in ['a.bin', 'b.bin', 'c.bin'])
+    x, y = (str(root / 'sub' / name) for name in ['x.bin', 'y.bin'])
+
+    def modify_b():
+        write_tree(root, {'b.bin': CONTENT.upper()})
+        os.utime(b, ns=(10**18, 10**18))
+
+    steps = [
+        (lambda: write_tree(root, {'c.bin': CONTENT}), [c], [], False),
+        (modify_b, [b], [], False),
+        (lambda: os.remove(c), [], [c], False),
+        # The events were lost, the folders are walked again.
+        (lambda: write_tree(root, {'sub/x.bin': CONTENT, 'sub/y.bin': CONTENT}), [], [], True),
+    ]
+    monkeypatch.setattr(duplicates_watcher, 'create_watcher',
+                        lambda *_: ScriptedWatcher(steps))
+
+    with DuplicatesWatcher([str(root)], {
+            'OUTPUT_FOLDER': str(tmp_path / 'output'), 'HASH_CACHE': '0',
+            'CHECKPOINT': '0'}) as watcher:
+        watcher.watch(cycles=4)
+
+    with open(tmp_path / 'output' / 'dfm_output' / 'watch_deltas.jsonl',
+              encoding='utf-8') as deltas:
+        events = [(delta['event'], delta['files']) for delta in map(json.loads, deltas)]
+
+    assert events == [
+        ('add', [a, b]),
+        ('remove', [a, b]),
+        ('add', [a, b, c]),
+        ('remove', [a, b, c]),
+        ('add', [a, c]),
+        ('remove', [a, c]),
+        ('add', [a, x, y]),
+    ]